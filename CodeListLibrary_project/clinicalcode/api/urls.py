@@ -9,7 +9,7 @@ from drf_yasg import openapi
 
 from .views import (
   Concept, GenericEntity, Template, DataSource,
-  Tag, Collection, Ontology, Healthcheck
+  Tag, Collection, Ontology, Healthcheck, Code
 )
 
 """ Router
@@ -32,6 +32,10 @@ class SchemaGenerator(OpenAPISchemaGenerator):
     def get_schema(self, request=None, public=False):
         schema = super(SchemaGenerator, self).get_schema(request, public)
         schema.basePath = request.path.replace('swagger/', '')
+        schema.info = openapi.Info(
+            title = getattr(request, 'SWAGGER_TITLE', settings.SWAGGER_TITLE),
+            default_version = schema.info.version,
+        )
         if settings.IS_DEVELOPMENT_PC or settings.IS_INSIDE_GATEWAY:
             schema.schemes = ["http", "https"]
         else:
@@ -135,6 +139,11 @@ urlpatterns += [
         Concept.get_concept_version_history,
         name='get_concept_versions'),
 
+    # Codes
+    url(r'^codes/(?P<coding_system_id>\d+)/(?P<code>[^/]+)/phenotypes/$',
+        Code.get_code_phenotypes,
+        name='code_phenotypes'),
+
     # Datasources
     url(r'^data-sources/$', 
         DataSource.get_datasources, 
@@ -184,14 +193,13 @@ urlpatterns += [
         name='app_health'),
 ]
 
-""" Create/Update urls """
-if not settings.CLL_READ_ONLY:
-    urlpatterns += [
-        # GenericEntities (Phenotypes)
-        url(r'^phenotypes/create/$',
-            GenericEntity.create_generic_entity,
-            name='create_generic_entity'),
-        url(r'^phenotypes/update/$',
-            GenericEntity.update_generic_entity,
-            name='update_generic_entity'),
-    ]
+""" Create/Update urls, included by `cll.urls.build_urlpatterns()` for URL configurations that aren't READ-ONLY """
+write_urlpatterns = [
+    # GenericEntities (Phenotypes)
+    url(r'^phenotypes/create/$',
+        GenericEntity.create_generic_entity,
+        name='create_generic_entity'),
+    url(r'^phenotypes/update/$',
+        GenericEntity.update_generic_entity,
+        name='update_generic_entity'),
+]
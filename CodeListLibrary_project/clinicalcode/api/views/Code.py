@@ -0,0 +1,122 @@
+from ...routers import get_read_connection
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticatedOrReadOnly
+
+from ...models.CodingSystem import CodingSystem
+from ...entity_utils import model_utils, gen_utils, constants
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def get_code_phenotypes(request, coding_system_id, code):
+    """
+        Get the published Phenotypes whose final codelist contains the specified code(s)
+
+        The `code` path parameter accepts either (a) a single code or (b) a comma-delimited list of codes,
+        up to 1000 codes can be looked up per request.
+
+        Endpoint query parameters:
+
+        | Param | Type          | Default | Desc                                                                       |
+        |-------|---------------|---------|----------------------------------------------------------------------------|
+        | codes | `str`/`str[]` | `NULL`  | Either (a) a code or (b) a list of comma-delimited codes to look up in addition to the path parameter |
+    """
+    coding_system_id = gen_utils.parse_int(coding_system_id, default=None)
+    coding_system = model_utils.try_get_instance(CodingSystem, pk=coding_system_id) if coding_system_id is not None else None
+    if coding_system is None:
+        return Response(
+            data={
+                'message': 'Invalid coding system, expected the id of a known coding system'
+            },
+            content_type='json',
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    codes = [ code ]
+    extra_codes = request.query_params.get('codes')
+    if isinstance(extra_codes, str):
+        codes.append(extra_codes)
+
+    codes = [
+        x.strip()
+        for value in codes
+            for x in value.split(',')
+                if not gen_utils.is_empty_string(x)
+    ]
+    codes = list(dict.fromkeys(codes))
+
+    if len(codes) < 1:
+        return Response(
+            data={
+                'message': 'Invalid code(s), expected at least one code'
+            },
+            content_type='json',
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if len(codes) > constants.CODE_LOOKUP_MAX_CODES:
+        return Response(
+            data={
+                'message': f'Too many codes, expected at most {constants.CODE_LOOKUP_MAX_CODES} codes per request'
+            },
+            content_type='json',
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    params = { 'coding_system_id': coding_system.id, 'codes': codes }
+
+    brand = model_utils.try_get_brand(request)
+    brand_clause = ''
+    if brand is not None:
+        brand_clause = 'and live_entity.brands && %(brand_ids)s'
+        params.update({ 'brand_ids': [brand.id] })
+
+    with get_read_connection().cursor() as cursor:
+        sql = f'''
+        select link.code,
+               link.entity_id,
+               link.entity_history_id,
+               entity.name,
+               link.concept_id,
+               link.concept_version_id
+          from public.clinicalcode_codeentitylink as link
+          join public.clinicalcode_genericentity as live_entity
+            on live_entity.id = link.entity_id
+          join public.clinicalcode_historicalgenericentity as entity
+            on entity.id = link.entity_id
+           and entity.history_id = link.entity_history_id
+         where link.coding_system_id = %(coding_system_id)s
+           and link.code = any(%(codes)s)
+           and (live_entity.is_deleted is null or live_entity.is_deleted = false)
+           and entity.publish_status = {constants.APPROVAL_STATUS.APPROVED.value}
+           {brand_clause}
+         order by link.code asc, link.entity_id asc, link.entity_history_id desc, link.concept_id asc, link.concept_version_id desc;
+        '''
+
+        cursor.execute(sql, params=params)
+        rows = cursor.fetchall()
+
+    results = { x: [ ] for x in codes }
+    for code, entity_id, entity_history_id, entity_name, concept_id, concept_version_id in rows:
+        results.get(code, [ ]).append({
+            'phenotype_id': entity_id,
+            'phenotype_version_id': entity_history_id,
+            'phenotype_name': entity_name,
+            'concept_id': concept_id,
+            'concept_version_id': concept_version_id,
+        })
+
+    return Response(
+        data={
+            'coding_system': {
+                'id': coding_system.id,
+                'name': coding_system.name,
+            },
+            'results': [
+                { 'code': code, 'phenotypes': phenotypes }
+                for code, phenotypes in results.items()
+            ],
+        },
+        status=status.HTTP_200_OK
+    )
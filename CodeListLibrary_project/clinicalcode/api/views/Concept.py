@@ -1,4 +1,4 @@
-from django.db import connection
+from ...routers import get_read_connection
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
@@ -304,7 +304,7 @@ def get_concepts(request):
         'waccess': 2
     }
 
-    with connection.cursor() as cursor:
+    with get_read_connection().cursor() as cursor:
         if should_paginate:
             sql = psycopg2.sql.SQL('''
             select
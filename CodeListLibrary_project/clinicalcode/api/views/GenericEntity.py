@@ -1,4 +1,5 @@
-from rest_framework.decorators import (api_view, permission_classes)
+from rest_framework.decorators import (api_view, permission_classes, renderer_classes)
+from rest_framework.settings import api_settings
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
@@ -176,6 +177,7 @@ def get_generic_entity_version_history(request, phenotype_id=None):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, api_utils.NDJsonRenderer, api_utils.CsvRenderer])
 @gen_utils.measure_perf
 def get_generic_entities(request):
     """
@@ -189,9 +191,16 @@ def get_generic_entities(request):
             | search              | `string`       | `NULL`             | Full-text search                                                       |
             | template_id         | `number`       | `NULL`             | Filter results by Template ID                                          |
             | template_version_id | `number`       | `NULL`             | Filter results by Template Version (if `ID` applied)                   |
-            | page                | `number`       | `1`                | Page cursor                                                            |
+            | page                | `number`       | `1`                | Page number                                                            |
+            | cursor              | `string`       | `NULL`             | Keyset pagination cursor, see `next_cursor` of the previous page       |
             | page_size           | `enum/number`  | `1` (_20_ results) | Page size enum, where `1` = 20, `2` = 50 & `3` = 100 rows              |
             | no_pagination       | `empty`        | `NULL`             | you can append this parameter to your query to disable pagination      |
+            | format              | `string`       | `json`             | One of `json`, `ndjson` or `csv`; `ndjson` & `csv` stream the results  |
+
+        - **Streamed Exports** → _i.e._ Full exports of the resultset
+
+            - Append `?no_pagination&format=ndjson` or `?no_pagination&format=csv` to your query to stream every result, one `Phenotype` per line
+            - Nested values of the `csv` format, _e.g._ `tags`, are JSON encoded
 
         - **Metadata Parameters** → _i.e._ Top-level fields associated with all `Phenotypes`
 
@@ -239,6 +248,33 @@ def get_generic_entities(request):
 
     should_paginate = 'no_pagination' not in request.query_params.keys()
 
+    stream_format = params.pop('format', None)
+    stream_format = stream_format.lower() if isinstance(stream_format, str) else None
+    stream_format = stream_format if stream_format in constants.API_STREAM_FORMATS else None
+    if stream_format is not None and should_paginate:
+        return Response(
+            data={
+                'message': 'The %s format requires the no_pagination parameter' % stream_format
+            },
+            content_type='json',
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    cursor = params.pop('cursor', None)
+    use_cursor = should_paginate and cursor is not None
+    if use_cursor and not gen_utils.is_empty_string(cursor):
+        cursor = search_utils.decode_pagination_cursor(cursor, size=2)
+        if cursor is None or not isinstance(cursor[0], int) or not isinstance(cursor[1], str):
+            return Response(
+                data={
+                    'message': 'Invalid pagination cursor'
+                },
+                content_type='json',
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    else:
+        cursor = None
+
     page_size = None
     if should_paginate:
         page_size = params.pop('page_size', None)
@@ -526,21 +562,20 @@ def get_generic_entities(request):
     else:
         query_clauses = ''
 
-    query = '''
-    select *
-      from entities t
-    '''
-
+    query_filters = []
     if isinstance(search, str) and len(search) > 0:
-        query = query + '''
-         where t.search_vector @@ to_tsquery(
+        query_filters.append('''
+        t.search_vector @@ to_tsquery(
             'pg_catalog.english',
             replace(to_tsquery('pg_catalog.english', concat(regexp_replace(trim(%(search)s), '\W+', ':* & ', 'gm'), ':*'))::text, '<->', '|')
-         )
-        '''
+        )
+        ''')
         query_params.update({ 'search': search })
 
-    try:
+    def get_entity_query(keyset_clauses=''):
+        """
+            Builds the query of the accessible entities, optionally seeking past a keyset cursor
+        """
         if not user:
             accessible = f'''
             select t1.*
@@ -563,6 +598,7 @@ def get_generic_entities(request):
                    and (entity.is_deleted is null or entity.is_deleted = false)
                    {accessible_clauses}
                    {tmpl_clauses}
+                   {keyset_clauses}
               ) as t0
               join public.clinicalcode_historicalgenericentity as t1
                 on t0.id = t1.id
@@ -591,6 +627,7 @@ def get_generic_entities(request):
                   and (entity.is_deleted is null or entity.is_deleted = false)
                     {accessible_clauses}
                     {tmpl_clauses}
+                    {keyset_clauses}
              ) as t0
              join public.clinicalcode_historicalgenericentity as t1
                on t0.id = t1.id
@@ -598,57 +635,124 @@ def get_generic_entities(request):
             where t0.rn_ref_n = 1
             '''
 
-        entities = GenericEntity.history.raw(
-            raw_query='''
+        return '''
             with
                 accessible as (
                     %(accessible)s
                 ),
                 entities as (
-                    select *
+                    select *,
+                           coalesce(entity.entity_number, 0) as true_id
                     from accessible as entity
                     %(clauses)s
                 )
 
-            %(query)s
-             order by cast(regexp_replace(id::text, '[a-zA-Z]+', '') as integer) asc;
+            select *
+              from entities t
+            %(filters)s
+        ''' % {
+            'clauses': query_clauses,
+            'accessible': accessible,
+            'filters': ('where ' + ' and '.join(query_filters)) if len(query_filters) > 0 else '',
+        }
 
-            ''' % {
-                'query': query,
-                'clauses': query_clauses,
-                'accessible': accessible,
-            },
-            params=query_params
-        )
+    try:
+        entity_query = get_entity_query()
+
+        # Stream results
+        if stream_format is not None:
+            columns = None
+            if stream_format == 'csv':
+                columns = api_utils.get_entity_detail_columns(
+                    templates, is_authed, fields_to_ignore=constants.ENTITY_LIST_API_HIDDEN_FIELDS
+                )
+
+            return api_utils.stream_entity_details(
+                request,
+                '''
+                select t.id, t.history_id
+                  from (
+                    %(query)s
+                  ) as t
+                 order by t.true_id asc, t.id asc
+                ''' % { 'query': entity_query },
+                query_params,
+                is_authed,
+                stream_format=stream_format,
+                columns=columns,
+                fields_to_ignore=constants.ENTITY_LIST_API_HIDDEN_FIELDS
+            )
 
         # Paginate results
+        total_rows = None
+        total_pages = None
+        page_limits = ''
         if should_paginate:
-            entities = search_utils.try_get_paginated_results(
-                request, entities, page, page_size=page_size
-            )
+            total_rows = search_utils.try_get_query_count(entity_query, query_params, default=0)
+            total_pages = max((total_rows + page_size - 1) // page_size, 1)
+
+            if use_cursor:
+                # Seek within the accessible rows, i.e. before their latest versions are ranked, such that
+                # deep pages never build the whole result set
+                if cursor is not None:
+                    entity_query = get_entity_query(
+                        'and (coalesce(entity.entity_number, 0), entity.id) > (%(cursor_true_id)s, %(cursor_id)s)'
+                    )
+                    query_params.update({ 'cursor_true_id': cursor[0], 'cursor_id': cursor[1] })
+
+                page_limits = 'limit %(page_limit)s'
+                query_params.update({ 'page_limit': page_size })
+            else:
+                page = min(page, total_pages)
+                page_limits = 'limit %(page_limit)s offset %(page_offset)s'
+                query_params.update({ 'page_limit': page_size, 'page_offset': (page - 1)*page_size })
 
-        # Get details of each entity
-        formatted_entities = []
-        for entity in entities:
-            entity_detail = api_utils.get_entity_detail(
-                request, 
-                entity.id,
-                entity, 
-                is_authed, 
-                fields_to_ignore=constants.ENTITY_LIST_API_HIDDEN_FIELDS, 
-                return_data=True
-            )
+        entities = list(GenericEntity.history.raw(
+            raw_query='''
+            select *
+              from (
+                %(query)s
+              ) as t
+             order by t.true_id asc, t.id asc
+            %(limits)s
+            ''' % {
+                'query': entity_query,
+                'limits': page_limits,
+            },
+            params=query_params
+        ))
 
-            if not isinstance(entity_detail, Response):
-                entity_detail.update(phenotype_version_id=entity.history_id)
-                formatted_entities.append(entity_detail)
+        # Get details of each entity
+        formatted_entities = api_utils.get_entity_detail_batch(
+            request,
+            entities,
+            is_authed,
+            fields_to_ignore=constants.ENTITY_LIST_API_HIDDEN_FIELDS
+        )
 
-        result = formatted_entities if not should_paginate else {
-            'page': min(entities.paginator.num_pages, page),
-            'total_pages': entities.paginator.num_pages,
-            'page_size': page_size,
-            'data': formatted_entities
-        }
+        next_cursor = None
+        if should_paginate and len(entities) >= page_size and (use_cursor or page < total_pages):
+            last_entity = entities[-1]
+            next_cursor = search_utils.encode_pagination_cursor([last_entity.true_id, last_entity.id])
+
+        if not should_paginate:
+            result = formatted_entities
+        elif use_cursor:
+            result = {
+                'total': total_rows,
+                'total_pages': total_pages,
+                'page_size': page_size,
+                'next_cursor': next_cursor,
+                'data': formatted_entities
+            }
+        else:
+            result = {
+                'page': page,
+                'total_pages': total_pages,
+                'page_size': page_size,
+                'next_cursor': next_cursor,
+                'data': formatted_entities
+            }
     except Exception as e:
         logger.error('Encountered error on Phenotype API Query: \n%s\n' % (str(e)))
         raise BadRequest('Invalid request, failed to perform query')
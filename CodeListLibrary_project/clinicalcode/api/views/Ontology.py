@@ -2,7 +2,7 @@ from rest_framework.decorators import (api_view, permission_classes)
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework import status
-from django.db import connection
+from ...routers import get_read_connection
 from django.views.decorators.cache import cache_page
 
 import re
@@ -203,7 +203,7 @@ def get_ontology_nodes(request):
             limit %(page_size)s
         ''' % page_details
 
-    with connection.cursor() as cursor:
+    with get_read_connection().cursor() as cursor:
         sql = '''
         with
             matches as (
@@ -14,7 +14,7 @@ def get_canonical_path(request, force_prod_rel=False):
     # Refer Prod site (HDRUK-branded in this case) to its correct domain (e.g. phenotypes.healthdatagateway.org)
     CANONICAL_PATH = request.build_absolute_uri(request.path)
     cp = CANONICAL_PATH
-    if settings.IS_PROD_SITE or force_prod_rel:
+    if getattr(request, 'IS_PROD_SITE', False) or force_prod_rel:
         url_list = CANONICAL_PATH.split('/')
         if len(url_list) > 4:
             start_index = 4
@@ -61,7 +61,7 @@ def robots(content="all"):
         def wrap(request, *args, **kwargs):
             response = func(request, *args, **kwargs)
 
-            if settings.IS_DEMO or settings.IS_DEVELOPMENT_PC or not settings.IS_PROD_SITE:
+            if settings.IS_DEMO or settings.IS_DEVELOPMENT_PC or not getattr(request, 'IS_PROD_SITE', False):
                 content="noindex, nofollow"
                 response['X-Robots-Tag'] = content
 
@@ -82,7 +82,7 @@ def robots2(content="all"):
         def wrap(request, *args, **kwargs):
             response = func(request, *args, **kwargs)
             
-            if settings.IS_DEMO or settings.IS_DEVELOPMENT_PC or not settings.IS_PROD_SITE:
+            if settings.IS_DEMO or settings.IS_DEVELOPMENT_PC or not getattr(request, 'IS_PROD_SITE', False):
                 content="noindex, nofollow"
                 response['X-Robots-Tag'] = content
                 
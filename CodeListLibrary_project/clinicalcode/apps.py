@@ -2,13 +2,47 @@
 from django.conf import settings
 from django.apps import AppConfig
 from django.template import base as template_base
+from django.core.cache import cache
 from django.core.signals import request_started
+from django.db.models.signals import pre_save, post_save, post_delete
 
 import re
 
 # Enable multi-line tag support
 template_base.tag_re = re.compile(template_base.tag_re.pattern, re.DOTALL)
 
+# Signal receivers
+def invalidate_brand_context(*args, **kwargs):
+	"""Clears the cached Brand instances & their precompiled URL configurations"""
+	from cll.urls import clear_brand_urlconfs
+
+	cache.delete_many(['brands_all__cache', 'brands_names__cache'])
+	clear_brand_urlconfs()
+
+def track_accessible_entity_changes(*args, **kwargs):
+	"""Flags whether an entity's save modifies its accessibility"""
+	from clinicalcode.entity_utils.permission_utils import track_accessible_entity_changes
+
+	track_accessible_entity_changes(*args, **kwargs)
+
+def invalidate_accessible_entities(*args, **kwargs):
+	"""Schedules the refresh of the precomputed accessible entity set"""
+	from clinicalcode.entity_utils.permission_utils import invalidate_accessible_entities
+
+	invalidate_accessible_entities(*args, **kwargs)
+
+def invalidate_code_entity_links(*args, **kwargs):
+	"""Schedules the refresh of the published code to phenotype index"""
+	from clinicalcode.entity_utils.concept_utils import invalidate_code_entity_links
+
+	invalidate_code_entity_links(*args, **kwargs)
+
+def invalidate_filter_panels(*args, **kwargs):
+	"""Invalidates the rendered search filter panels"""
+	from clinicalcode.entity_utils.search_utils import invalidate_filter_panels
+
+	invalidate_filter_panels(*args, **kwargs)
+
 # App registration
 class ClinicalCodeConfig(AppConfig):
 	"""CLL Base App Config"""
@@ -17,6 +51,59 @@ class ClinicalCodeConfig(AppConfig):
 	def ready(self):
 		"""Initialises signals on app start"""
 
+		# Invalidate Brand context on change
+		Brand = self.get_model('Brand')
+		post_save.connect(
+			receiver=invalidate_brand_context,
+			sender=Brand,
+			dispatch_uid='clinicalcode_brand_context_save'
+		)
+		post_delete.connect(
+			receiver=invalidate_brand_context,
+			sender=Brand,
+			dispatch_uid='clinicalcode_brand_context_delete'
+		)
+
+		# Invalidate accessible entities on publication, archival & brand change
+		pre_save.connect(
+			receiver=track_accessible_entity_changes,
+			sender=self.get_model('GenericEntity'),
+			dispatch_uid='clinicalcode_genericentity_accessible_track'
+		)
+		for model_name in ['GenericEntity', 'PublishedGenericEntity']:
+			model = self.get_model(model_name)
+			post_save.connect(
+				receiver=invalidate_accessible_entities,
+				sender=model,
+				dispatch_uid=f'clinicalcode_{model_name.lower()}_accessible_save'
+			)
+			post_delete.connect(
+				receiver=invalidate_accessible_entities,
+				sender=model,
+				dispatch_uid=f'clinicalcode_{model_name.lower()}_accessible_delete'
+			)
+
+		# Invalidate the rendered search filters on change of their reference tables
+		for model_name in ['Tag', 'CodingSystem', 'Template', 'EntityClass', 'Brand']:
+			model = self.get_model(model_name)
+			post_save.connect(
+				receiver=invalidate_filter_panels,
+				sender=model,
+				dispatch_uid=f'clinicalcode_{model_name.lower()}_filters_save'
+			)
+			post_delete.connect(
+				receiver=invalidate_filter_panels,
+				sender=model,
+				dispatch_uid=f'clinicalcode_{model_name.lower()}_filters_delete'
+			)
+
+		# Refresh the published code index on publication
+		post_save.connect(
+			receiver=invalidate_code_entity_links,
+			sender=self.get_model('PublishedGenericEntity'),
+			dispatch_uid='clinicalcode_publishedgenericentity_code_links_save'
+		)
+
 		# Enable EasyAudit signal override
 		if settings.REMOTE_TEST or settings.IS_INSIDE_GATEWAY:
 			return
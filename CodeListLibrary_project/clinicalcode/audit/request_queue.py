@@ -0,0 +1,194 @@
+"""Asynchronous, batched EasyAudit request logging."""
+from collections import deque
+from importlib import import_module
+from easyaudit import settings as EasySettings
+from easyaudit.models import RequestEvent
+from easyaudit.backends import ModelBackend
+from django.db import close_old_connections
+from django.conf import settings as AppSettings
+from django.contrib.auth import SESSION_KEY
+from django.utils.module_loading import import_string
+
+import os
+import atexit
+import logging
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestEventQueue:
+	"""
+	Bounded, in-process queue of request events that are bulk inserted into the audit table by a background thread
+
+	.. Note::
+		- A flush is triggered once `batch_size` events are pending, or `flush_interval` seconds have elapsed since the last flush;
+		- The session key of each event is resolved to its user by the background thread, _i.e._ off the request's critical path;
+		- If the queue is full, events are discarded in accordance with the `backpressure` policy and recorded by the `dropped` counter;
+		- The flusher is (re)started lazily per process, _i.e._ it's safe to use alongside pre-forking workers.
+
+	Args:
+		max_size         (int): optionally specify the max. no. of pending events; defaults to `10000`
+		batch_size       (int): optionally specify the no. of events written per bulk insert; defaults to `500`
+		flush_interval (float): optionally specify the max. no. of seconds an event remains pending; defaults to `5`
+		backpressure     (str): optionally specify one of `drop_newest` or `drop_oldest`; defaults to `drop_oldest`
+
+	"""
+	BACKPRESSURE_POLICIES = ('drop_newest', 'drop_oldest')
+
+	def __init__(self, max_size=10000, batch_size=500, flush_interval=5, backpressure='drop_oldest'):
+		self.max_size = max(int(max_size), 1)
+		self.batch_size = max(min(int(batch_size), self.max_size), 1)
+		self.flush_interval = max(float(flush_interval), 0.1)
+		self.backpressure = backpressure if backpressure in self.BACKPRESSURE_POLICIES else 'drop_oldest'
+
+		self.items = deque()
+		self.lock = threading.Lock()
+		self.ready = threading.Condition(self.lock)
+		self.flush_lock = threading.Lock()
+
+		self.pid = None
+		self.thread = None
+		self.counters = { 'enqueued': 0, 'written': 0, 'dropped': 0, 'failed': 0 }
+
+	@property
+	def stats(self):
+		"""Describes the queue's counters & the no. of pending events"""
+		with self.lock:
+			return self.counters | { 'pending': len(self.items) }
+
+	def put(self, event):
+		"""
+		Enqueues a request event without blocking
+
+		Args:
+			event (Dict[str, Any]): the `RequestEvent` fields, alongside an optional `session_key` used to resolve its user
+
+		Returns:
+			A (bool) specifying whether the event was enqueued
+
+		"""
+		self.__ensure_flusher()
+
+		with self.lock:
+			if len(self.items) >= self.max_size:
+				self.counters['dropped'] += 1
+				if self.backpressure == 'drop_newest':
+					return False
+				self.items.popleft()
+
+			self.items.append(event)
+			self.counters['enqueued'] += 1
+
+			if len(self.items) >= self.batch_size:
+				self.ready.notify()
+
+		return True
+
+	def flush(self):
+		"""
+		Writes all pending events to the audit table
+
+		Returns:
+			The (int) number of events written
+
+		"""
+		written = 0
+		while True:
+			with self.lock:
+				if len(self.items) < 1:
+					break
+				batch = [self.items.popleft() for _ in range(min(self.batch_size, len(self.items)))]
+
+			written += self.__write(batch)
+		return written
+
+	def __ensure_flusher(self):
+		pid = os.getpid()
+		if self.pid == pid and self.thread is not None and self.thread.is_alive():
+			return
+
+		with self.lock:
+			if self.pid == pid and self.thread is not None and self.thread.is_alive():
+				return
+
+			# Events inherited from a parent process are owned, and flushed, by that process
+			if self.pid != pid:
+				self.items.clear()
+
+			self.pid = pid
+			self.thread = threading.Thread(target=self.__run, name='audit-request-flusher', daemon=True)
+			self.thread.start()
+
+	def __run(self):
+		while True:
+			with self.lock:
+				if len(self.items) < self.batch_size:
+					self.ready.wait(timeout=self.flush_interval)
+
+			try:
+				self.flush()
+			except Exception as e:
+				logger.warning(f'Failed to flush audited requests with err:\n\n{str(e)}')
+
+	def __resolve_users(self, batch):
+		keys = set(x.get('session_key') for x in batch if x.get('session_key'))
+		if len(keys) < 1:
+			return { }
+
+		engine = import_module(AppSettings.SESSION_ENGINE)
+
+		users = { }
+		for key in keys:
+			try:
+				session = engine.SessionStore(session_key=key).load()
+				user_id = session.get(SESSION_KEY) if session else None
+				users[key] = int(user_id) if user_id is not None else None
+			except Exception:
+				users[key] = None
+		return users
+
+	def __write(self, batch):
+		with self.flush_lock:
+			try:
+				close_old_connections()
+
+				users = self.__resolve_users(batch)
+				events = [
+					{ k: v for k, v in x.items() if k != 'session_key' } | { 'user_id': users.get(x.get('session_key')) }
+					for x in batch
+				]
+
+				backend = import_string(EasySettings.LOGGING_BACKEND)()
+				if isinstance(backend, ModelBackend):
+					RequestEvent.objects.bulk_create([RequestEvent(**x) for x in events], batch_size=self.batch_size)
+				else:
+					for event in events:
+						backend.request(event)
+			except Exception as e:
+				with self.lock:
+					self.counters['failed'] += len(batch)
+				logger.warning(f'Failed to write {len(batch)} audited request(s) with err:\n\n{str(e)}')
+				return 0
+
+			with self.lock:
+				self.counters['written'] += len(batch)
+			return len(batch)
+
+
+def build_request_queue():
+	"""
+	Instantiates the request event queue from the `AUDIT_REQUEST_QUEUE` setting
+
+	Returns:
+		A (RequestEventQueue) instance
+
+	"""
+	options = getattr(AppSettings, 'AUDIT_REQUEST_QUEUE', None)
+	options = options if isinstance(options, dict) else { }
+	return RequestEventQueue(**{ k: v for k, v in options.items() if v is not None })
+
+
+request_queue = build_request_queue()
+atexit.register(request_queue.flush)
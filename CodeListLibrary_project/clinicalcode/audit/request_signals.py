@@ -1,25 +1,18 @@
 """Custom EasyAudit request handling."""
-from importlib import import_module
+from functools import lru_cache
 from ipaddress import ip_address as validate_ip
 from easyaudit import settings as EasySettings
 from django.conf import settings as AppSettings
 from django.utils import timezone
 from django.http.cookie import SimpleCookie
-from django.contrib.auth import get_user_model, SESSION_KEY
 from django.http.request import HttpRequest, split_domain_port, validate_host
 from django.core.handlers.wsgi import WSGIHandler
-from django.utils.regex_helper import _lazy_re_compile
-from django.utils.module_loading import import_string
-from django.contrib.sessions.models import Session
 
 import re
 import inspect
 
 from clinicalcode.models import Brand
-
-
-audit_logger = import_string(EasySettings.LOGGING_BACKEND)()
-session_engine = import_module(AppSettings.SESSION_ENGINE)
+from clinicalcode.audit.request_queue import request_queue
 
 
 def validate_ip_addr(addr):
@@ -77,6 +70,22 @@ def resolve_ip_addr(request, validate_ip=False, default='10.0.0.1'):
 	return addr
 
 
+@lru_cache(maxsize=64)
+def compile_url_patterns(patterns, flags=re.MULTILINE | re.IGNORECASE):
+	"""
+	Compiles, and memoises, a set of URL patterns
+
+	Args:
+		patterns (tuple[str]): the patterns to compile
+		flags           (int): optionally specify the regex flags to be used across all patterns; defaults to `MULTILINE` and `IGNORECASE`
+
+	Returns:
+		A (tuple[Pattern]) containing the compiled patterns
+
+	"""
+	return tuple(re.compile(x, flags=flags) for x in patterns)
+
+
 def match_url_patterns(url, patterns, flags=re.MULTILINE | re.IGNORECASE):
 	"""
 	Tests a variadic number of patterns against the given URL. 
@@ -93,12 +102,7 @@ def match_url_patterns(url, patterns, flags=re.MULTILINE | re.IGNORECASE):
 	if not isinstance(url, str) or not isinstance(patterns, list):
 		return False
 
-	for target in patterns:
-		pattern = _lazy_re_compile(target, flags=flags)
-		if pattern.match(url):
-			return True
-
-	return False
+	return any(pattern.match(url) for pattern in compile_url_patterns(tuple(patterns), flags))
 
 
 def get_request_info(sender, params):
@@ -220,8 +224,7 @@ def get_brand_from_request_info(info):
 
 	domain = info.get('domain')
 	if isinstance(domain, str):
-		pattern = _lazy_re_compile(AppSettings.PROD_SITE_REGEX, flags=re.MULTILINE | re.IGNORECASE)
-		if pattern.match(domain):
+		if match_url_patterns(domain, [AppSettings.PROD_SITE_REGEX]):
 			return AppSettings.PROD_SITE_BRAND
 
 	url = info.get('path')
@@ -288,53 +291,44 @@ def should_log_url(url, brand_name=None):
 		url = '/' + url
 
 	if isinstance(EasySettings.REGISTERED_URLS, list) and len(EasySettings.REGISTERED_URLS) > 0:
-		for registered_url in EasySettings.REGISTERED_URLS:
-			pattern = re.compile(registered_url)
-			if pattern.match(url):
-				return True
-		return False
+		return match_url_patterns(url, EasySettings.REGISTERED_URLS, flags=0)
 
 	# Otherwise, record all except those that are blacklisted
 	return not is_blacklisted_url(url, brand_name)
 
 
 def request_started_watchdog(sender, *args, **kwargs):
-	"""A signal handler to observe Django `request_started <https://docs.djangoproject.com/en/5.1/topics/signals/>`__ events"""
+	"""A signal handler to observe Django `request_started <https://docs.djangoproject.com/en/5.1/topics/signals/>`__ events, events are written asynchronously by the `request_queue`"""
 	# Reconcile request context
 	info = get_request_info(sender, kwargs)
+	if info is None:
+		return
+
 	path = info.get('path')
 	brand_name = get_brand_from_request_info(info)
 	if not should_log_url(path, brand_name):
 		return
 
-	# Resolve the user from the auth cookie if applicable
-	user = None
-	cookie = info.get('cookie_string')
-	if not user and cookie:
+	# Resolve the session key from the auth cookie if applicable, its user is resolved by the queue's flusher
+	session_key = None
+	cookie_string = info.get('cookie_string')
+	if cookie_string:
 		cookie = SimpleCookie()
-		cookie.load(cookie)
+		try:
+			cookie.load(cookie_string)
+		except Exception:
+			cookie = None
 
 		session_cookie_name = AppSettings.SESSION_COOKIE_NAME
-		if session_cookie_name in cookie:
-			session_id = cookie[session_cookie_name].value
-			try:
-				session = session_engine.SessionStore(session_key=session_id).load()
-			except Session.DoesNotExist:
-				session = None
-
-			if session and SESSION_KEY in session:
-				user_id = session.get(SESSION_KEY)
-				try:
-					user = get_user_model().objects.get(id=user_id)
-				except Exception:
-					user = None
-
-	# Log request interaction
-	audit_logger.request({
+		if cookie is not None and session_cookie_name in cookie:
+			session_key = cookie[session_cookie_name].value
+
+	# Enqueue request interaction
+	request_queue.put({
 		'url': path,
 		'method': info.get('method'),
 		'query_string': info.get('query_string'),
-		'user_id': getattr(user, 'id', None) if user is not None else None,
+		'session_key': session_key,
 		'remote_ip': info.get('remote_ip'),
 		'datetime': timezone.now(),
 	})
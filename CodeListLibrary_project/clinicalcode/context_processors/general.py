@@ -9,14 +9,14 @@ def general_var(request):
         'IS_BRAND_ADMIN': permission_utils.is_requestor_brand_admin(request),
         'GA4_STUDIO_LINK': settings.GA4_STUDIO_LINK,
         'MEDIA_URL': settings.MEDIA_URL,
-        'CLL_READ_ONLY': settings.CLL_READ_ONLY,
+        'CLL_READ_ONLY': permission_utils.is_read_only(request),
         'DEV_PRODUCTION': settings.DEV_PRODUCTION,
         'IS_INSIDE_GATEWAY': settings.IS_INSIDE_GATEWAY,
         'IS_PRODUCTION_SERVER': (not settings.IS_DEMO and not settings.IS_DEVELOPMENT_PC and not settings.IS_INSIDE_GATEWAY),
         'IS_DEMO': settings.IS_DEMO,
         'IS_DEVELOPMENT_PC': settings.IS_DEVELOPMENT_PC,
         'SHOW_COOKIE_ALERT': settings.SHOW_COOKIE_ALERT,
-        'IS_PROD_SITE': settings.IS_PROD_SITE,
+        'IS_PROD_SITE': getattr(request, 'IS_PROD_SITE', False),
         'CANONICAL_PATH': get_canonical_path(request),
         'APPROVED_STATUS_DICT': {e.name: e.value for e in constants.APPROVAL_STATUS},
         'DOI_ACTIVE': settings.DOI_ACTIVE,
@@ -1,13 +1,20 @@
-from django.db import connection
+from ..routers import get_read_connection
+from functools import reduce
+from operator import or_
 from difflib import SequenceMatcher as SM
 from rest_framework.response import Response
 from rest_framework import status
 from django.db.models.functions import JSONObject
-from django.db.models import ForeignKey, F
+from django.db.models import ForeignKey, F, Q, prefetch_related_objects
 from django.core.exceptions import FieldDoesNotExist
-from rest_framework.renderers import JSONRenderer
+from rest_framework.renderers import JSONRenderer, BaseRenderer
+from rest_framework.utils import encoders
+from django.http import StreamingHttpResponse
 from django.contrib.auth import get_user_model
 
+import csv
+import json
+import logging
 import psycopg2
 
 from ..models.GenericEntity import GenericEntity
@@ -23,6 +30,8 @@ from . import create_utils
 from . import gen_utils
 from . import constants
 
+logger = logging.getLogger(__name__)
+
 User = get_user_model()
 
 """ REST renderer """
@@ -30,6 +39,95 @@ class PrettyJsonRenderer(JSONRenderer):
     def get_indent(self, accepted_media_type, renderer_context):
         return 2
 
+class NDJsonRenderer(BaseRenderer):
+    """
+      Renders a list as newline-delimited JSON, i.e. one JSON document per line;
+        used by the streamed `?format=ndjson` export
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        data = data if isinstance(data, list) else [data]
+        return ''.join(encode_ndjson_row(row) for row in data).encode(self.charset)
+
+class CsvRenderer(BaseRenderer):
+    """
+      Renders a list of dicts as CSV, nested values are JSON encoded;
+        used by the streamed `?format=csv` export
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        data = data if isinstance(data, list) else [data]
+        data = [row for row in data if isinstance(row, dict)]
+
+        columns = []
+        for row in data:
+            columns.extend(key for key in row.keys() if key not in columns)
+
+        writer = csv.writer(StreamBuffer())
+        rows = [writer.writerow(columns)] + [encode_csv_row(writer, row, columns) for row in data]
+        return ''.join(rows).encode(self.charset)
+
+class StreamBuffer:
+    """
+      Pseudo-buffer that returns the written value rather than storing it,
+        allows `csv.writer` to be used when streaming a response
+    """
+    def write(self, value):
+        return value
+
+def encode_ndjson_row(row):
+    """
+      Encodes a single row as a line of newline-delimited JSON
+
+      Args:
+        row (Any): the data to encode
+
+      Returns:
+        The JSON encoded (str) terminated by a newline
+    """
+    return json.dumps(row, cls=encoders.JSONEncoder, ensure_ascii=False) + '\n'
+
+def encode_csv_row(writer, row, columns):
+    """
+      Encodes a single dict as a CSV row, such that any nested value is JSON encoded
+
+      Args:
+        writer (csv.writer): a csv writer whose buffer is a `StreamBuffer`
+        row (dict): the data to encode
+        columns (list of strings): the ordered column names
+
+      Returns:
+        The CSV encoded row as a (str)
+    """
+    values = []
+    for column in columns:
+        value = row.get(column)
+        if value is None:
+            values.append('')
+        elif isinstance(value, (list, dict)):
+            values.append(json.dumps(value, cls=encoders.JSONEncoder, ensure_ascii=False))
+        elif isinstance(value, (str, int, float, bool)):
+            values.append(value)
+        else:
+            try:
+                values.append(encoders.JSONEncoder().default(value))
+            except TypeError:
+                values.append(str(value))
+
+    return writer.writerow(values)
+
 """ Parameter validation """
 
 def is_malformed_entity_id(primary_key):
@@ -211,6 +309,46 @@ def get_entity_version_history(request, entity_id):
 
     return result
 
+def get_entity_version_histories(request, entity_ids):
+    """
+      Retrieves the version history of several entities in a constant number of queries,
+        see `get_entity_version_history()`
+
+      Args:
+        request (HTTPContext): Request context
+        entity_ids (list of strings): Entity ids
+
+      Returns:
+        Dict containing the version history of each entity, keyed by its id
+    """
+    entity_ids = list(set(entity_ids))
+    live_entities = GenericEntity.objects.in_bulk(entity_ids)
+
+    historical_versions = list(
+        GenericEntity.history.filter(id__in=list(live_entities.keys())).order_by('-history_id')
+    )
+
+    visible = permission_utils.get_viewable_entity_versions(
+        request, live_entities, historical_versions
+    )
+
+    result = { entity_id: [] for entity_id in entity_ids }
+    latest = {}
+    for version in historical_versions:
+        latest.setdefault(version.id, version.history_id)
+        if version.history_id not in visible:
+            continue
+
+        result[version.id].append({
+            'version_id': version.history_id,
+            'version_name': version.name.encode('ascii', 'ignore').decode('ascii'),
+            'version_date': version.history_date,
+            'is_published': version.publish_status == permission_utils.APPROVAL_STATUS.APPROVED,
+            'is_latest': latest.get(version.id) == version.history_id
+        })
+
+    return result
+
 def get_concept_version_history(request, concept_id):
     """
       Retrieves a concepts version history
@@ -297,6 +435,50 @@ def get_layout_from_entity(entity):
         status=status.HTTP_404_NOT_FOUND
     )
 
+def get_layouts_from_entities(entities):
+    """
+      Retrieves the layout of several entities in a single query, see `get_layout_from_entity()`
+
+      Args:
+        entities (list of GenericEntity): Entity objects, whose templates have been prefetched
+
+      Returns:
+        Dict containing the layout of each entity, keyed by its history_id; entities without
+          a valid layout are omitted
+    """
+    versions = {}
+    for entity in entities:
+        layout = entity.template
+        if not layout or not template_utils.is_layout_safe(layout):
+            continue
+
+        version = template_utils.try_get_content(entity.template_data, 'version')
+        if not version:
+            version = getattr(entity, 'template_version')
+
+        if version:
+            versions[entity.history_id] = (layout.id, str(version))
+
+    if len(versions) < 1:
+        return {}
+
+    query = reduce(or_, [
+        Q(id=template_id, template_version=version)
+        for template_id, version in set(versions.values())
+    ])
+
+    templates = {}
+    for template in Template.history.filter(query).order_by('-history_id'):
+        templates.setdefault((template.id, str(template.template_version)), template)
+
+    result = {}
+    for history_id, key in versions.items():
+        template = templates.get(key)
+        if template is not None:
+            result[history_id] = template
+
+    return result
+
 def build_template_subquery_from_string(param, data, top_ref, sub_ref, validation, opts=None, prefix=''):
     """
         Derives a valid query from the given
@@ -391,7 +573,7 @@ def build_template_subquery_from_string(param, data, top_ref, sub_ref, validatio
         if 'descendants' in opts and (isinstance(modifiers, list) and 'descendants' in modifiers):
             # Match first, then perform query
             matched_records = []
-            with connection.cursor() as cursor:
+            with get_read_connection().cursor() as cursor:
                 sql = f'''
                 select
                         t.id
@@ -422,7 +604,12 @@ def build_template_subquery_from_string(param, data, top_ref, sub_ref, validatio
                     {tree_clause}
                     {next_clause} (
                         t1.id::bigint = any(%({prefix}{param}_data)s::bigint[])
-                        or is_ontological_descendant(%({prefix}{param}_data)s::bigint[], array[t1.id]::bigint[])
+                        or exists(
+                            select 1
+                              from public.clinicalcode_ontologytagclosure as closure
+                             where closure.descendant_id = t1.id
+                               and closure.ancestor_id = any(%({prefix}{param}_data)s::bigint[])
+                        )
                     )
                 limit 1
             )
@@ -483,7 +670,12 @@ def build_template_subquery_from_string(param, data, top_ref, sub_ref, validatio
                   {tree_clause}
                   {next_clause} (
                     t1.{sub_field}::bigint = any(%({prefix}{param}_data)s::bigint[])
-                    or is_ontological_descendant(%({prefix}{param}_data)s::bigint[], array[t0.val]::bigint[])
+                    or exists(
+                      select 1
+                        from public.clinicalcode_ontologytagclosure as closure
+                       where closure.descendant_id = t0.val
+                         and closure.ancestor_id = any(%({prefix}{param}_data)s::bigint[])
+                    )
                   )
                 limit 1
             )
@@ -557,7 +749,7 @@ def build_template_subquery_from_string(param, data, top_ref, sub_ref, validatio
     if 'descendants' in opts and (isinstance(modifiers, list) and 'descendants' in modifiers):
         # Match first, then perform query
         matched_records = []
-        with connection.cursor() as cursor:
+        with get_read_connection().cursor() as cursor:
             sql = f'''
             select
                     t.id
@@ -826,7 +1018,7 @@ def coerce_into_opts(request, field_data, data, default=None):
         return data_ids
 
     model = f'clinicalcode_{model}'.lower()
-    with connection.cursor() as cursor:
+    with get_read_connection().cursor() as cursor:
         sql = psycopg2.sql.SQL('''
         select
             {field} as id
@@ -910,7 +1102,7 @@ def build_query_from_template(request, user_authed, template=None):
     return terms, where, params
 
 def get_entity_detail_from_layout(
-    entity, fields, user_authed, fields_to_ignore=[], target_field=None
+    entity, fields, user_authed, fields_to_ignore=[], target_field=None, sourced_values=None
 ):
     """
       Retrieves entity detail in the format required for detail API endpoint,
@@ -923,11 +1115,14 @@ def get_entity_detail_from_layout(
         fields_to_ignore (list of strings): List of fields to remove from output
         target_field (string): Field to be targeted, i.e. only build the detail
           for this particular field
+        sourced_values (dict): Optionally specify the prefetched values of this entity's
+          sourced fields, see `get_entity_detail_batch()`
 
       Returns:
         Dict containing details of the entity specified
     """
     result = {}
+    sourced_values = sourced_values if isinstance(sourced_values, dict) else {}
     for field, field_definition in fields.items():
         if target_field is not None and target_field.lower() != field.lower():
             continue
@@ -948,7 +1143,9 @@ def get_entity_detail_from_layout(
             validation = field_info.get('validation')
 
             is_source = validation.get('source')
-            if is_source:
+            if field in sourced_values:
+                value = sourced_values.get(field)
+            elif is_source:
                 value = template_utils.get_metadata_value_from_source(
                     entity, field, default=None
                 )
@@ -1000,9 +1197,13 @@ def get_entity_detail_from_layout(
                     include_headers=True
                 )
         else:
-            value = template_utils.get_template_data_values(
-                entity, fields, field, default=None, hide_user_details=True
-            )
+            if field in sourced_values:
+                value = sourced_values.get(field)
+            else:
+                value = template_utils.get_template_data_values(
+                    entity, fields, field, default=None, hide_user_details=True
+                )
+
             if value is None:
                 value = template_utils.get_entity_field(entity, field)
 
@@ -1173,6 +1374,289 @@ def get_entity_detail(
         status=status.HTTP_200_OK
     )
 
+def get_entity_detail_batch(
+    request,
+    entities,
+    user_authed,
+    fields_to_ignore=['deleted', 'created_by',
+                      'updated_by', 'deleted_by', 'brands']
+):
+    """
+      Gets the detail of several entities, i.e. a page of entities, in a constant
+        number of queries; the output of each entity is identical to that of
+        `get_entity_detail()`
+
+      Args:
+        request (HTTPContext): Request context
+        entities (list of GenericEntity): Historical entity objects
+        user_authed (boolean): Whether the user is authenticated or not
+        fields_to_ignore (list of strings): Fields that should be ignored from result
+
+      Returns:
+        List containing the built detail of each entity; entities without a
+          valid layout are omitted
+    """
+    entities = list(entities)
+    if len(entities) < 1:
+        return []
+
+    related_fields = [
+        field.name
+        for field in entities[0]._meta.fields
+        if isinstance(field, ForeignKey) and (
+            field.name == 'template' or (
+                field.name.lower() not in fields_to_ignore and field.name not in constants.API_HIDDEN_FIELDS
+            )
+        )
+    ]
+    prefetch_related_objects(entities, *related_fields)
+
+    layouts = get_layouts_from_entities(entities)
+    definitions = {}
+    for layout in layouts.values():
+        if layout.history_id not in definitions:
+            definition = template_utils.get_merged_definition(layout, default={})
+            definitions[layout.history_id] = template_utils.try_get_content(definition, 'fields')
+
+    metadata_sources = {}
+    template_sources = {}
+    for entity in entities:
+        layout = layouts.get(entity.history_id)
+        fields = definitions.get(layout.history_id) if layout is not None else None
+        if fields is None:
+            continue
+
+        for field, field_definition in fields.items():
+            if field.lower() in fields_to_ignore or field == 'concept_information':
+                continue
+
+            if template_utils.try_get_content(field_definition, 'active') == False:
+                continue
+
+            requires_auth = template_utils.try_get_content(field_definition, 'requires_auth')
+            if requires_auth and not user_authed:
+                continue
+
+            if template_utils.is_metadata(entity, field):
+                field_info = template_utils.get_layout_field(fields, field)
+                validation = field_info.get('validation') if isinstance(field_info, dict) else None
+                if isinstance(validation, dict) and validation.get('source'):
+                    metadata_sources.setdefault(field, {}).update({ entity.history_id: entity })
+            else:
+                template_sources[(entity.history_id, field)] = (
+                    entity, field, template_utils.get_layout_field(fields, field)
+                )
+
+    sourced_values = {}
+    for field, sources in metadata_sources.items():
+        values = template_utils.get_metadata_values_from_source(sources, field, default=None)
+        for history_id, value in values.items():
+            sourced_values.setdefault(history_id, {}).update({ field: value })
+
+    values = template_utils.get_template_data_source_values(template_sources, default=None)
+    for (history_id, field), value in values.items():
+        sourced_values.setdefault(history_id, {}).update({ field: value })
+
+    entity_versions = get_entity_version_histories(request, [entity.id for entity in entities])
+
+    result = []
+    for entity in entities:
+        layout = layouts.get(entity.history_id)
+        fields = definitions.get(layout.history_id) if layout is not None else None
+        if fields is None:
+            continue
+
+        detail = get_entity_detail_from_layout(
+            entity, fields, user_authed,
+            fields_to_ignore=fields_to_ignore,
+            sourced_values=sourced_values.get(entity.history_id)
+        )
+
+        detail = detail | get_entity_detail_from_meta(
+            entity, fields, detail, fields_to_ignore=fields_to_ignore
+        )
+
+        detail = get_ordered_entity_detail(
+            fields, layout, layout.template_version, entity_versions.get(entity.id, []), detail
+        )
+
+        result.append({'phenotype_id': entity.id, 'phenotype_version_id': entity.history_id} | detail)
+
+    return result
+
+def get_entity_detail_columns(templates, user_authed, fields_to_ignore=[]):
+    """
+      Derives the ordered column names of the entity detail produced by
+        `get_entity_detail_batch()` across several templates, e.g. used as the
+        header of the streamed CSV export
+
+      Args:
+        templates (list of HistoricalTemplate): Template versions of interest
+        user_authed (boolean): Whether the user is authenticated or not
+        fields_to_ignore (list of strings): Fields that should be ignored from result
+
+      Returns:
+        List containing the ordered column names
+    """
+    columns = ['phenotype_id', 'phenotype_version_id']
+    for template in templates:
+        definition = template_utils.get_merged_definition(template, default={})
+        fields = template_utils.try_get_content(definition, 'fields')
+        if not isinstance(fields, dict):
+            continue
+
+        for field, field_definition in fields.items():
+            if field.lower() in fields_to_ignore:
+                continue
+
+            if template_utils.try_get_content(field_definition, 'active') == False:
+                continue
+
+            requires_auth = template_utils.try_get_content(field_definition, 'requires_auth')
+            if requires_auth and not user_authed:
+                continue
+
+            if field in constants.API_MAP_FIELD_NAMES:
+                field = constants.API_MAP_FIELD_NAMES.get(field)
+            elif isinstance(field_definition, dict) and isinstance(field_definition.get('shunt'), str):
+                field = field_definition.get('shunt')
+
+            if field not in columns:
+                columns.append(field)
+
+    for field in GenericEntity.history.model._meta.fields:
+        field_name = field.name
+        if field_name.lower() in fields_to_ignore or field_name in constants.API_HIDDEN_FIELDS:
+            continue
+
+        if field.get_internal_type() in constants.STRIPPED_FIELDS:
+            continue
+
+        field_data = constants.metadata.get(field_name)
+        if field_data and field_data.get('active') == False:
+            continue
+
+        field_name = constants.API_MAP_FIELD_NAMES.get(field_name, field_name)
+        if field_name not in columns:
+            columns.append(field_name)
+
+    columns.extend(['template', 'versions'])
+    return columns
+
+def get_streamed_entity_templates(sql, params):
+    """
+      Resolves the latest version of each template version used by the entities
+        selected by a raw SQL query, e.g. used to derive the header of a streamed
+        CSV export across every template in its result set
+
+      Args:
+        sql (string): Raw SQL query selecting the `id` & `history_id` of each entity
+        params (dict): Parameters of the raw SQL query
+
+      Returns:
+        A RawQuerySet of HistoricalTemplate instances
+    """
+    return Template.history.raw(
+        '''
+        select distinct on (template.id, template.template_version) template.*
+          from (
+            ''' + sql + '''
+          ) as t
+          join public.clinicalcode_historicalgenericentity as entity
+            on entity.history_id = t.history_id
+          join public.clinicalcode_historicaltemplate as template
+            on template.id = entity.template_id
+           and template.template_version = entity.template_version
+         order by template.id, template.template_version, template.history_id desc
+        ''',
+        params
+    )
+
+def stream_entity_details(
+    request,
+    sql,
+    params,
+    user_authed,
+    stream_format='ndjson',
+    columns=None,
+    fields_to_ignore=['deleted', 'created_by',
+                      'updated_by', 'deleted_by', 'brands']
+):
+    """
+      Streams the detail of each entity selected by a raw SQL query, the query is
+        iterated through a server-side cursor and serialised in chunks of
+        `API_STREAM_CHUNK_SIZE` entities so that memory usage remains flat
+
+      [!] Note: If the query fails mid-stream an error record is written and the
+                exception re-raised, i.e. the transfer is aborted rather than
+                being completed as a truncated export
+
+      Args:
+        request (HTTPContext): Request context
+        sql (string): Raw SQL query selecting the `id` & `history_id` of each
+          entity, in the order they should be streamed
+        params (dict): Parameters of the raw SQL query
+        user_authed (boolean): Whether the user is authenticated or not
+        stream_format (string): Either `ndjson` or `csv`
+        columns (list of strings): Optionally specify the CSV header; defaults
+          to the columns of every template used by the selected entities
+        fields_to_ignore (list of strings): Fields that should be ignored from result
+
+      Returns:
+        A StreamingHttpResponse
+    """
+    is_csv = stream_format == 'csv'
+    writer = csv.writer(StreamBuffer()) if is_csv else None
+
+    if is_csv and columns is None:
+        columns = get_entity_detail_columns(
+            get_streamed_entity_templates(sql, params), user_authed, fields_to_ignore=fields_to_ignore
+        )
+
+    def stream():
+        if is_csv:
+            yield writer.writerow(columns)
+
+        try:
+            chunks = search_utils.iterate_query_chunks(
+                sql, params=params, chunk_size=constants.API_STREAM_CHUNK_SIZE
+            )
+
+            for rows in chunks:
+                history_ids = [row[1] for row in rows]
+                entities = GenericEntity.history.filter(history_id__in=history_ids).in_bulk()
+                entities = [entities.get(history_id) for history_id in history_ids if history_id in entities]
+
+                details = get_entity_detail_batch(
+                    request, entities, user_authed, fields_to_ignore=fields_to_ignore
+                )
+
+                for detail in details:
+                    if not is_csv:
+                        yield encode_ndjson_row(detail)
+                        continue
+
+                    yield encode_csv_row(writer, detail, columns)
+        except Exception as e:
+            logger.error('Encountered error on streamed Phenotype API Query: \n%s\n' % (str(e)))
+
+            message = 'Export interrupted by a server error, the result set is incomplete'
+            if is_csv:
+                yield writer.writerow(['error', message])
+            else:
+                yield encode_ndjson_row({ 'error': message })
+            raise
+
+    if is_csv:
+        response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="phenotypes.csv"'
+    else:
+        response = StreamingHttpResponse(stream(), content_type='application/x-ndjson; charset=utf-8')
+
+    # Prevent reverse proxies from buffering the response
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 def build_final_codelist_from_concepts(
         entity, 
         concept_information, 
@@ -1192,15 +1676,22 @@ def build_final_codelist_from_concepts(
           list containing final codelist
     """
     result = []
-    for concept in concept_information:
-        concept_id = concept['concept_id']
-        concept_version = concept['concept_version_id']
+    concepts = [(concept['concept_id'], concept['concept_version_id']) for concept in concept_information]
+    if len(concepts) < 1:
+        return result
 
-        # Get concept entity for additional data, skip if we're not able to find it
-        concept_entity = Concept.history.get(
-            id=concept_id, history_id=concept_version
-        )
-        if not concept_entity:
+    # Get concept entities for additional data & their final codelists
+    concept_entities = Concept.history \
+        .filter(reduce(or_, [Q(id=concept_id, history_id=concept_version) for concept_id, concept_version in concepts])) \
+        .select_related('coding_system') \
+        .in_bulk()
+
+    codelists = concept_utils.get_concept_codelists(concepts, incl_attributes=True)
+
+    for concept_id, concept_version in concepts:
+        # Skip if we're not able to find the concept entity
+        concept_entity = concept_entities.get(gen_utils.parse_int(concept_version, default=None))
+        if not concept_entity or concept_entity.id != gen_utils.parse_int(concept_id, default=None):
             continue
 
         concept_data = {
@@ -1217,11 +1708,10 @@ def build_final_codelist_from_concepts(
             concept_data |= { 'code_attribute_header': concept_entity.code_attribute_header}
 
         # Get codes
-        concept_codes = concept_utils.get_concept_codelist(
-            concept_id,
-            concept_version,
-            incl_attributes=True
-        )
+        concept_codes = [
+            dict(code)
+            for code in codelists.get((concept_entity.id, concept_entity.history_id), [])
+        ]
         for i, code in enumerate(concept_codes):
             if not include_concept_detail:
                 concept_codes[i] = {
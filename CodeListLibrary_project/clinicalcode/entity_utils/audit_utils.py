@@ -0,0 +1,201 @@
+from django.db import connection, transaction
+from django.utils.crypto import salted_hmac
+
+import re
+import logging
+
+from ..models.Brand import Brand
+from ..models.EntityClass import EntityClass
+from ..models.RequestRollup import RequestRollupState
+from . import constants
+
+
+logger = logging.getLogger(__name__)
+
+
+"""
+    Advisory lock key used to prevent concurrent rollups of the request audit table
+"""
+REQUEST_ROLLUP_LOCK = 'clinicalcode_requestrollup'
+
+"""
+    Salt used to derive the secret key of the visitor hash from the `SECRET_KEY`
+"""
+REQUEST_ROLLUP_VISITOR_SALT = 'clinicalcode.entity_utils.audit_utils.visitor'
+
+
+def get_entity_url_pattern():
+    """
+        Builds the (Postgres) regex used to extract an entity id from an audited URL,
+        _i.e._ a path segment composed of a known entity prefix followed by its index
+
+        Returns:
+            Either (a) a (str) pattern whose first capture group is the entity id, or (b) a `None` value if no entity classes exist
+    """
+    prefixes = EntityClass.objects \
+        .exclude(entity_prefix__isnull=True) \
+        .exclude(entity_prefix='') \
+        .values_list('entity_prefix', flat=True) \
+        .distinct()
+
+    prefixes = sorted(set(re.escape(x) for x in prefixes), key=len, reverse=True)
+    if len(prefixes) < 1:
+        return None
+
+    return r'(?:^|/)((?:%s)\d+)(?:/|$)' % '|'.join(prefixes)
+
+
+def get_visitor_key():
+    """
+        Derives the secret key used to hash the visitor of each audited request from the `SECRET_KEY`,
+        _i.e._ such that the remote address of anonymous visitors can't be recovered from the rollup
+
+        Returns:
+            The (str) hex encoded key
+    """
+    return salted_hmac(REQUEST_ROLLUP_VISITOR_SALT, 'visitor').hexdigest()
+
+
+def rollup_request_batch(cursor, lower, upper, params):
+    """
+        Parses the audited requests within the given (lower, upper] id range into the
+        `RequestRollup` daily counters
+
+        Args:
+            cursor (CursorWrapper): the database cursor
+            lower            (int): the id of the last consumed request
+            upper            (int): the id of the last request to consume
+            params          (dict): the `brands`, `methods`, `entity_pattern` and `visitor_key` query parameters
+
+        Returns:
+            The (int) number of counters inserted or updated
+    """
+    cursor.execute(
+        '''
+        with
+            reqs as (
+                select req.datetime::date as date,
+                       req.url,
+                       upper(split_part(ltrim(req.url, '/'), '/', 1)) as root,
+                       (case
+                           when req.user_id is not null then 'u:' || req.user_id::text
+                           else 'ip:' || coalesce(req.remote_ip, '')
+                       end) as uid
+                  from public.easyaudit_requestevent as req
+                 where req.id > %(lower)s
+                   and req.id <= %(upper)s
+                   and req.method = any(%(methods)s)
+            ),
+            parsed as (
+                select req.date,
+                       (case when req.root = any(%(brands)s) then req.root else '' end) as brand,
+                       coalesce(substring(req.url from %(entity_pattern)s::text), '') as entity_id,
+                       (case
+                           when req.url like '%%/api/%%' then 'api'
+                           when req.url like '%%export%%' then 'export'
+                           else 'view'
+                       end) as kind,
+                       -- keyed by the secret & salted by month, i.e. visitors are only comparable within the same month
+                       md5(%(visitor_key)s || ':' || to_char(req.date, 'YYYY-MM') || ':' || req.uid) as visitor
+                  from reqs as req
+            )
+        insert into public.clinicalcode_requestrollup (date, brand, entity_id, kind, visitor, hits)
+        select date, brand, entity_id, kind, visitor, count(*)
+          from parsed
+         group by date, brand, entity_id, kind, visitor
+            on conflict (date, brand, entity_id, kind, visitor)
+            do update set hits = public.clinicalcode_requestrollup.hits + excluded.hits;
+        ''',
+        params | { 'lower': lower, 'upper': upper }
+    )
+
+    return cursor.rowcount
+
+
+def rollup_request_events(
+    batch_size=constants.REQUEST_ROLLUP_BATCH_SIZE,
+    max_batches=constants.REQUEST_ROLLUP_MAX_BATCHES,
+    safety_lag=constants.REQUEST_ROLLUP_SAFETY_LAG
+):
+    """
+        Incrementally consumes the request audit table, _i.e._ `easyaudit_requestevent`, into the
+        `RequestRollup` daily counters; each batch is committed alongside the rollup's watermark
+
+        [!] Note:
+            1. Concurrent rollups are skipped through a session-level advisory lock;
+
+            2. Audited requests are bulk inserted by several flushers, _i.e._ their ids aren't committed in order. Each batch
+               therefore stops before the first request written within the last `safety_lag` seconds, such that
+               the watermark never moves past a request whose batch is still being written.
+
+        Args:
+            batch_size   (int): optionally specify the no. of requests consumed per batch; defaults to `REQUEST_ROLLUP_BATCH_SIZE`
+            max_batches  (int): optionally specify the max. no. of batches to consume, or `None` to consume all pending requests; defaults to `REQUEST_ROLLUP_MAX_BATCHES`
+            safety_lag   (int): optionally specify the min. age, in seconds, of the consumed requests; defaults to `REQUEST_ROLLUP_SAFETY_LAG`
+
+        Returns:
+            The (int) number of requests consumed, or a `None` value if another rollup is in progress
+    """
+    batch_size = max(batch_size or constants.REQUEST_ROLLUP_BATCH_SIZE, 1)
+    safety_lag = max(safety_lag if safety_lag is not None else constants.REQUEST_ROLLUP_SAFETY_LAG, 0)
+
+    params = {
+        'brands': Brand.all_names(),
+        'methods': constants.REQUEST_ROLLUP_METHODS,
+        'entity_pattern': get_entity_url_pattern(),
+        'visitor_key': get_visitor_key(),
+    }
+
+    with connection.cursor() as cursor:
+        cursor.execute('select pg_try_advisory_lock(hashtext(%s));', [REQUEST_ROLLUP_LOCK])
+        if not cursor.fetchone()[0]:
+            logger.info('Skipped request rollup, another rollup is in progress')
+            return None
+
+        try:
+            consumed = 0
+            batches = 0
+            while max_batches is None or batches < max_batches:
+                with transaction.atomic():
+                    state, _ = RequestRollupState.objects.select_for_update().get_or_create(id=1)
+                    lower = state.last_request_id
+
+                    cursor.execute(
+                        '''
+                        with
+                            recent as (
+                                select min(req.id) as id
+                                  from public.easyaudit_requestevent as req
+                                 where req.id > %(lower)s
+                                   and req.datetime >= now() - make_interval(secs => %(lag)s)
+                            )
+                        select max(t.id), count(*)
+                          from (
+                            select req.id
+                              from public.easyaudit_requestevent as req
+                             where req.id > %(lower)s
+                               and req.id < coalesce((select id from recent), 9223372036854775807)
+                             order by req.id asc
+                             limit %(limit)s
+                          ) as t;
+                        ''',
+                        { 'lower': lower, 'lag': safety_lag, 'limit': batch_size }
+                    )
+
+                    upper, count = cursor.fetchone()
+                    if upper is None:
+                        break
+
+                    rollup_request_batch(cursor, lower, upper, params)
+
+                    state.last_request_id = upper
+                    state.save(update_fields=['last_request_id', 'modified'])
+
+                consumed += count
+                batches += 1
+                if count < batch_size:
+                    break
+        finally:
+            cursor.execute('select pg_advisory_unlock(hashtext(%s));', [REQUEST_ROLLUP_LOCK])
+
+    return consumed
@@ -0,0 +1,166 @@
+from collections import OrderedDict
+from django.core.cache import cache
+
+import zlib
+import pickle
+import logging
+import threading
+
+from . import constants
+
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+        Thread-safe, in-process least-recently-used cache bounded by the size, in bytes,
+        of its (compressed) payloads
+
+        Args:
+            max_size (int): optionally specify the maximum number of bytes held by the cache; defaults to `CODELIST_CACHE_LRU_SIZE`
+    """
+    def __init__(self, max_size=constants.CODELIST_CACHE_LRU_SIZE):
+        self.max_size = max_size
+        self.size = 0
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            value = self.items.get(key)
+            if value is None:
+                return default
+
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if not isinstance(value, bytes) or len(value) > self.max_size:
+            return
+
+        with self.lock:
+            previous = self.items.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+
+            self.items[key] = value
+            self.size += len(value)
+
+            while self.size > self.max_size and len(self.items) > 0:
+                _, evicted = self.items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+            self.size = 0
+
+
+IMMUTABLE_LRU = LRUCache()
+
+
+def compress_value(value):
+    """
+        Serialises & compresses some value
+
+        Args:
+            value (Any): some picklable value
+
+        Returns:
+            The compressed (bytes) payload
+    """
+    return zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def decompress_value(payload, default=None):
+    """
+        Decompresses & deserialises a payload produced by `compress_value()`
+
+        Args:
+            payload  (bytes): the compressed payload
+            default    (Any): optionally specify the return value if the payload is malformed; defaults to `None`
+
+        Returns:
+            The deserialised value, otherwise returns the specified `default` value
+    """
+    try:
+        return pickle.loads(zlib.decompress(payload))
+    except Exception as e:
+        logger.warning(f'Failed to decompress cached value with err:\n\n{str(e)}')
+        return default
+
+
+def get_immutable_values(keys):
+    """
+        Retrieves the immutable values associated with each of the given keys, the in-process
+        LRU is examined before the shared cache
+
+        [!] Note: Each value is deserialised per call, i.e. callers may safely mutate the result
+
+        Args:
+            keys (list): the cache keys of interest
+
+        Returns:
+            A (dict) containing each of the cached values, keyed by their cache key; uncached keys are omitted
+    """
+    output = {}
+    missing = []
+    for key in keys:
+        payload = IMMUTABLE_LRU.get(key)
+        if payload is None:
+            missing.append(key)
+            continue
+
+        value = decompress_value(payload)
+        if value is not None:
+            output[key] = value
+
+    if len(missing) < 1:
+        return output
+
+    try:
+        payloads = cache.get_many(missing)
+    except Exception as e:
+        logger.warning(f'Failed to retrieve immutable values from cache with err:\n\n{str(e)}')
+        return output
+
+    for key, payload in payloads.items():
+        if not isinstance(payload, bytes):
+            continue
+
+        value = decompress_value(payload)
+        if value is not None:
+            IMMUTABLE_LRU.set(key, payload)
+            output[key] = value
+
+    return output
+
+
+def set_immutable_values(values, timeout=constants.CODELIST_CACHE_TIMEOUT):
+    """
+        Compresses & stores immutable values within both the in-process LRU and the shared cache
+
+        Args:
+            values  (dict): the values to store, keyed by their cache key
+            timeout  (int): optionally specify the max age, in seconds, of the shared cache entries; defaults to `CODELIST_CACHE_TIMEOUT`
+
+        Returns:
+            The (int) number of values stored
+    """
+    payloads = {}
+    for key, value in values.items():
+        payload = compress_value(value)
+        IMMUTABLE_LRU.set(key, payload)
+        payloads[key] = payload
+
+    if len(payloads) < 1:
+        return 0
+
+    try:
+        cache.set_many(payloads, timeout)
+    except Exception as e:
+        logger.warning(f'Failed to store immutable values in cache with err:\n\n{str(e)}')
+        return 0
+
+    return len(payloads)
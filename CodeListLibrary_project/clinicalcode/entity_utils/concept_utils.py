@@ -1,18 +1,24 @@
-from django.db import connection
+from django.db import connection, transaction
 from django.db.models import ForeignKey
 from django.http.request import HttpRequest
 from rest_framework.request import Request as RESTRequest
 
 import json
+import hashlib
+import logging
 
 from ..models.Concept import Concept
+from ..models.GenericEntity import GenericEntity
 from ..models.PublishedConcept import PublishedConcept
+from ..models.CodeEntityLink import CodeEntityLink
+from ..models.EntityConceptLink import EntityConceptLink
 from ..models.ConceptReviewStatus import ConceptReviewStatus
 
-from . import gen_utils, model_utils, permission_utils
+from . import gen_utils, model_utils, permission_utils, cache_utils
 from .constants import (
     USERDATA_MODELS, TAG_TYPE, HISTORICAL_HIDDEN_FIELDS,
-    CLINICAL_RULE_TYPE, CLINICAL_CODE_SOURCE, APPROVAL_STATUS
+    CLINICAL_RULE_TYPE, CLINICAL_CODE_SOURCE, APPROVAL_STATUS,
+    CODELIST_CACHE_VERSION, CODE_BULK_BATCH_SIZE
 )
 
 def is_concept_published(concept_id, version_id):
@@ -57,29 +63,11 @@ def is_concept_published(concept_id, version_id):
                 if cid == concept_id and cvd == version_id:
                     return True
 
-    with connection.cursor() as cursor:
-        sql = f'''
-        select id,
-               concepts
-          from (
-            select id,
-                   concepts
-              from public.clinicalcode_historicalgenericentity as entity,
-                   json_array_elements(entity.template_data::json->'concept_information') as concepts
-             where entity.publish_status = {APPROVAL_STATUS.APPROVED.value}
-          ) results
-         where cast(concepts->>'concept_id' as integer) = %(concept_id)s and cast(concepts->>'concept_version_id' as integer) = %(version_id)s;
-        '''
-        cursor.execute(sql, params={
-            'concept_id': concept_id,
-            'version_id': version_id,
-        })
-
-        row = cursor.fetchone()
-        if row is not None:
-            return True
-    
-    return False
+    return EntityConceptLink.objects.filter(
+        concept_id=concept_id,
+        concept_version_id=version_id,
+        publish_status=APPROVAL_STATUS.APPROVED.value
+    ).exists()
 
 def was_concept_ever_published(concept_id, version_id=None):
     """
@@ -118,28 +106,10 @@ def was_concept_ever_published(concept_id, version_id=None):
     if phenotype is not None and phenotype.publish_status == APPROVAL_STATUS.APPROVED:
         return True
 
-    with connection.cursor() as cursor:
-        sql = f'''
-        select id,
-               concepts
-          from (
-            select id,
-                   concepts
-              from public.clinicalcode_historicalgenericentity as entity,
-                   json_array_elements(entity.template_data::json->'concept_information') as concepts
-             where entity.publish_status = {APPROVAL_STATUS.APPROVED.value}
-          ) results
-         where cast(concepts->>'concept_id' as integer) = %(concept_id)s;
-        '''
-        cursor.execute(sql, params={
-            'concept_id': concept_id,
-        })
-
-        row = cursor.fetchone()
-        if row is not None:
-            return True
-    
-    return False
+    return EntityConceptLink.objects.filter(
+        concept_id=concept_id,
+        publish_status=APPROVAL_STATUS.APPROVED.value
+    ).exists()
 
 def get_latest_published_concept(concept_id, default=None):
     """
@@ -159,43 +129,20 @@ def get_latest_published_concept(concept_id, default=None):
             otherwise returns (None)
 
     """
-    concepts = Concept.history.none()
-    with connection.cursor() as cursor:
-        sql = '''
-        select *
-         from (
-           select distinct on (id)
-                  cast(concepts->>'concept_id' as integer) as concept_id,
-                  cast(concepts->>'concept_version_id' as integer) as concept_version_id
-             from public.clinicalcode_historicalgenericentity as entity,
-                  json_array_elements(entity.template_data::json->'concept_information') as concepts
-            where 
-              (
-                cast(concepts->>'concept_id' as integer) = %s
-              )
-              and not exists (
-                select *
-                  from public.clinicalcode_genericentity as ge
-                 where ge.is_deleted = true and ge.id = entity.id
-              )
-              and entity.publish_status = %s
-          ) results
-         order by concept_version_id desc
-         limit 1;
-        '''
-        cursor.execute(
-            sql,
-            params=[concept_id, APPROVAL_STATUS.APPROVED.value]
-        )
-
-        columns = [col[0] for col in cursor.description]
-        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    link = EntityConceptLink.objects.filter(
+            concept_id=concept_id,
+            publish_status=APPROVAL_STATUS.APPROVED.value
+        ) \
+        .exclude(
+            entity_id__in=GenericEntity.objects.filter(is_deleted=True).values('id')
+        ) \
+        .order_by('-concept_version_id') \
+        .first()
+
+    if link is None:
+        return default
 
-        concepts = Concept.history.filter(
-            id__in=[x.get('concept_id') for x in results],
-            history_id__in=[x.get('concept_version_id') for x in results],
-        )
-    
+    concepts = Concept.history.filter(id=link.concept_id, history_id=link.concept_version_id)
     if concepts.exists():
         return concepts.first()
     return default
@@ -261,22 +208,13 @@ def get_concept_headers(concept_information, default=None):
             concept.name,
             cast(obj->>'concept_id' as integer) as concept_id,
             cast(obj->>'concept_version_id' as integer) as concept_version_id,
-            case
-                when exists(
-                    select 1
-                      from (
-                        select
-                              id,
-                              cdata
-                          from public.clinicalcode_historicalgenericentity as entity,
-                             json_array_elements(entity.template_data::json->'concept_information') as cdata
-                         where entity.publish_status = 2
-                      ) results
-                     where cast(cdata->>'concept_id' as integer) = cast(obj->>'concept_id' as integer) and cast(cdata->>'concept_version_id' as integer) = cast(obj->>'concept_version_id' as integer)
-                     limit 1
-                ) then true
-                else false
-            end as is_published,
+            exists(
+                select 1
+                  from public.clinicalcode_entityconceptlink as link
+                 where link.concept_id = cast(obj->>'concept_id' as integer)
+                   and link.concept_version_id = cast(obj->>'concept_version_id' as integer)
+                   and link.publish_status = 2
+            ) as is_published,
             concept.phenotype_owner_id,
             codingsystem.id as coding_system_id,
             codingsystem.name as coding_system_name,
@@ -424,6 +362,19 @@ def get_concept_component_details(concept_id, concept_history_id, aggregate_code
     if not historical_concept:
         return None
 
+    # Published concept versions are immutable, i.e. try to resolve them from the cache
+    cache_key = hashlib.md5(
+        repr([aggregate_codes, include_codes, attribute_headers, include_source_data, format_for_api]).encode('utf-8'),
+        usedforsecurity=False
+    ).hexdigest()
+    cache_key = 'cl__components__v%d__%d__%d__%s' % (
+        CODELIST_CACHE_VERSION, historical_concept.id, historical_concept.history_id, cache_key
+    )
+
+    cached = cache_utils.get_immutable_values([cache_key]).get(cache_key)
+    if isinstance(cached, dict):
+        return cached
+
     seen_codes = set([])
     components_data = []
     with connection.cursor() as cursor:
@@ -579,8 +530,90 @@ def get_concept_component_details(concept_id, concept_history_id, aggregate_code
     if aggregate_codes:
         result.update({ 'codelist': list(seen_codes) })
 
+    concept_version = (historical_concept.id, historical_concept.history_id)
+    if concept_version in get_published_concept_versions([concept_version]):
+        cache_utils.set_immutable_values({ cache_key: result })
+
     return result
 
+def refresh_code_entity_links(entity_ids):
+    """
+      Rebuilds the `CodeEntityLink` rows of each of the given entities from the final codelist
+      of each concept version referenced by their published versions
+
+      Args:
+        entity_ids (str|list): the entity id(s) to refresh
+
+      Returns:
+        The (int) number of rows created
+    """
+    entity_ids = [entity_ids] if isinstance(entity_ids, str) else entity_ids
+    entity_ids = list(set([x for x in entity_ids if isinstance(x, str)])) if isinstance(entity_ids, (list, tuple, set)) else []
+    if len(entity_ids) < 1:
+        return 0
+
+    links = list(
+        EntityConceptLink.objects \
+            .filter(entity_id__in=entity_ids, publish_status=APPROVAL_STATUS.APPROVED.value) \
+            .values_list('entity_id', 'entity_history_id', 'concept_id', 'concept_version_id') \
+            .distinct()
+    )
+
+    concepts = list(set((concept_id, concept_version_id) for _, _, concept_id, concept_version_id in links))
+    coding_systems = dict(
+        Concept.history \
+            .filter(history_id__in=[concept_version_id for _, concept_version_id in concepts]) \
+            .values_list('history_id', 'coding_system_id')
+    )
+    codelists = get_concept_codelists(concepts, incl_attributes=False) if len(concepts) > 0 else {}
+
+    rows = [ ]
+    for entity_id, entity_history_id, concept_id, concept_version_id in links:
+        coding_system_id = coding_systems.get(concept_version_id)
+        codelist = codelists.get((concept_id, concept_version_id))
+        if coding_system_id is None or not codelist:
+            continue
+
+        rows += [
+            CodeEntityLink(
+                coding_system_id=coding_system_id,
+                code=code.get('code'),
+                concept_id=concept_id,
+                concept_version_id=concept_version_id,
+                entity_id=entity_id,
+                entity_history_id=entity_history_id
+            )
+            for code in codelist
+            if isinstance(code.get('code'), str)
+        ]
+
+    with transaction.atomic():
+        CodeEntityLink.objects.filter(entity_id__in=entity_ids).delete()
+        CodeEntityLink.objects.bulk_create(rows, batch_size=CODE_BULK_BATCH_SIZE)
+
+    return len(rows)
+
+def invalidate_code_entity_links(sender, instance, **kwargs):
+    """
+      Signal receiver used to schedule the refresh of an entity's `CodeEntityLink` rows once
+      the current transaction commits, _e.g._ after a `PublishedGenericEntity` is approved
+    """
+    if kwargs.get('raw', False) or instance is None:
+        return
+
+    entity_id = getattr(instance, 'entity_id', None)
+    if not isinstance(entity_id, str):
+        return
+
+    def refresh():
+        try:
+            refresh_code_entity_links([entity_id])
+        except Exception as e:
+            # Stale rows are rebuilt by the `sync_code_entity_links` command, don't fail the committed request
+            logging.exception(f'Failed to refresh CodeEntityLink rows of Entity<id: {entity_id}> with err:\n\n{str(e)}')
+
+    transaction.on_commit(refresh, robust=True)
+
 def get_concept_codelist(concept_id, concept_history_id, incl_attributes=False):
     """
       [!] Note: This method ignores permissions - it should only be called from a
@@ -600,22 +633,140 @@ def get_concept_codelist(concept_id, concept_history_id, incl_attributes=False):
         A list of distinct codes associated with a concept across each of its components
 
     """
+    concept_id = gen_utils.parse_int(concept_id, default=None)
+    concept_history_id = gen_utils.parse_int(concept_history_id, default=None)
+    if concept_id is None or concept_history_id is None:
+        return []
+
+    codelists = get_concept_codelists(
+        [(concept_id, concept_history_id)],
+        incl_attributes=incl_attributes
+    )
+
+    return codelists.get((concept_id, concept_history_id), [])
+
+def get_codelist_cache_key(concept_id, concept_history_id, incl_attributes=False):
+    """
+      Derives the immutable cache key of a concept version's final codelist
+
+      Args:
+        concept_id (number): The concept ID of interest
+
+        concept_history_id (number): The concept's historical id of interest
+
+        incl_attributes (bool): Whether the codelist includes code attributes
+
+      Returns:
+        A (str) cache key
+
+    """
+    return 'cl__codelist__v%d__%d__%d__%d' % (
+        CODELIST_CACHE_VERSION, concept_id, concept_history_id, 1 if incl_attributes else 0
+    )
+
+def get_published_concept_versions(concepts):
+    """
+      Determines which of the given concept versions are published, i.e. immutable, either
+      (a) directly via the legacy system or (b) via a published Phenotype
+
+      Args:
+        concepts (list): A list of (concept_id, concept_history_id) pairs
+
+      Returns:
+        A set containing each of the published (concept_id, concept_history_id) pairs
+
+    """
+    concepts = set(concepts)
+    concept_ids = list(set(concept_id for concept_id, _ in concepts))
+    if len(concept_ids) < 1:
+        return set()
+
+    published = set(
+        EntityConceptLink.objects \
+            .filter(concept_id__in=concept_ids, publish_status=APPROVAL_STATUS.APPROVED.value) \
+            .values_list('concept_id', 'concept_version_id') \
+            .distinct()
+    )
+
+    published |= set(
+        PublishedConcept.objects \
+            .filter(concept_id__in=concept_ids) \
+            .values_list('concept_id', 'concept_history_id')
+    )
+
+    return concepts.intersection(published)
+
+def get_concept_codelists(concepts, incl_attributes=False, use_cache=True):
+    """
+      [!] Note: This method ignores permissions - it should only be called from a
+                a method that has previously considered accessibility
+
+      Set-based variant of `get_concept_codelist()`, builds the distinct, aggregated
+      codelist of several concepts in a single query
+
+      The codelists of published concept versions are immutable and are therefore
+      cached, see `cache_utils.get_immutable_values()`
+
+      Args:
+        concepts (list): A list of (concept_id, concept_history_id) pairs
+
+        incl_attributes (bool): Whether to include code attributes
+
+        use_cache (bool): Whether to read from, and write to, the published codelist cache
+
+      Returns:
+        A dict containing the distinct codes associated with each concept across each of
+        its components, keyed by its (concept_id, concept_history_id) pair; concepts without
+        any codes are omitted
+
+    """
+    concept_ids = []
+    concept_history_ids = []
+    for concept_id, concept_history_id in concepts:
+        concept_id = gen_utils.parse_int(concept_id, default=None)
+        concept_history_id = gen_utils.parse_int(concept_history_id, default=None)
+        if concept_id is None or concept_history_id is None:
+            continue
+
+        concept_ids.append(concept_id)
+        concept_history_ids.append(concept_history_id)
+
+    output = {}
+    if len(concept_ids) < 1:
+        return output
+
+    cache_keys = None
+    if use_cache:
+        cache_keys = {
+            get_codelist_cache_key(concept_id, concept_history_id, incl_attributes): (concept_id, concept_history_id)
+            for concept_id, concept_history_id in zip(concept_ids, concept_history_ids)
+        }
+
+        cached = cache_utils.get_immutable_values(list(cache_keys.keys()))
+        for key, codelist in cached.items():
+            if isinstance(codelist, list) and len(codelist) > 0:
+                output[cache_keys.get(key)] = codelist
+
+        cache_keys = { key: concept for key, concept in cache_keys.items() if key not in cached }
+        if len(cache_keys) < 1:
+            return output
+
+        concept_ids = [concept_id for concept_id, _ in cache_keys.values()]
+        concept_history_ids = [concept_history_id for _, concept_history_id in cache_keys.values()]
 
-    output = []
     with connection.cursor() as cursor:
         sql = '''
         with 
         concept as (
             select
-                    id,
-                    history_id,
-                    history_date
-              from public.clinicalcode_historicalconcept
-             where id = %(concept_id)s
-               and history_id = %(concept_history_id)s
-             group by id, history_id, history_date
-             order by history_id desc
-             limit 1
+                    concept.id,
+                    concept.history_id,
+                    concept.history_date
+              from unnest(%(concept_ids)s::int[], %(concept_history_ids)s::int[]) as target(concept_id, concept_history_id)
+              join public.clinicalcode_historicalconcept as concept
+                on concept.id = target.concept_id
+               and concept.history_id = target.concept_history_id
+             group by concept.id, concept.history_id, concept.history_date
         ),
         component as (
         	select
@@ -674,13 +825,19 @@ def get_concept_codelist(concept_id, concept_history_id, incl_attributes=False):
             select
                     included_codes.*,
                     attributes.attributes,
-                    row_number() over (partition by included_codes.code order by included_codes.id desc) as rn
+                    row_number() over (
+                        partition by included_codes.concept_id, included_codes.concept_history_id, included_codes.code
+                        order by included_codes.id desc
+                    ) as rn
               from component as included_codes
               left join component as excluded_codes
-                on excluded_codes.code = included_codes.code
+                on excluded_codes.concept_id = included_codes.concept_id
+               and excluded_codes.concept_history_id = included_codes.concept_history_id
+               and excluded_codes.code = included_codes.code
                and excluded_codes.logical_type = 2
               left join (
-                  select attr.*
+                  select attr.*,
+                         concept.history_id as concept_history_id
                     from concept as concept
                     join public.clinicalcode_historicalconceptcodeattribute as attr
                       on attr.concept_id = concept.id
@@ -693,6 +850,7 @@ def get_concept_codelist(concept_id, concept_history_id, incl_attributes=False):
                      and deleted_attr.id is null
               ) as attributes
                 on attributes.concept_id = included_codes.concept_id
+               and attributes.concept_history_id = included_codes.concept_history_id
                and attributes.history_date <= included_codes.concept_history_date
                and attributes.code = included_codes.code
              where included_codes.logical_type = 1
@@ -701,13 +859,20 @@ def get_concept_codelist(concept_id, concept_history_id, incl_attributes=False):
         else:
             grouped_sql = '''
             select
+                    included_codes.concept_id,
+                    included_codes.concept_history_id,
                     included_codes.id,
                     included_codes.code,
                     included_codes.description,
-                    row_number() over (partition by included_codes.code order by included_codes.id desc) as rn
+                    row_number() over (
+                        partition by included_codes.concept_id, included_codes.concept_history_id, included_codes.code
+                        order by included_codes.id desc
+                    ) as rn
               from component as included_codes
               left join component as excluded_codes
-                on excluded_codes.code = included_codes.code
+                on excluded_codes.concept_id = included_codes.concept_id
+               and excluded_codes.concept_history_id = included_codes.concept_history_id
+               and excluded_codes.code = included_codes.code
                and excluded_codes.logical_type = 2
              where included_codes.logical_type = 1
                and excluded_codes.code is null
@@ -723,13 +888,30 @@ def get_concept_codelist(concept_id, concept_history_id, incl_attributes=False):
         cursor.execute(
             sql,
             {
-                'concept_id': concept_id,
-                'concept_history_id': concept_history_id
+                'concept_ids': concept_ids,
+                'concept_history_ids': concept_history_ids
             }
         )
 
         columns = [col[0] for col in cursor.description]
-        output = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        for row in cursor.fetchall():
+            code = dict(zip(columns, row))
+            key = (code.get('concept_id'), code.get('concept_history_id'))
+
+            # Retain the columns of the single concept variant
+            if not incl_attributes:
+                code.pop('concept_id', None)
+                code.pop('concept_history_id', None)
+
+            output.setdefault(key, []).append(code)
+
+    if cache_keys is not None:
+        published = get_published_concept_versions(cache_keys.values())
+        cache_utils.set_immutable_values({
+            key: output.get(concept, [])
+            for key, concept in cache_keys.items()
+            if concept in published
+        })
 
     return output
 
@@ -278,6 +278,93 @@ PAGE_RESULTS_SIZE = {
     '3': 100
 }
 
+"""
+    Describes the fields rendered by each search result card, whose sourced values are
+    resolved in bulk for each page of results, see `search_utils.hydrate_search_results()`
+"""
+SEARCH_HYDRATED_FIELDS = ['type', 'tags', 'collections', 'coding_system']
+
+"""
+    Streamed API export formats & the number of entities serialised per chunk
+"""
+API_STREAM_FORMATS = ['ndjson', 'csv']
+API_STREAM_CHUNK_SIZE = 100
+
+"""
+    Immutable (published) codelist cache, i.e. the shared cache timeout (seconds)
+    and the max. size (bytes) of the compressed payloads held in-process
+"""
+CODELIST_CACHE_TIMEOUT = 60*60*24*30
+CODELIST_CACHE_LRU_SIZE = 64*1024*1024
+CODELIST_CACHE_VERSION = 1
+
+"""
+    Rendered search filter panel cache, i.e. the key of its version token & the
+    max age (seconds) of each rendered panel
+
+    [!] Note: The version token is rotated whenever the statistics or the reference tables
+              of the filters change, see `search_utils.invalidate_filter_panels()`
+"""
+FILTER_PANEL_CACHE_VERSION_KEY = 'search_filters__version'
+FILTER_PANEL_CACHE_TIMEOUT = 60*60*24
+
+"""
+    Sitemap index & segments, i.e. the max. number of URLs per segment (as per the sitemap protocol),
+    the number of rows fetched per server-side cursor chunk & the max age (seconds) of each cached document
+"""
+SITEMAP_SEGMENT_SIZE = 50000
+SITEMAP_CHUNK_SIZE = 1000
+SITEMAP_CACHE_TIMEOUT = 60*60*8
+
+"""
+    Code search limits of the create/update editor, i.e.
+        - the max. number of codes returned by a single, unpaginated search
+        - the default & max. page size of a paginated search
+        - the max. number of codes counted by a search
+        - the max. length of a wildcard (regex) pattern
+        - the statement timeout (ms) of a search
+"""
+CODE_SEARCH_MAX_RESULTS = 50000
+CODE_SEARCH_PAGE_SIZE = 100
+CODE_SEARCH_MAX_PAGE_SIZE = 1000
+CODE_SEARCH_COUNT_LIMIT = 100000
+CODE_SEARCH_PATTERN_MAX_LENGTH = 256
+CODE_SEARCH_TIMEOUT = 10000
+
+"""
+    Codes of varied shapes used to detect codelist search patterns that match any code, _i.e._ a pattern
+    is refused if it matches the empty string or every one of these codes
+"""
+CODE_SEARCH_PATTERN_PROBES = ['1', 'a', 'Z', 'C10', '1234567', 'A01.1', 'xaXb9', 'E11-9', 'U07.1', '44054006']
+
+"""
+    Batch size used when bulk writing the codes, and code attributes, of a concept's components
+"""
+CODE_BULK_BATCH_SIZE = 5000
+
+"""
+    Max. number of codes that can be looked up by a single request to the code -> phenotype API
+"""
+CODE_LOOKUP_MAX_CODES = 1000
+
+"""
+    Max. number of unknown codes listed by a single concept validation error
+"""
+CODE_VALIDATION_MAX_REPORTED = 20
+
+"""
+    Request audit rollup, i.e. the `RequestRollup` daily counters, defaults:
+        - the no. of `easyaudit_requestevent` rows consumed per batch
+        - the max. no. of batches consumed by a single run of the rollup task
+        - the request methods included by the rollup
+        - the min. age (seconds) of a request before it's consumed, i.e. so that batches still being written by the
+          audit queue's flushers are never skipped by the rollup's watermark
+"""
+REQUEST_ROLLUP_BATCH_SIZE = 50000
+REQUEST_ROLLUP_MAX_BATCHES = 20
+REQUEST_ROLLUP_METHODS = ['GET', 'POST', 'PUT']
+REQUEST_ROLLUP_SAFETY_LAG = 300
+
 """
     Entity creation related defaults
 """
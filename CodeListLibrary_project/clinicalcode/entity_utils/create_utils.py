@@ -5,6 +5,7 @@ from django.db import transaction, IntegrityError, connection
 from django.apps import apps
 from django.db.models import Q
 from django.utils.timezone import make_aware
+from simple_history.utils import bulk_create_with_history
 
 import logging
 import inspect
@@ -594,9 +595,67 @@ def validate_computed_field(request, field, field_data, value, errors=[]):
     
     return value
 
-def validate_concept_form(form, errors):
+def get_unknown_codes(coding_system, codes):
+    """
+        Determines which of the given codes do not exist within the table of the given coding system
+
+        Args:
+            coding_system (CodingSystem): the coding system of interest
+            codes (list): a list of (str) codes
+
+        Returns:
+            A (list) of the unknown codes, or `None` if the coding system's table could not be queried
+    """
+    if not isinstance(coding_system, CodingSystem) or not isinstance(codes, list):
+        return None
+
+    codes = list(set(codes))
+    if len(codes) < 1:
+        return [ ]
+
+    table = coding_system.table_name
+    code_column = coding_system.code_column_name
+    if gen_utils.is_empty_string(table) or gen_utils.is_empty_string(code_column):
+        return None
+
+    filter_clause = ''
+    if isinstance(coding_system.filter, str) and not gen_utils.is_empty_string(coding_system.filter):
+        filter_clause = f'and ({coding_system.filter})'
+
+    sql = psycopg2.sql.SQL('''
+    select distinct t.{code_column}::text
+      from public.{table} as t
+     where t.{code_column}::text = any(%(codes)s::text[])
+     {filter_clause}
+    ''').format(
+        table=psycopg2.sql.Identifier(table.lower()),
+        code_column=psycopg2.sql.Identifier(code_column.lower()),
+        filter_clause=psycopg2.sql.SQL(filter_clause)
+    )
+
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params={ 'codes': codes })
+                known_codes = set([row[0] for row in cursor.fetchall()])
+    except Exception as e:
+        logger.warning(f'Failed to validate codes of CodingSystem<id: {coding_system.id}> with err:\n\n{str(e)}')
+        return None
+
+    return [code for code in codes if code not in known_codes]
+
+def validate_concept_form(form, errors, validate_codes=False):
     """
         Validates a concept form
+
+        Args:
+            form (dict): the concept form data
+            errors (list): a list that is passed by reference to append error data
+            validate_codes (bool): optionally specify whether to validate the existence of each code
+                                   within the concept's coding system; defaults to `False`
+
+        Returns:
+            A (dict) describing the cleaned concept data if valid, otherwise returns `None`
     """
     is_new_concept = form.get('is_new')
     is_dirty_concept = form.get('is_dirty')
@@ -650,16 +709,45 @@ def validate_concept_form(form, errors):
         errors.append(f'Invalid child entity with ID {concept_id} - components is a non-nullable list field.')
         return None
 
-    components = [ ]
+    # Collect & validate referenced components and codes, avoiding per-item lookups
     concept_components = concept_components or []
+    component_ids = set()
+    code_ids = set()
+    for concept_component in concept_components:
+        if not isinstance(concept_component, dict):
+            continue
+
+        component_id = gen_utils.parse_int(concept_component.get('id'), None)
+        if component_id is not None:
+            component_ids.add(component_id)
+
+        component_codes = concept_component.get('codes')
+        if not isinstance(component_codes, list):
+            continue
+
+        for component_code in component_codes:
+            code_id = gen_utils.parse_int(component_code.get('id'), None) if isinstance(component_code, dict) else None
+            if code_id is not None:
+                code_ids.add(code_id)
+
+    if len(component_ids) > 0:
+        component_ids = set(
+            Component.history.filter(id__in=list(component_ids)).values_list('id', flat=True).distinct()
+        )
+
+    if len(code_ids) > 0:
+        code_ids = set(
+            Code.history.filter(id__in=list(code_ids)).values_list('id', flat=True).distinct()
+        )
+
+    components = [ ]
     for concept_component in concept_components:
         component = { }
 
         is_new_component = concept_component.get('is_new')
         component_id = gen_utils.parse_int(concept_component.get('id'), None)
         if not is_new_component and component_id is not None:
-            historical_component = Component.history.filter(id=component_id)
-            if not historical_component.exists():
+            if component_id not in component_ids:
                 errors.append(f'Invalid child entity with ID {concept_id} - component is not valid')
                 return None
             component['id'] = component_id
@@ -704,8 +792,7 @@ def validate_concept_form(form, errors):
             is_new_code = is_new_component or component_code.get('is_new')
             code_id = gen_utils.parse_int(component_code.get('id'), None)
             if not is_new_code and code_id is not None:
-                historical_code = Code.history.filter(id=code_id)
-                if not historical_code.exists():
+                if code_id not in code_ids:
                     errors.append(f'Invalid child entity with ID {concept_id} - Code is not valid')
                     return None
                 code['id'] = code_id
@@ -761,6 +848,24 @@ def validate_concept_form(form, errors):
         component['codes'] = list(codes.values())
         components.append(component)
 
+    if validate_codes and isinstance(concept_details, dict):
+        unknown_codes = get_unknown_codes(
+            concept_coding,
+            [code.get('code') for component in components for code in component.get('codes')]
+        )
+
+        if unknown_codes is not None and len(unknown_codes) > 0:
+            unknown_codes = sorted(unknown_codes)
+            reported = ', '.join(unknown_codes[:constants.CODE_VALIDATION_MAX_REPORTED])
+            if len(unknown_codes) > constants.CODE_VALIDATION_MAX_REPORTED:
+                reported += f' and {len(unknown_codes) - constants.CODE_VALIDATION_MAX_REPORTED} more'
+
+            errors.append(
+                f'Invalid child entity with ID {concept_id} - {len(unknown_codes)} code(s) do not exist within '
+                f'the "{concept_coding.name}" coding system: {reported}'
+            )
+            return None
+
     field_value['concept']['is_new'] = is_new_concept
     field_value['concept']['is_dirty'] = is_dirty_concept
     field_value['concept']['name'] = concept_name
@@ -770,7 +875,7 @@ def validate_concept_form(form, errors):
 
     return field_value
 
-def validate_related_entities(field, field_data, value, errors):
+def validate_related_entities(field, field_data, value, errors, validate_codes=False):
     """
         Validates related entities, e.g. Concepts
     """
@@ -796,7 +901,7 @@ def validate_related_entities(field, field_data, value, errors):
         valid = True
         cleaned = [ ]
         for item in value:
-            concept = validate_concept_form(item, errors)
+            concept = validate_concept_form(item, errors, validate_codes=validate_codes)
             if concept is None:
                 valid = False
                 continue
@@ -931,7 +1036,8 @@ def validate_template_value(request, field, form_template, value, errors=[], fie
 
     field_children = template_utils.try_get_content(validation, 'has_children')
     if field_children is not None:
-        field_value = validate_related_entities(field, field_data, value, errors)
+        validate_codes = gen_utils.parse_int(gen_utils.try_get_param(request, 'validate_codes'), None) == 1
+        field_value = validate_related_entities(field, field_data, value, errors, validate_codes=validate_codes)
         if field_value is None and field_required:
             errors.append(f'"{field}" is invalid.')
             return field_value, False
@@ -1023,6 +1129,51 @@ def validate_entity_form(request, content, errors=[], method=None):
         }
     }
 
+def bulk_create_component_codes(concept, codelist, codes, user=None):
+    """
+        Bulk creates the codes, and their associated attributes, of a component's codelist alongside
+        their HistoricalRecords
+
+        Args:
+            concept (Concept): the concept that owns the component
+            codelist (CodeList): the component's codelist
+            codes (list): a list of dicts describing each code, its description and its attributes
+            user (User|None): the user creating the codes; defaults to `None`
+
+        Returns:
+            The (int) number of codes created
+    """
+    code_objects = [ ]
+    attribute_objects = [ ]
+    for code in codes or [ ]:
+        stripped_code = code.get('code')
+        if not isinstance(stripped_code, str) or gen_utils.is_empty_string(stripped_code):
+            continue
+        stripped_code = stripped_code.strip()
+
+        code_objects.append(Code(
+            code_list=codelist,
+            code=stripped_code,
+            description=code.get('description')
+        ))
+
+        attributes = code.get('attributes')
+        if attributes:
+            attribute_objects.append(ConceptCodeAttribute(
+                concept=concept,
+                created_by=user,
+                code=stripped_code,
+                attributes=attributes
+            ))
+
+    if len(code_objects) > 0:
+        bulk_create_with_history(code_objects, Code, batch_size=constants.CODE_BULK_BATCH_SIZE, default_user=user)
+
+    if len(attribute_objects) > 0:
+        bulk_create_with_history(attribute_objects, ConceptCodeAttribute, batch_size=constants.CODE_BULK_BATCH_SIZE, default_user=user)
+
+    return len(code_objects)
+
 def try_update_concept(request, item, entity=None):
     """
         Updates a concept, given the item data validated from the Phentoype builder form
@@ -1076,15 +1227,16 @@ def try_update_concept(request, item, entity=None):
             codelist_codes = Code.objects.filter(
                 code_list__id=component_codelist.id
             )
-            if codelist_codes.exists():
-                code_attributes = ConceptCodeAttribute.objects.filter(
-                    concept__id=concept_id,
-                    code__in=list(codelist_codes.values_list('code', flat=True))
-                )
 
-                if code_attributes.exists():
-                    code_attributes.delete()
-                codelist_codes.delete()
+            model_utils.bulk_delete_with_history(
+                ConceptCodeAttribute.objects.filter(
+                    concept__id=concept_id,
+                    code__in=codelist_codes.values('code')
+                ),
+                default_user=user,
+                batch_size=constants.CODE_BULK_BATCH_SIZE
+            )
+            model_utils.bulk_delete_with_history(codelist_codes, default_user=user, batch_size=constants.CODE_BULK_BATCH_SIZE)
             component_codelist.delete()
 
         component = model_utils.try_get_instance(Component, pk=component_id)
@@ -1124,42 +1276,29 @@ def try_update_concept(request, item, entity=None):
         prev_codes = set(list(codelist.codes.values_list('code', flat=True)))
         req_codes = set([obj.get('code') for obj in new_codes])
 
-        added_codes = list(req_codes - prev_codes)
+        added_codes = req_codes - prev_codes
         deleted_codes = list(prev_codes - req_codes)
-        
-        for code_item in deleted_codes:
-            removable_codes = Code.objects.filter(code_list_id=codelist.pk, code=code_item)
-            if removable_codes.exists():
-                attribute = ConceptCodeAttribute.objects.filter(
-                    concept_id=concept_id,
-                    code__in=list(removable_codes.values_list('code', flat=True))
-                )
-                if attribute.exists():
-                    attribute.delete()
 
-                removable_codes.delete()
+        if len(deleted_codes) > 0:
+            model_utils.bulk_delete_with_history(
+                ConceptCodeAttribute.objects.filter(concept_id=concept_id, code__in=deleted_codes),
+                default_user=user,
+                batch_size=constants.CODE_BULK_BATCH_SIZE
+            )
+            model_utils.bulk_delete_with_history(
+                Code.objects.filter(code_list_id=codelist.pk, code__in=deleted_codes),
+                default_user=user,
+                batch_size=constants.CODE_BULK_BATCH_SIZE
+            )
 
-        for code_item in added_codes:
-            codes = Code.objects.filter(code_list_id=codelist.pk, code=code_item)
-            code_object = next(item for item in new_codes if item['code'] == code_item)
+        if len(added_codes) > 0:
+            added_objects = { }
+            for code_object in new_codes:
+                code_item = code_object.get('code')
+                if code_item in added_codes and code_item not in added_objects:
+                    added_objects[code_item] = code_object
 
-            if codes.exists():
-                codes = codes.first()
-            else:
-                codes = Code.objects.create(
-                    code_list=codelist, 
-                    code=code_item, 
-                    description=code_object.get('description')
-                )
-
-            attributes = code_object.get('attributes')
-            if attributes:
-                ConceptCodeAttribute.objects.create(
-                    concept=concept,
-                    created_by=user,
-                    code=code_item,
-                    attributes=attributes
-                )
+            bulk_create_component_codes(concept, codelist, list(added_objects.values()), user=user)
 
     # Create new components, codelists and associated codes
     new_components += [obj for obj in components_data if obj.get('is_new')]
@@ -1177,26 +1316,7 @@ def try_update_concept(request, item, entity=None):
         )
 
         codelist = CodeList.objects.create(component=component, description='-')
-        for code in obj.get('codes'):
-            stripped_code = code.get('code')
-            if not isinstance(stripped_code, str) or gen_utils.is_empty_string(stripped_code):
-                continue
-            stripped_code = stripped_code.strip()
-
-            codes = Code.objects.create(
-                code_list=codelist,
-                code=stripped_code,
-                description=code.get('description')
-            )
-
-            attributes = code.get('attributes')
-            if attributes:
-                ConceptCodeAttribute.objects.create(
-                    concept=concept,
-                    created_by=user,
-                    code=stripped_code,
-                    attributes=attributes
-                )
+        bulk_create_component_codes(concept, codelist, obj.get('codes'), user=user)
     
     concept.save()
     return concept
@@ -1249,26 +1369,7 @@ def try_create_concept(request, item, entity=None):
         )
 
         codelist = CodeList.objects.create(component=component, description='-')
-        for code in obj.get('codes'):
-            stripped_code = code.get('code')
-            if not isinstance(stripped_code, str) or gen_utils.is_empty_string(stripped_code):
-                continue
-            stripped_code = stripped_code.strip()
-
-            Code.objects.create(
-                code_list=codelist,
-                code=stripped_code,
-                description=code.get('description')
-            )
-
-            attributes = code.get('attributes')
-            if attributes:
-                ConceptCodeAttribute.objects.create(
-                    concept=concept,
-                    created_by=user,
-                    code=stripped_code,
-                    attributes=attributes
-                )
+        bulk_create_component_codes(concept, codelist, obj.get('codes'), user=user)
 
     if entity is not None:
         concept.phenotype_owner = entity
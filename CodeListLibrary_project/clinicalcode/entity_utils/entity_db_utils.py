@@ -25,6 +25,7 @@ from clinicalcode.models.Phenotype import Phenotype
 from clinicalcode.models.WorkingSet import WorkingSet
 from clinicalcode.models.PhenotypeWorkingset import PhenotypeWorkingset
 from clinicalcode.models.GenericEntity import GenericEntity
+from clinicalcode.models.EntityConceptLink import EntityConceptLink
 
 #--------- Order queries ---------------
 entity_order_queries = {
@@ -52,7 +53,7 @@ def get_can_edit_subquery(request):
     if not request.user.is_authenticated:
         can_edit_subquery = " ( FALSE ) can_edit , "  #    2= published only
     else:
-        if settings.CLL_READ_ONLY:
+        if permission_utils.is_read_only(request):
             can_edit_subquery = " ( FALSE ) can_edit , "
         else:
             if request.user.is_superuser:
@@ -105,22 +106,27 @@ def get_concept_ids_from_phenotypes(data, return_id_or_history_id="both"):
     ''' return list of visible concept ids/versions 
     - data: list of dic is the output of  get_visible_live_or_published_phenotype_versions()
     '''
+    history_ids = [p['history_id'] for p in data if p['template_id'] == 1] # clinical-coded phenotype
+    if len(history_ids) < 1:
+        return []
+
+    links = {}
+    for entity_history_id, concept_id, concept_version_id in EntityConceptLink.objects \
+        .filter(entity_history_id__in=history_ids) \
+        .order_by('id') \
+        .values_list('entity_history_id', 'concept_id', 'concept_version_id'):
+        links.setdefault(entity_history_id, []).append((concept_id, concept_version_id))
+
     concepts = []
-    for p in data:
-        if p['template_id'] == 1: # clinical-coded phenotype
-            template_data = json.loads(p['template_data'])
-            if template_data['concept_information']:
-                for c in template_data['concept_information']:
-                    concepts.append((c['concept_id'], c['concept_version_id']))
-                
+    for history_id in history_ids:
+        concepts += links.get(history_id, [])
+
     if return_id_or_history_id.lower().strip() == "id":
         return list(set([c[0] for c in concepts]))
     elif return_id_or_history_id.lower().strip() == "history_id":
         return list(set([c[1] for c in concepts]))
     else:  #    both
         return [(c[0], c[1]) for c in concepts]
-                    
-    return []
 
 
 
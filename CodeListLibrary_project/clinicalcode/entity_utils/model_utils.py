@@ -1,7 +1,8 @@
-from django.db import connection
+from django.db import connection, transaction
 from django.apps import apps
 from django.db.models import Model, ForeignKey
 from django.core.cache import cache
+from django.utils import timezone
 from django.forms.models import model_to_dict
 from django.contrib.auth.models import Group
 from django.contrib.auth import get_user_model
@@ -408,3 +409,51 @@ def modify_entity_change_reason(entity, reason):
 
     reason = (reason[:98] + '..') if len(reason) > 98 else reason
     simple_history.utils.update_change_reason(entity, reason)
+
+def bulk_delete_with_history(queryset, default_user=None, batch_size=None):
+    """
+      Deletes the instances matched by a queryset in a single statement, alongside the bulk
+      creation of their deletion (`-`) HistoricalRecords
+
+      Note:
+        - Signals and cascades are not applied, this should only be used for models
+          without dependents, e.g. `Code` & `ConceptCodeAttribute`
+
+      Args:
+        queryset (QuerySet): the instances to delete
+        default_user (User|None): optionally specify the history user; defaults to `None`
+        batch_size (int|None): optionally specify the batch size of the historical inserts; defaults to `None`
+
+      Returns:
+        The (int) number of deleted instances
+    """
+    model = queryset.model
+    instances = list(queryset)
+    if len(instances) < 1:
+        return 0
+
+    history_model = model.history.model
+    history_date = timezone.now()
+    historical_instances = [
+        history_model(
+            history_date=history_date,
+            history_user=default_user,
+            history_change_reason=None,
+            history_type='-',
+            **{
+                field.attname: getattr(instance, field.attname)
+                for field in history_model.tracked_fields
+            }
+        )
+        for instance in instances
+    ]
+
+    with transaction.atomic():
+        history_model.objects.bulk_create(historical_instances, batch_size=batch_size)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'delete from {connection.ops.quote_name(model._meta.db_table)} where {model._meta.pk.column} = any(%(pks)s);',
+                params={ 'pks': [instance.pk for instance in instances] }
+            )
+            return cursor.rowcount
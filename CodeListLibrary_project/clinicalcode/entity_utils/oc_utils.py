@@ -1,20 +1,29 @@
-from rest_framework.test import APIRequestFactory, force_authenticate
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import connection
+from django.test.client import RequestFactory
 from io import StringIO
 from http import HTTPStatus
+from concurrent.futures import ThreadPoolExecutor
 
+import os
 import csv
 import json
 import time
+import hashlib
 import logging
+import tempfile
 import requests
 
-from ..api.views.GenericEntity import create_generic_entity, update_generic_entity
+from . import constants, create_utils
 
 logger = logging.getLogger(__name__)
 
+"""
+    Advisory lock key used to prevent overlapping OpenCodelists syncs
+"""
+SYNC_LOCK = 'clinicalcode_opencodelists_sync'
+
 REF_C_SYS = {
     'readv2': 5,
     'ctv3': 6,
@@ -80,6 +89,114 @@ REF_LKUP = {
     }
 }
 
+def get_opencodelist_url(path):
+    """
+      Resolves the URL of some OpenCodelists resource relative to the `OPENCODELISTS_URL` setting
+
+      Args:
+        path (str): the resource's path, e.g. `/api/v1/codelist/`
+
+      Returns:
+        The (str) absolute URL
+    """
+    base = getattr(settings, 'OPENCODELISTS_URL', None) or 'https://www.opencodelists.org'
+    return base.rstrip('/') + '/' + path.lstrip('/')
+
+def get_opencodelist_session(pool_size=None):
+    """
+      Builds a HTTP session whose connection pool is shared by the sync's workers
+
+      Args:
+        pool_size (int|None): optionally specify the max. no. of pooled connections; defaults to the `OPENCODELISTS_WORKERS` setting
+
+      Returns:
+        A (requests.Session) instance
+    """
+    pool_size = max(pool_size or getattr(settings, 'OPENCODELISTS_WORKERS', 8), 1)
+
+    session = requests.Session()
+    session.proxies.update({
+        'http': '' if settings.IS_DEVELOPMENT_PC else 'http://proxy:8080/',
+        'https': '' if settings.IS_DEVELOPMENT_PC else 'http://proxy:8080/'
+    })
+
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+class OpenCodelistCache:
+    """
+      On-disk cache of OpenCodelists responses, each entry stores the response body alongside
+      its validators, i.e. its `ETag` and `Last-Modified` headers
+
+      Args:
+        directory (str|None): optionally specify the cache directory; defaults to the `OPENCODELISTS_CACHE_DIR` setting
+    """
+    def __init__(self, directory=None):
+        self.directory = directory or getattr(settings, 'OPENCODELISTS_CACHE_DIR', None)
+        if self.directory:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+            except OSError as e:
+                logger.warning(f'Unable to create OpenCodelists cache directory, caching disabled:\n\n{str(e)}')
+                self.directory = None
+
+    def __get_path(self, key):
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{name}.json')
+
+    def get(self, key):
+        """
+          Retrieves a cached response
+
+          Returns:
+            Either (a) a (dict) containing the `body`, `etag` and `last_modified` of the response, or (b) a `None` value if not cached
+        """
+        if not self.directory:
+            return None
+
+        try:
+            with open(self.__get_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        return entry if isinstance(entry, dict) and isinstance(entry.get('body'), str) else None
+
+    def set(self, key, body, etag=None, last_modified=None):
+        """
+          Atomically stores a response
+        """
+        if not self.directory:
+            return
+
+        path = self.__get_path(key)
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({ 'body': body, 'etag': etag, 'last_modified': last_modified }, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f'Unable to write OpenCodelists cache entry with err:\n\n{str(e)}')
+
+def parse_opencodelist_csv(text):
+    """
+      Parses a downloaded OpenCodelists codelist
+
+      Args:
+        text (str): the CSV content
+
+      Returns:
+        A (list) of rows, each describing its columns (lowercase) & their values
+    """
+    data = csv.DictReader(StringIO(text))
+    if data.fieldnames is None:
+        return []
+
+    data.fieldnames = [x.lower().strip() for x in data.fieldnames]
+    return [row for row in data]
+
 def query_opencodelist_phenotypes(
     url,
     req_timeout=30,
@@ -93,70 +210,126 @@ def query_opencodelist_phenotypes(
         HTTPStatus.GATEWAY_TIMEOUT.value,
         HTTPStatus.INTERNAL_SERVER_ERROR.value,
     ],
-    codelist=False
+    codelist=False,
+    session=None,
+    cache=None,
+    cache_key=None,
+    immutable=False
 ):
     """
       Attempts to query OpenCodelists Phenotypes API
 
       Args:
-        req_timeout     (int): request timeout (in seconds)
-        retry_attempts  (int): max num. of attempts for each page request
-        retry_delay     (int): timeout, in seconds, between retry attempts (backoff algo)
-        retry_codes    (list): a list of ints specifying HTTP Status Codes from which to trigger retry attempts
-        codelist       (bool): boolean flag for retrieving a codelist
+        req_timeout              (int): request timeout (in seconds)
+        retry_attempts           (int): max num. of attempts for each page request
+        retry_delay              (int): timeout, in seconds, between retry attempts (backoff algo)
+        retry_codes             (list): a list of ints specifying HTTP Status Codes from which to trigger retry attempts
+        codelist                (bool): boolean flag for retrieving a codelist
+        session     (requests.Session): optionally specify the HTTP session; defaults to a new session
+        cache      (OpenCodelistCache): optionally specify the response cache; responses aren't cached if not specified
+        cache_key                (str): optionally specify the cache key; defaults to the URL
+        immutable               (bool): whether the cached response can be used without revalidation, e.g. a codelist keyed by its version hash
 
       Returns:
         dict containing the assoc. data
     """
-    proxy = {
-        'http': '' if settings.IS_DEVELOPMENT_PC else 'http://proxy:8080/',
-        'https': '' if settings.IS_DEVELOPMENT_PC else 'http://proxy:8080/'
-    }
+    session = session or get_opencodelist_session(pool_size=1)
+    cache_key = cache_key or url
 
-    response = None
-    retry_attempts = max(retry_attempts, 0) + 1
-    for attempts in range(0, retry_attempts, 1):
-        try:
-            response = requests.get(url, timeout=req_timeout, proxies=proxy)
-        except requests.exceptions.ConnectionError:
-            response = None
-
-        if retry_attempts - attempts > 0 and (not response or (retry_codes and response.status_code in retry_codes)):
-            time.sleep(retry_delay*pow(2, attempts - 1))
-            continue
-
-        if response:
+    cached = cache.get(cache_key) if cache is not None else None
+    if cached is not None and immutable:
+        body = cached.get('body')
+    else:
+        headers = { }
+        if cached is not None:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached.get('etag')
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached.get('last_modified')
+
+        response = None
+        retry_attempts = max(retry_attempts, 0) + 1
+        for attempts in range(0, retry_attempts, 1):
+            try:
+                response = session.get(url, timeout=req_timeout, headers=headers)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                response = None
+
+            should_retry = response is None or (retry_codes and response.status_code in retry_codes)
+            if should_retry and attempts < retry_attempts - 1:
+                time.sleep(retry_delay*pow(2, attempts))
+                continue
             break
 
-    if not response or response.status_code != 200:
-        status = response.status_code if response else 'INT_ERR'
-        raise Exception(f'Err response from server, Status<code: {status}, attempts_made: {retry_attempts}>')
+        if response is not None and response.status_code == HTTPStatus.NOT_MODIFIED.value and cached is not None:
+            body = cached.get('body')
+        elif response is None or response.status_code != 200:
+            status = response.status_code if response is not None else 'INT_ERR'
+            raise Exception(f'Err response from server, Status<code: {status}, attempts_made: {retry_attempts}>')
+        else:
+            body = response.text
+            if cache is not None:
+                cache.set(
+                    cache_key,
+                    body,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified')
+                )
 
     if not codelist:
-        result = response.json()
+        result = json.loads(body)
         if not isinstance(result, dict):
             raise Exception(f'Invalid resultset, expected result as `dict` but got `{type(result)}`')
     else:
-        result = []
-
-        data = StringIO(response.text)
-        data = csv.DictReader(data)
-        data.fieldnames = [x.lower().strip() for x in data.fieldnames]
-        for row in data:
-            result.append(row)
-        
+        result = parse_opencodelist_csv(body)
         if not isinstance(result, list):
             raise Exception(f'Invalid resultset, expected result as `list` but got `{type(result)}`')
 
     return result
 
-def collect_opencodelist_concept(data, full_slug):
+def fetch_opencodelist_codelists(versions, session=None, cache=None, max_workers=None):
+    """
+      Concurrently downloads the codelist of each of the given OpenCodelists versions
+
+      Args:
+        versions          (list): a list of dicts describing the `full_slug` and `hash` of each version
+        session (requests.Session): optionally specify the HTTP session
+        cache (OpenCodelistCache): optionally specify the response cache
+        max_workers        (int): optionally specify the max. no. of concurrent downloads; defaults to the `OPENCODELISTS_WORKERS` setting
+
+      Returns:
+        A (dict) mapping each version's `full_slug` to its parsed codelist, or to `None` if the download failed
+    """
+    max_workers = max(max_workers or getattr(settings, 'OPENCODELISTS_WORKERS', 8), 1)
+    session = session or get_opencodelist_session(pool_size=max_workers)
+
+    def fetch(version):
+        slug = version.get('full_slug')
+        try:
+            return slug, query_opencodelist_phenotypes(
+                get_opencodelist_url(f'/codelist/{slug}/download.csv'),
+                codelist=True,
+                session=session,
+                cache=cache,
+                cache_key=f'codelist:{version.get("hash") or slug}',
+                immutable=version.get('hash') is not None
+            )
+        except Exception as e:
+            logger.warning(f'Unable to sync OpenCodelist phenotype, failed to download codelist<{slug}>:\n\n{str(e)}')
+            return slug, None
+
+    unique = { x.get('full_slug'): x for x in versions if x.get('full_slug') }
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='opencodelists') as pool:
+        return dict(pool.map(fetch, unique.values()))
+
+def collect_opencodelist_concept(data, full_slug, codes=None):
     """
       Safely parses an OpenCodelist phenotype and formats to required CL format
 
       Args:
         data (dict): OpenCodelist concept data
         full_slug (text): OpenCodelist phenotype version slug
+        codes (list|None): optionally specify the codelist, if previously downloaded; defaults to downloading it
 
       Returns:
         A dict containing the parsed data
@@ -178,16 +351,17 @@ def collect_opencodelist_concept(data, full_slug):
         'is_new': True
     }
 
-    try:
-        codes = query_opencodelist_phenotypes(
-            f'https://www.opencodelists.org/codelist/{full_slug}/download.csv',
-            codelist=True
-        )
-    except Exception as e:
-        msg = f'Unable to sync OpenCodelist phenotype, failed to download codelist:\n\n{str(e)}'
-        logger.warning(msg)
-        return None
-    
+    if codes is None:
+        try:
+            codes = query_opencodelist_phenotypes(
+                get_opencodelist_url(f'/codelist/{full_slug}/download.csv'),
+                codelist=True
+            )
+        except Exception as e:
+            msg = f'Unable to sync OpenCodelist phenotype, failed to download codelist:\n\n{str(e)}'
+            logger.warning(msg)
+            return None
+
     if len(codes) < 1:
         return None
 
@@ -233,7 +407,8 @@ def collect_opencodelist_phenotype(
     data, 
     entity_id=None, 
     entity_version=None, 
-    should_update=False
+    should_update=False,
+    codes=None
 ):
     """
       Safely parses an OpenCodelist phenotype and formats to required CL format
@@ -243,6 +418,7 @@ def collect_opencodelist_phenotype(
         entity_id (str): The id of the phenotype
         entity_version (int): The version id of the phenotype
         should_update (bool): Whether the phenotype should be formatted to update an existing one or not
+        codes (list|None): optionally specify the codelist of its latest version, if previously downloaded
 
       Returns:
         A dict containing the parsed data
@@ -264,7 +440,7 @@ def collect_opencodelist_phenotype(
         { 'title': x.get('text'), 'url': x.get('url') } for x in references
     ]
 
-    concept_information = collect_opencodelist_concept(data, version_slug)
+    concept_information = collect_opencodelist_concept(data, version_slug, codes=codes)
     if concept_information is None:
         return None
 
@@ -277,7 +453,7 @@ def collect_opencodelist_phenotype(
             'methodology': data.get('methodology'),
             'collections': [18, 31],
             'tags': [],
-            'source_reference': f'https://www.opencodelists.org/codelist/{version_slug}',
+            'source_reference': get_opencodelist_url(f'/codelist/{version_slug}'),
             'references': formatted_references,
             'signed_off': [],
             'open_codelist_id': full_slug,
@@ -303,13 +479,73 @@ def collect_opencodelist_phenotype(
 
     return phenotype
 
+def save_opencodelist_phenotype(request, form, method):
+    """
+      Validates & creates, or updates, an entity from a collected OpenCodelist phenotype form
+
+      Args:
+        request (RequestContext): the request context, i.e. the sync user
+        form              (dict): the form derived from `collect_opencodelist_phenotype()`
+        method             (int): one of `FORM_METHODS.CREATE` or `FORM_METHODS.UPDATE`
+
+      Returns:
+        The created/updated (GenericEntity), or a `None` value if it failed
+    """
+    errors = []
+    form = create_utils.validate_entity_form(request, form, errors, method=method)
+    if form is None:
+        logger.warning(f'Unable to sync OpenCodelist phenotype, form invalid with errors: {errors}')
+        return None
+
+    entity = create_utils.create_or_update_entity_from_form(request, form, errors, publish_immediately=True)
+    if entity is None:
+        logger.warning(f'Unable to sync OpenCodelist phenotype, failed to save with errors: {errors}')
+
+    return entity
+
 def sync_opencodelist_phenotypes():
     """
       Attempts to sync the OpenCodelist phenotypes with those found through the OpenCodelist phenotypes API
+
+      [!] Note:
+        1. Overlapping syncs are skipped through a session-level advisory lock;
+        2. The codelist of each changed version is downloaded concurrently, responses are cached on-disk and revalidated through `ETag`/`If-Modified-Since`;
+        3. Entities are created/updated directly through `create_utils`, i.e. without dispatching API requests.
     """
+    with connection.cursor() as cursor:
+        cursor.execute('select pg_try_advisory_lock(hashtext(%s));', [SYNC_LOCK])
+        if not cursor.fetchone()[0]:
+            msg = 'Skipped OpenCodelist sync, another sync is in progress'
+            logger.info(msg)
+            return {}, msg
+
+    try:
+        return sync_opencodelist_changes()
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('select pg_advisory_unlock(hashtext(%s));', [SYNC_LOCK])
+
+def sync_opencodelist_changes(session=None, cache=None):
+    """
+      Creates, or updates, the entities of each new, or changed, OpenCodelist phenotype
+
+      [!] Note: Callers are expected to hold the sync lock, see `sync_opencodelist_phenotypes()`
+
+      Args:
+        session (requests.Session): optionally specify the HTTP session; defaults to a new session
+        cache (OpenCodelistCache): optionally specify the response cache; defaults to the `OPENCODELISTS_CACHE_DIR` cache
+
+      Returns:
+        A (tuple) containing (a) a dict of the `created` & `updated` entity ids, and (b) a message describing the result
+    """
+    cache = cache or OpenCodelistCache()
+    session = session or get_opencodelist_session()
+
     try:
         result = query_opencodelist_phenotypes(
-            url='https://www.opencodelists.org/api/v1/codelist/?description&methodology&references'
+            url=get_opencodelist_url('/api/v1/codelist/?description&methodology&references'),
+            session=session,
+            cache=cache
         )
     except Exception as e:
         msg = f'Unable to sync OpenCodelist phenotypes, failed to reach api with err:\n\n{str(e)}'
@@ -402,51 +638,57 @@ def sync_opencodelist_phenotypes():
         columns = [col[0] for col in cursor.description]
         result = dict(zip(columns, cursor.fetchone()))
 
-        to_create = result.get('to_create')
-        to_update = result.get('to_update')
+    to_create = result.get('to_create')
+    to_update = result.get('to_update')
+    to_create = to_create if isinstance(to_create, list) else []
+    to_update = to_update if isinstance(to_update, list) else []
+    if len(to_create) < 1 and len(to_update) < 1:
+        return {}, 'Up to date'
+
+    # Download the codelist of each changed version concurrently
+    versions = [
+        datamap.get(row.get('open_codelist_id')).get('versions')[-1]
+        for row in to_create + to_update
+    ]
+    codelists = fetch_opencodelist_codelists(versions, session=session, cache=cache)
 
-        has_create = isinstance(to_create, list) and len(to_create) > 0
-        has_update = isinstance(to_update, list) and len(to_update) > 0
-        if not has_create and not has_update:
-            return
+    user = User.objects.get(id=1)
+    request = RequestFactory().post(get_opencodelist_url('/api/v1/phenotypes/create'))
+    request.user = user
 
-        user = User.objects.get(id=1)
-        factory = APIRequestFactory()
+    created, updated = [], []
+    for row in to_create:
+        phenotype = datamap.get(row.get('open_codelist_id'))
+        codes = codelists.get(phenotype.get('versions')[-1].get('full_slug'))
+        if codes is None:
+            continue
 
-        if has_create:
-            for row in to_create:
-                form = collect_opencodelist_phenotype(
-                    datamap.get(row.get('open_codelist_id'))
-                )
-                if not form:
-                    continue
+        form = collect_opencodelist_phenotype(phenotype, codes=codes)
+        if not form:
+            continue
 
-                request = factory.post(
-                    '/api/v1/phenotypes/create?publish=true', 
-                    form, 
-                    content_type='application/json'
-                )
-                force_authenticate(request, user=user)
-                create_generic_entity(request)
-
-        if has_update:
-            for row in to_update:
-                entity_id = row.get('entity_id')
-                entity_version_id = row.get('version_id')
-
-                form = collect_opencodelist_phenotype(
-                    datamap.get(row.get('open_codelist_id')),
-                    entity_id=entity_id,
-                    entity_version=entity_version_id,
-                    should_update=True
-                )
-                if not form:
-                    continue
+        entity = save_opencodelist_phenotype(request, form, constants.FORM_METHODS.CREATE.value)
+        if entity is not None:
+            created.append(entity.id)
 
-                request = factory.put(
-                    f'/api/v1/phenotypes/update?publish=true', 
-                    form, 
-                    content_type='application/json'
-                )
-                force_authenticate(request, user=user)
-                update_generic_entity(request)
+    for row in to_update:
+        phenotype = datamap.get(row.get('open_codelist_id'))
+        codes = codelists.get(phenotype.get('versions')[-1].get('full_slug'))
+        if codes is None:
+            continue
+
+        form = collect_opencodelist_phenotype(
+            phenotype,
+            entity_id=row.get('entity_id'),
+            entity_version=row.get('version_id'),
+            should_update=True,
+            codes=codes
+        )
+        if not form:
+            continue
+
+        entity = save_opencodelist_phenotype(request, form, constants.FORM_METHODS.UPDATE.value)
+        if entity is not None:
+            updated.append(entity.id)
+
+    return { 'created': created, 'updated': updated }, f'Created {len(created)} and updated {len(updated)} phenotype(s)'
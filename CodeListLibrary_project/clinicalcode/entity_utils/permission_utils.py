@@ -1,10 +1,11 @@
 """Permission-related utilities; defines functions to vary content access & render behaviour."""
 from functools import wraps
-from django.db import connection
+from django.db import connection, transaction
 from django.http import HttpRequest
 from django.conf import settings
 from rest_framework import status as RestHttpStatus
 from django.db.models import Q, Model
+from django.db.models.expressions import RawSQL
 from django.contrib.auth import get_user_model
 from rest_framework.request import Request
 from django.core.exceptions import PermissionDenied
@@ -12,7 +13,9 @@ from rest_framework.exceptions import APIException, MethodNotAllowed, NotAuthent
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 from django.contrib.auth.models import Group
 
+import re
 import inspect
+import logging
 
 from ..models.Organisation import Organisation, OrganisationAuthority, OrganisationMembership
 from . import model_utils, gen_utils
@@ -31,6 +34,7 @@ from .constants import (
 
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
 '''Permission decorators'''
@@ -58,7 +62,7 @@ def redirect_readonly(fn):
 	"""
 	@wraps(fn)
 	def wrap(request, *args, **kwargs):
-		if settings.CLL_READ_ONLY:
+		if is_read_only(request):
 			raise PermissionDenied('ERR_403_GATEWAY')
 		return fn(request, *args, **kwargs)
 
@@ -197,7 +201,7 @@ class IsReadOnlyOrNotGateway(BasePermission):
 
 	def has_permission(self, request, view):
 		method = request.method
-		if not request.method in SAFE_METHODS and settings.CLL_READ_ONLY:
+		if not request.method in SAFE_METHODS and is_read_only(request):
 			raise MethodNotAllowed(
 				method=method,
 				detail=self.ERR_REQUEST_MSG % method,
@@ -241,7 +245,7 @@ class IsNotGateway(BasePermission):
 
 	def has_permission(self, request, view):
 		method = request.method
-		if settings.CLL_READ_ONLY:
+		if is_read_only(request):
 			raise MethodNotAllowed(
 				method=method,
 				detail=self.ERR_REQUEST_MSG % method,
@@ -332,6 +336,16 @@ def should_render_template(template=None, **kwargs):
 
 
 '''Status helpers'''
+def is_read_only(request=None):
+    """
+      Checks whether the application is READ-ONLY for the given request, _i.e._
+      either the application is configured as READ-ONLY or the requesting user
+      is a member of the `ReadOnlyUsers` group (as resolved by the `BrandMiddleware`)
+    """
+    if request is not None and isinstance(getattr(request, 'CLL_READ_ONLY', None), bool):
+        return request.CLL_READ_ONLY
+    return settings.CLL_READ_ONLY
+
 def is_member(user, group_name):
     """
       Checks if a User instance is a member of a group
@@ -601,7 +615,7 @@ def get_user_organisations(request, min_role_permission=ORGANISATION_ROLES.EDITO
       return results
 
 def user_has_create_context(request=None):
-  if request is None or settings.CLL_READ_ONLY:
+  if request is None or is_read_only(request):
     return False
 
   user = request.user
@@ -964,6 +978,95 @@ def get_accessible_entity_history(
         results = cursor.fetchone()
         return dict(zip(columns, results)) if results else None
 
+def refresh_accessible_entities():
+    """
+      Refreshes the `clinicalcode_accessibleentity` materialised view, i.e. the latest published
+      version of each entity accessible to anonymous users
+
+      Returns:
+        A (boolean) describing whether the view was refreshed
+    """
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('refresh materialized view concurrently public.clinicalcode_accessibleentity;')
+    except Exception as e:
+        logger.warning(f'Failed to refresh accessible entities with err:\n\n{str(e)}')
+        return False
+    return True
+
+"""
+  Fields of a GenericEntity whose modification may change its accessibility
+"""
+ACCESSIBLE_ENTITY_FIELDS = ('is_deleted', 'world_access', 'brands')
+
+def track_accessible_entity_changes(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+      Signal receiver used to flag whether a GenericEntity save modifies any of its
+      `ACCESSIBLE_ENTITY_FIELDS`, _i.e._ whether its `post_save` should refresh the
+      `clinicalcode_accessibleentity` materialised view
+
+      Note:
+        - New entities are never flagged since they're yet to be published
+    """
+    instance._accessible_entity_changed = False
+    if raw or instance._state.adding:
+        return
+
+    if update_fields is not None and not set(update_fields).intersection(ACCESSIBLE_ENTITY_FIELDS):
+        return
+
+    previous = sender.objects.filter(pk=instance.pk).values(*ACCESSIBLE_ENTITY_FIELDS).first()
+    instance._accessible_entity_changed = previous is None or any(
+        previous.get(field) != getattr(instance, field)
+        for field in ACCESSIBLE_ENTITY_FIELDS
+    )
+
+def invalidate_accessible_entities(sender=None, instance=None, **kwargs):
+    """
+      Signal receiver used to schedule the refresh of the `clinicalcode_accessibleentity`
+      materialised view once the current transaction commits, _e.g._ after an entity is
+      published, archived or restored
+
+      Note:
+        - Only one refresh is scheduled per transaction;
+        - GenericEntity saves are ignored unless they modify one of its `ACCESSIBLE_ENTITY_FIELDS`,
+          _e.g._ drafts & autosaves, see `track_accessible_entity_changes()`
+    """
+    if kwargs.get('raw', False):
+        return
+
+    is_entity_save = sender is GenericEntity and 'created' in kwargs
+    if is_entity_save and not getattr(instance, '_accessible_entity_changed', False):
+        return
+
+    if connection.in_atomic_block and any(x[1] is refresh_accessible_entities for x in connection.run_on_commit):
+        return
+    transaction.on_commit(refresh_accessible_entities)
+
+def get_lazy_entity_query(sql, params=None):
+    """
+      Builds a lazily evaluated queryset of the historical entities whose `history_id` is
+      selected by the given SQL, such that the ids are resolved as a subquery by Postgres
+      rather than being materialised in Python
+
+      Args:
+        sql (str): a query selecting a single `history_id` column, optionally containing
+                   named parameters, _e.g._ `%(user_id)s`
+        params (dict|None): the named parameters of the query
+
+      Returns:
+        A QuerySet of historical entities
+    """
+    params = params if isinstance(params, dict) else { }
+
+    values = [ ]
+    def to_positional(match):
+      values.append(params.get(match.group(1)))
+      return '%s'
+
+    sql = re.sub(r'%\((\w+)\)s', to_positional, sql)
+    return GenericEntity.history.filter(history_id__in=RawSQL(sql, values))
+
 def get_accessible_entities(
     request,
     consider_user_perms=True,
@@ -1012,7 +1115,7 @@ def get_accessible_entities(
             results = GenericEntity.objects.filter(brands__overlap=[brand.id])
 
             results = GenericEntity.history \
-                .filter(id__in=list(results.values_list('id', flat=True)))
+                .filter(id__in=results.values('id'))
         else:
             results = GenericEntity.history.all()
 
@@ -1024,47 +1127,34 @@ def get_accessible_entities(
         return results.latest_of_each()
 
     # Anon user query
-    #   i.e. only published phenotypes
+    #   i.e. only published phenotypes, see `clinicalcode_accessibleentity`
     if not user or user.is_anonymous:
-        # Note: removed `template__hide_on_create` recently as it might interfere
-        #       with previously published templates
-        sql = f'''
-        select t0.id, t0.history_id
-          from (
-            select
-                  hist_entity.id,
-                  hist_entity.history_id,
-                  row_number() over (
-                    partition by hist_entity.id
-                    order by hist_entity.history_id desc
-                  ) as rn_ref_n
-              from public.clinicalcode_historicalgenericentity as hist_entity
-              join public.clinicalcode_genericentity as live_entity
-                on hist_entity.id = live_entity.id
-              join public.clinicalcode_publishedgenericentity as pub_entity
-                on pub_entity.entity_id = hist_entity.id and pub_entity.entity_history_id = hist_entity.history_id
-              join public.clinicalcode_historicaltemplate as hist_tmpl
-                on hist_entity.template_id = hist_tmpl.id and hist_entity.template_version = hist_tmpl.template_version
-              join public.clinicalcode_template as live_tmpl
-                on hist_tmpl.id = live_tmpl.id
-             where (live_entity.is_deleted is null or live_entity.is_deleted = false)
-               and (hist_entity.is_deleted is null or hist_entity.is_deleted = false)
-               and pub_entity.approval_status = {APPROVAL_STATUS.APPROVED.value}
-               {brand_clause}
-               {pk_clause}
-          ) as t0
-          join public.clinicalcode_historicalgenericentity as t1
-            on t0.id = t1.id
-           and t0.history_id = t1.history_id
-         where t0.rn_ref_n = 1;
-        '''
+        anon_clause = ''
+        if len(brand_clause) > 0:
+            anon_clause += ' and accessible.brands && %(brand_ids)s'
+        if len(pk_clause) > 0:
+            anon_clause += ' and accessible.id = %(pk)s'
 
         if raw_query:
+            sql = f'''
+            select t1.id, t1.history_id
+              from public.clinicalcode_accessibleentity as accessible
+              join public.clinicalcode_historicalgenericentity as t1
+                on t1.history_id = accessible.history_id
+             where true
+               {anon_clause};
+            '''
+
             return GenericEntity.history.raw(sql, params=query_params)
 
-        with connection.cursor() as cursor:
-            cursor.execute(sql, query_params)
-            return GenericEntity.history.filter(history_id__in=[row[1] for row in cursor.fetchall()])
+        sql = f'''
+        select accessible.history_id
+          from public.clinicalcode_accessibleentity as accessible
+         where true
+           {anon_clause}
+        '''
+
+        return get_lazy_entity_query(sql, query_params)
 
     # Non-anon user
     #   i.e. dependent on user role
@@ -1172,15 +1262,13 @@ def get_accessible_entities(
       join public.clinicalcode_historicalgenericentity as t1
         on t0.id = t1.id
        and t0.history_id = t1.history_id
-     where t0.rn_ref_n = 1;
+     where t0.rn_ref_n = 1
     '''
 
     if raw_query:
         return GenericEntity.history.raw(sql, params=query_params)
 
-    with connection.cursor() as cursor:
-        cursor.execute(sql, query_params)
-        return GenericEntity.history.filter(history_id__in=[row[1] for row in cursor.fetchall()])
+    return get_lazy_entity_query(f'select history_id from ({sql}) as accessible', query_params)
 
 def get_latest_owner_version_from_concept(phenotype_id, concept_id, concept_version_id=None, default=None):
     """
@@ -1467,6 +1555,87 @@ def can_user_view_entity(request, entity_id, entity_history_id=None):
 
     return False
 
+def get_viewable_entity_versions(request, live_entities, historical_entities):
+    """
+      Batched variant of `can_user_view_entity()`, determines which of the given
+      historical entities are visible to a user in a constant number of queries
+
+      Args:
+        request (RequestContext): the HTTPRequest
+        live_entities (dict): The live entities of interest, keyed by their ID
+        historical_entities (list): The historical entities of interest
+
+      Returns:
+        A set containing the historical id of each entity the user is able to view
+    """
+    visible = set()
+    restricted = []
+    for historical_entity in historical_entities:
+        if historical_entity.id not in live_entities:
+            continue
+
+        if historical_entity.publish_status == APPROVAL_STATUS.APPROVED:
+            visible.add(historical_entity.history_id)
+        else:
+            restricted.append(historical_entity)
+
+    user = request.user
+    if len(restricted) < 1 or not user or user.is_anonymous:
+        return visible
+
+    brand = model_utils.try_get_brand(request)
+    is_moderator = is_member(user, 'Moderators')
+
+    organisation_ids = set(
+        live_entity.organisation_id
+        for live_entity in live_entities.values()
+        if live_entity.organisation_id is not None
+    )
+
+    organisation_owners = dict(
+        Organisation.objects.filter(id__in=list(organisation_ids)) \
+            .values_list('id', 'owner_id')
+    )
+
+    memberships = {}
+    if len(organisation_ids) > 0:
+        membership = user.organisationmembership_set \
+            .filter(organisation__id__in=list(organisation_ids)) \
+            .order_by('pk') \
+            .values_list('organisation_id', 'role')
+
+        for organisation_id, role in membership:
+            memberships.setdefault(organisation_id, role)
+
+    has_world_access = False
+    if brand is not None and brand.org_user_managed:
+        user_orgs = get_user_organisations(
+          request, min_role_permission=ORGANISATION_ROLES.MEMBER
+        )
+        has_world_access = bool(user_orgs) and len(user_orgs) >= 1
+
+    # Note: `is_publish_status()` disregards falsy statuses, i.e. `REQUESTED`
+    moderation_status = [APPROVAL_STATUS.PENDING, APPROVAL_STATUS.REJECTED]
+    for historical_entity in restricted:
+        live_entity = live_entities.get(historical_entity.id)
+        organisation_id = live_entity.organisation_id
+
+        has_access = user.is_superuser \
+            or (is_moderator and historical_entity.publish_status in moderation_status) \
+            or live_entity.owner_id == user.id \
+            or (organisation_id is not None and organisation_owners.get(organisation_id) == user.id) \
+            or memberships.get(organisation_id, ORGANISATION_ROLES.MEMBER - 1) >= ORGANISATION_ROLES.MEMBER \
+            or (has_world_access and live_entity.world_access == WORLD_ACCESS_PERMISSIONS.VIEW)
+
+        if not has_access:
+            continue
+
+        related_brands = live_entity.brands
+        if brand is None or (related_brands and brand.id in related_brands):
+            visible.add(historical_entity.history_id)
+
+    return visible
+
 def get_accessible_detail_entity(request, entity_id, entity_history_id=None):
     """
       Gets the parent entity from a given `id`, returning both (a) the entity
@@ -2095,7 +2264,7 @@ def allowed_to_edit(request, set_class, set_id, user=None):
         user will be read from request.user unless given directly via param: user
     """
 
-    if settings.CLL_READ_ONLY:
+    if is_read_only(request):
         return False
 
     user = user if user else (request.user if request else None)
@@ -1,15 +1,23 @@
 from operator import and_
 from functools import reduce
 from django.apps import apps
-from django.db import connection
-from django.db.models import Q
-from django.db.models.functions import Lower
+from django.urls import reverse
+from contextlib import contextmanager
+from django.db import connection, transaction
+from django.db.models import Q, F, BigIntegerField
+from django.db.models.functions import Lower, Coalesce
 from django.db.models.expressions import Subquery
 from django.db.models.query import QuerySet
+from django.core.cache import cache
 from django.core.paginator import EmptyPage, Paginator
 from django.contrib.postgres.search import TrigramSimilarity, SearchQuery, SearchRank, SearchVector
 
 import re
+import json
+import uuid
+import base64
+import hashlib
+import logging
 
 from ..models.EntityClass import EntityClass
 from ..models.Template import Template
@@ -17,6 +25,10 @@ from ..models.GenericEntity import GenericEntity
 from ..models.Statistics import Statistics
 from ..models.CodingSystem import CodingSystem
 from . import model_utils, template_utils, constants, gen_utils, permission_utils, concept_utils
+from ..routers import get_read_connection
+
+
+logger = logging.getLogger(__name__)
 
 def get_template_filters(request, template, default=None):
     """
@@ -413,7 +425,7 @@ def exclude_childless_entities(entities, template_fields, child_fields):
         return entities
 
     history_ids = list(entities.values_list('history_id', flat=True))
-    with connection.cursor() as cursor:
+    with get_read_connection().cursor() as cursor:
         base = '''
         with entities as (
             select *
@@ -437,11 +449,12 @@ def exclude_childless_entities(entities, template_fields, child_fields):
                 sql = base + '''
                 select entity.id,
                        entity.history_id
-                  from entities as entity,
-                       json_array_elements(entity.template_data::json->'concept_information') as concepts
+                  from entities as entity
+                  join public.clinicalcode_entityconceptlink as link
+                    on link.entity_history_id = entity.history_id
                   join public.clinicalcode_historicalconcept as concept
-                    on concept.id = cast(concepts->>'concept_id' as integer)
-                   and concept.history_id = cast(concepts->>'concept_version_id' as integer)
+                    on concept.id = link.concept_id
+                   and concept.history_id = link.concept_version_id
                   join public.clinicalcode_codingsystem as codingsystem
                     on codingsystem.id = concept.coding_system_id
                   join public.clinicalcode_historicalcomponent as component
@@ -513,14 +526,14 @@ def try_search_child_concepts(entities, search=None, order_clause=None):
 
     """
     results = None
-    with connection.cursor() as cursor:
+    with get_read_connection().cursor() as cursor:
         sql = ''
         if not gen_utils.is_empty_string(search):
             sql = '''
             with
                 entities as (
                     select *,
-                        cast(regexp_replace(id, '[a-zA-Z]+', '') as integer) as true_id,
+                        coalesce(hge.entity_number, 0) as true_id,
                         ts_rank_cd(
                             hge.search_vector,
                             to_tsquery('pg_catalog.english', replace(to_tsquery('pg_catalog.english', concat(regexp_replace(trim(%(searchterm)s), '\W+', ':* & ', 'gm'), ':*'))::text, '<->', '|'))
@@ -540,7 +553,7 @@ def try_search_child_concepts(entities, search=None, order_clause=None):
             with
                 entities as (
                     select *,
-                           cast(regexp_replace(id, '[a-zA-Z]+', '') as integer) as true_id
+                           coalesce(entity_number, 0) as true_id
                       from public.clinicalcode_historicalgenericentity
                      where id = ANY(%(entity_ids)s)
                        and history_id = ANY(%(history_ids)s)
@@ -561,11 +574,12 @@ def try_search_child_concepts(entities, search=None, order_clause=None):
                        'C' as prefix,
                        'concept' as type,
                        'concept_information' as field
-                  from entities as entity,
-                       json_array_elements(entity.template_data::json->'concept_information') as concepts
+                  from entities as entity
+                  join public.clinicalcode_entityconceptlink as link
+                    on link.entity_history_id = entity.history_id
                   join public.clinicalcode_historicalconcept as concept
-                    on concept.id = cast(concepts->>'concept_id' as integer)
-                   and concept.history_id = cast(concepts->>'concept_version_id' as integer)
+                    on concept.id = link.concept_id
+                   and concept.history_id = link.concept_version_id
                   join public.clinicalcode_codingsystem as codingsystem
                     on codingsystem.id = concept.coding_system_id
             )
@@ -803,7 +817,8 @@ def reorder_search_results(search_results, order=None, searchterm=''):
     return GenericEntity.history.filter(
             history_id__in=Subquery(search_results.values('history_id'))
         ) \
-        .extra(select={'true_id': """cast(regexp_replace(id, '[a-zA-Z]+', '') as integer)"""}, order_by=['true_id']) \
+        .annotate(true_id=Coalesce(F('entity_number'), 0, output_field=BigIntegerField())) \
+        .order_by('true_id', 'id')
 
 def get_renderable_entities(request, entity_types=None, method='GET', force_term=True):
     """
@@ -941,6 +956,312 @@ def try_get_paginated_results(request, entities, page=None, page_size=None):
         page_obj = pagination.page(pagination.num_pages)
     return page_obj
 
+def get_hydration_source(layout, field):
+    """
+        Describes how the values of an entity's field are resolved when rendering search results
+
+        Args:
+            layout (dict): the entity's layout, as produced by `get_renderable_entities()`
+            field   (str): the name of the field
+
+        Returns:
+            A (dict) describing the field's `kind`, _i.e._ one of `options`, `source` or `fallback`, and its assoc. lookup details;
+            or a `None` value if the field isn't renderable
+    """
+    info = template_utils.get_template_field_info(layout, field)
+    is_metadata = bool(info.get('is_metadata'))
+    struct = info.get('field') if is_metadata else template_utils.get_layout_field(layout, field)
+
+    validation = template_utils.try_get_content(struct, 'validation') if isinstance(struct, dict) else None
+    if not isinstance(validation, dict):
+        return None
+
+    field_type = validation.get('type')
+    if field_type not in ('enum', 'int', 'int_array'):
+        return { 'kind': 'fallback', 'is_metadata': is_metadata, 'info': info }
+
+    options = validation.get('options')
+    source = validation.get('source')
+    if field_type == 'int_array':
+        use_options = not source and isinstance(options, dict)
+    else:
+        use_options = isinstance(options, dict) and not validation.get('ugc', False)
+
+    if use_options:
+        return { 'kind': 'options', 'options': options }
+
+    if not isinstance(source, dict) or not isinstance(source.get('table'), str) or 'trees' in source:
+        return { 'kind': 'fallback', 'is_metadata': is_metadata, 'info': info }
+
+    try:
+        model = apps.get_model(app_label='clinicalcode', model_name=source.get('table'))
+    except LookupError:
+        return None
+
+    column = source.get('query', 'id' if is_metadata else 'pk')
+    relative = source.get('relative', 'name' if is_metadata else None)
+    include = tuple(source.get('include') or []) if not is_metadata else tuple()
+
+    # Only metadata fields apply their static source filters, _i.e._ those that don't depend on the request context
+    filters = []
+    if is_metadata and isinstance(source.get('filter'), dict):
+        filters = template_utils.try_get_filter_query(field, source.get('filter'), request=None)
+
+    return {
+        'kind': 'source',
+        'key': (model._meta.label, column, relative, include, field if len(filters) > 0 else None),
+        'model': model,
+        'column': column,
+        'relative': relative,
+        'include': include,
+        'filters': filters,
+    }
+
+def hydrate_search_results(entities, layouts, fields=None):
+    """
+        Resolves the renderable values of each search result's fields in bulk, _i.e._ one query per sourced model
+        across the whole page rather than one query per field per result
+
+        Args:
+            entities (Iterable[HistoricalGenericEntity]): the page of renderable entities
+            layouts                             (dict): the layouts of the entities, as produced by `get_renderable_entities()`
+            fields                         (list|None): optionally specify the fields to resolve; defaults to `constants.SEARCH_HYDRATED_FIELDS`
+
+        Returns:
+            A (dict) mapping each entity's `history_id` to a (dict) of its resolved field values, _e.g._ `{ 'tags': [{ 'name': 'Tag', 'value': 1 }] }`
+    """
+    fields = fields if isinstance(fields, (list, tuple)) else constants.SEARCH_HYDRATED_FIELDS
+
+    sources = { }
+    lookups = { }
+    targets = [ ]
+    for entity in entities:
+        layout_key = f'{entity.template_id}/{entity.template_version}'
+        layout = template_utils.try_get_content(layouts, layout_key)
+        if not template_utils.is_layout_safe(layout):
+            continue
+
+        for field in fields:
+            source_key = (layout_key, field)
+            if source_key not in sources:
+                sources[source_key] = get_hydration_source(layout, field)
+
+            source = sources.get(source_key)
+            if source is None:
+                continue
+
+            data = template_utils.get_entity_field(entity, field)
+            if source.get('kind') == 'source':
+                if isinstance(data, source.get('model')):
+                    data = getattr(data, source.get('column'), None)
+
+                data = [x for x in (data if isinstance(data, list) else [data]) if x is not None]
+
+                lookup = lookups.setdefault(source.get('key'), { 'source': source, 'values': set() })
+                lookup.get('values').update(data)
+
+            targets.append((entity, layout, field, source, data))
+
+    # Resolve each sourced model's values in one query
+    resolved = { }
+    for key, lookup in lookups.items():
+        source = lookup.get('source')
+        values = template_utils.coerce_source_values(source.get('model'), source.get('column'), lookup.get('values'))
+        if len(values) < 1:
+            continue
+
+        column = source.get('column')
+        query = [Q(**{ f'{column}__in': values }), *source.get('filters')]
+        try:
+            records = { }
+            for instance in source.get('model').objects.filter(reduce(and_, query)):
+                packet = { 'name': template_utils.try_get_instance_field(instance, source.get('relative')) }
+                for included_field in source.get('include'):
+                    value = template_utils.try_get_instance_field(instance, included_field)
+                    if value is not None:
+                        packet[included_field] = value
+
+                records[str(template_utils.try_get_instance_field(instance, column))] = packet
+            resolved[key] = records
+        except Exception as e:
+            logger.warning(f'Failed to hydrate search results from "{key[0]}" with err:\n\n{e}')
+
+    results = { }
+    for entity, layout, field, source, data in targets:
+        output = results.setdefault(entity.history_id, { })
+
+        kind = source.get('kind')
+        if kind == 'options':
+            options = source.get('options')
+            data = data if isinstance(data, list) else [data]
+            output[field] = [
+                { 'name': options.get(str(x)), 'value': x }
+                for x in data
+                if x is not None and isinstance(options.get(str(x)), str)
+            ]
+        elif kind == 'source':
+            records = resolved.get(source.get('key'), { })
+            output[field] = [
+                { 'value': x } | records.get(str(x))
+                for x in data
+                if str(x) in records
+            ]
+        elif source.get('is_metadata'):
+            output[field] = template_utils.get_metadata_value_from_source(entity, field, field_info=source.get('info'), layout=layout, default=[])
+        else:
+            output[field] = template_utils.get_template_data_values(entity, layout, field, default=[])
+
+    return results
+
+def serialise_search_results(page_obj, layouts, hydrated=None):
+    """
+        Serialises a page of search results into compact rows for client-side rendering
+
+        Args:
+            page_obj      (Page): the page of renderable entities, as produced by `try_get_paginated_results()`
+            layouts       (dict): the layouts of the entities, as produced by `get_renderable_entities()`
+            hydrated (dict|None): optionally specify the results of `hydrate_search_results()`
+
+        Returns:
+            A (dict) describing the page's `results` and its `pagination` details
+    """
+    entities = page_obj.object_list
+    if hydrated is None:
+        hydrated = hydrate_search_results(entities, layouts)
+
+    results = []
+    for entity in entities:
+        layout = template_utils.try_get_content(layouts, f'{entity.template_id}/{entity.template_version}')
+        if not template_utils.is_layout_safe(layout):
+            continue
+
+        card = template_utils.try_get_content(layout['definition'].get('template_details'), 'card_type', constants.DEFAULT_CARD)
+        template_data = entity.template_data if isinstance(entity.template_data, dict) else { }
+
+        results.append({
+            'id': entity.id,
+            'history_id': entity.history_id,
+            'name': entity.name,
+            'author': entity.author,
+            'publish_status': entity.publish_status,
+            'project_name': template_data.get('project_name'),
+            'updated': entity.created.strftime('%Y-%m-%d') if entity.created else None,
+            'url': reverse('entity_history_detail', kwargs={ 'pk': entity.id, 'history_id': entity.history_id }),
+            'card': card,
+            'layout': layout.get('id'),
+            'fields': hydrated.get(entity.history_id, { }),
+        })
+
+    paginator = page_obj.paginator
+    return {
+        'results': results,
+        'pagination': {
+            'page': page_obj.number,
+            'page_size': paginator.per_page,
+            'num_pages': paginator.num_pages,
+            'count': paginator.count,
+            'has_next': page_obj.has_next(),
+            'has_previous': page_obj.has_previous(),
+        },
+    }
+
+def encode_pagination_cursor(values):
+    """
+        Encodes the keyset values of the last row of a page as an opaque, URL-safe pagination cursor
+
+        Args:
+            values (list|tuple): the ordered keyset values, _e.g._ `[true_id, id]`
+
+        Returns:
+            A (str) cursor
+    """
+    data = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('utf-8').rstrip('=')
+
+def decode_pagination_cursor(cursor, size=None, default=None):
+    """
+        Attempts to decode a pagination cursor produced by `encode_pagination_cursor()`
+
+        Args:
+            cursor     (str): the opaque cursor
+            size  (int|None): optionally specify the expected number of keyset values; defaults to `None`
+            default  (Any): optionally specify the return value if the cursor is malformed; defaults to `None`
+
+        Returns:
+            A (list) of the keyset values if valid, otherwise returns the specified `default` value
+    """
+    if not isinstance(cursor, str) or gen_utils.is_empty_string(cursor):
+        return default
+
+    try:
+        cursor = cursor.strip()
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(data.decode('utf-8'))
+    except Exception:
+        return default
+
+    if not isinstance(data, list) or (isinstance(size, int) and len(data) != size):
+        return default
+    return data
+
+def try_get_query_count(sql, params=None, cache_age=300, default=None):
+    """
+        Counts the rows of a raw SQL query, caching the result by the query and its parameters
+
+        [!] Note: The count is an estimate within the `cache_age` window, it should only be used
+                  to describe the size of paginated resultsets
+
+        Args:
+            sql        (str): the raw SQL query to count
+            params    (dict): optionally specify the query parameters; defaults to `None`
+            cache_age  (int): optionally specify the max age, in seconds, of the cached count; defaults to `300`
+            default    (Any): optionally specify the return value if the query fails; defaults to `None`
+
+        Returns:
+            An (int) describing the number of rows, otherwise returns the specified `default` value
+    """
+    cache_key = hashlib.md5(repr([sql, sorted((params or {}).items())]).encode('utf-8'), usedforsecurity=False).hexdigest()
+    cache_key = f'rs__query_count__{cache_key}'
+
+    count = cache.get(cache_key) if cache_age > 0 else None
+    if isinstance(count, int):
+        return count
+
+    try:
+        with get_read_connection().cursor() as cursor:
+            cursor.execute(f'select count(*) from ({sql}) as counted', params=params)
+            count = cursor.fetchone()[0]
+    except Exception as e:
+        logger.warning(f'Failed to count query with err:\n\n{str(e)}')
+        return default
+
+    if cache_age > 0:
+        cache.set(cache_key, count, cache_age)
+    return count
+
+def iterate_query_chunks(sql, params=None, chunk_size=100):
+    """
+        Iterates over the rows of a raw SQL query through a server-side cursor, such that the
+        resultset is never materialised in its entirety
+
+        [!] Note: Falls back to a client-side cursor if `DISABLE_SERVER_SIDE_CURSORS` is set
+
+        Args:
+            sql          (str): the raw SQL query to iterate
+            params      (dict): optionally specify the query parameters; defaults to `None`
+            chunk_size   (int): optionally specify the number of rows fetched per chunk; defaults to `100`
+
+        Returns:
+            A (Generator) yielding each chunk as a list of row tuples
+    """
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(sql, params=params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
 def get_source_references(struct, default=None, modifier=None, request=None):
     """
         Retrieves the refence values from source fields e.g. tags, collections, entity type
@@ -1033,6 +1354,170 @@ def try_get_template_statistics(field, brand='ALL', published=False, entity_type
 
     return template_utils.try_get_content(stats, field)
 
+def get_filter_panel_version():
+    """
+        Retrieves the version token of the rendered search filter panels, initialising it if absent
+
+        Returns:
+            The current (str) version token, or a `None` value if the cache is unavailable
+    """
+    try:
+        version = cache.get(constants.FILTER_PANEL_CACHE_VERSION_KEY)
+        if version is None:
+            cache.add(constants.FILTER_PANEL_CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(constants.FILTER_PANEL_CACHE_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f'Failed to retrieve filter panel version with err:\n\n{str(e)}')
+        return None
+
+    return version
+
+def invalidate_filter_panels(*args, **kwargs):
+    """
+        Invalidates every rendered search filter panel by rotating their version token; the
+        stale panels are left to expire
+
+        [!] Note: Accepts & ignores signal arguments such that it can be used as a signal receiver
+    """
+    try:
+        cache.set(constants.FILTER_PANEL_CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.warning(f'Failed to invalidate filter panels with err:\n\n{str(e)}')
+
+def get_filter_panel_cache_key(brand, entity_type, layouts):
+    """
+        Computes the cache key of a rendered search filter panel
+
+        Args:
+            brand            (str): the name of the request's brand, or `ALL`
+            entity_type (list|None): the entity class ids of the search page, as derived by `try_derive_entity_type()`
+            layouts          (dict): the layouts of the search page, as produced by `get_renderable_entities()`
+
+        Returns:
+            The (str) cache key, or a `None` value if the panel shouldn't be cached
+    """
+    version = get_filter_panel_version()
+    if version is None:
+        return None
+
+    templates = sorted(
+        f'{x.get("id")}/{x.get("version")}'
+        for x in layouts.values()
+        if isinstance(x, dict) and 'id' in x
+    )
+
+    entity_type = ','.join(str(x) for x in entity_type) if isinstance(entity_type, list) else 'all'
+    digest = hashlib.md5(repr([entity_type, templates]).encode('utf-8'), usedforsecurity=False).hexdigest()
+    return f'search_filters__{version}__{brand}__{digest}'
+
+def validate_codelist_pattern(pattern):
+    """
+        Determines whether a regex pattern is safe to be evaluated by Postgres' `~` operator,
+        pathological patterns are refused before they are executed, _i.e._ those that:
+
+            1. Exceed `CODE_SEARCH_PATTERN_MAX_LENGTH` characters;
+            2. Cannot be compiled;
+            3. Contain backreferences or nested quantifiers, _e.g._ `(a+)+`;
+            4. Would match every code, _i.e._ those matching the empty string, _e.g._ `.*`, or every code
+               of `CODE_SEARCH_PATTERN_PROBES`, _e.g._ `\w+`.
+
+        Args:
+            pattern (str): The regex pattern
+
+        Returns:
+            A tuple in which the first element is a (bool) describing whether the pattern is valid,
+            and the second element is a (str) describing why the pattern was refused, if applicable
+    """
+    if not isinstance(pattern, str) or gen_utils.is_empty_string(pattern):
+        return False, 'Invalid pattern, expected a non-empty pattern'
+
+    if len(pattern) > constants.CODE_SEARCH_PATTERN_MAX_LENGTH:
+        return False, f'Invalid pattern, patterns cannot exceed {constants.CODE_SEARCH_PATTERN_MAX_LENGTH} characters'
+
+    try:
+        compiled = re.compile(pattern)
+    except re.error:
+        return False, 'Invalid pattern, failed to compile pattern'
+
+    if re.search(r'\\[1-9]', pattern):
+        return False, 'Invalid pattern, backreferences are not supported'
+
+    if re.search(r'\((?:[^()\\]|\\.)*(?:[*+]|\{\d*,?\d*\})(?:[^()\\]|\\.)*\)(?:[*+]|\{\d*,?\d*\})', pattern):
+        return False, 'Invalid pattern, nested quantifiers are not supported'
+
+    if compiled.search('') or all(compiled.search(x) for x in constants.CODE_SEARCH_PATTERN_PROBES):
+        return False, 'Invalid pattern, patterns cannot match every code'
+
+    return True, None
+
+def paginate_codelist(coding_system, codes, page_size=None, offset=0, cursor=None):
+    """
+        Paginates the codes resolved by `search_codelist()`, either by (a) their offset or (b) a keyset
+        cursor describing the last code of the previous page
+
+        Args:
+            coding_system (obj): The coding system of interest
+            codes (QuerySet): The codes resolved by `search_codelist()`
+            page_size (int): Optionally specify the page size; defaults to `CODE_SEARCH_PAGE_SIZE`
+            offset (int): Optionally specify the page offset; defaults to `0`
+            cursor (str): Optionally specify the cursor, produced by a previous page, after which the page starts; defaults to `None`
+
+        Returns:
+            A tuple containing (a) the list of codes within the page, and (b) the (str|None) cursor of the next page
+    """
+    page_size = page_size if isinstance(page_size, int) and page_size > 0 else constants.CODE_SEARCH_PAGE_SIZE
+    page_size = min(page_size, constants.CODE_SEARCH_MAX_PAGE_SIZE)
+
+    code_column = coding_system.code_column_name.lower()
+    cursor = decode_pagination_cursor(cursor, size=1)
+    if cursor is not None:
+        codes = codes.filter(**{ f'{code_column}__gt': cursor[0] })
+        offset = 0
+
+    offset = max(offset, 0) if isinstance(offset, int) else 0
+    results = list(codes.values('id', 'code', 'description')[offset:offset + page_size + 1])
+
+    next_cursor = None
+    if len(results) > page_size:
+        results = results[:page_size]
+        next_cursor = encode_pagination_cursor([results[-1].get('code')])
+
+    return results, next_cursor
+
+def count_codelist(codes, limit=None):
+    """
+        Counts the codes resolved by `search_codelist()`, bounded by the given limit such that
+        large resultsets do not require a full scan
+
+        Args:
+            codes (QuerySet): The codes resolved by `search_codelist()`
+            limit (int): Optionally specify the max. number of codes to count; defaults to `CODE_SEARCH_COUNT_LIMIT`
+
+        Returns:
+            A tuple containing (a) the (int) count and (b) a (bool) describing whether the count is exact
+    """
+    limit = limit if isinstance(limit, int) and limit > 0 else constants.CODE_SEARCH_COUNT_LIMIT
+    count = codes.values('id')[:limit + 1].count()
+    return min(count, limit), count <= limit
+
+@contextmanager
+def codelist_search_timeout(timeout=None):
+    """
+        Context manager applying a statement timeout to each query evaluated within it,
+        used to bound the duration of code searches
+
+        Args:
+            timeout (int): Optionally specify the statement timeout in milliseconds; defaults to `CODE_SEARCH_TIMEOUT`
+
+        Raises:
+            OperationalError: if a query exceeds the statement timeout
+    """
+    timeout = timeout if isinstance(timeout, int) and timeout > 0 else constants.CODE_SEARCH_TIMEOUT
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('set local statement_timeout = %s;', [timeout])
+        yield
+
 def search_codelist_by_pattern(coding_system, pattern, use_desc=False, case_sensitive=True):
     """
         Tries to match a coding system's codes by a valid regex pattern
@@ -1050,14 +1535,7 @@ def search_codelist_by_pattern(coding_system, pattern, use_desc=False, case_sens
         return None
     
     # Validate the pattern before allowing it to be used in search
-    valid_pattern = False
-    try:
-        re.compile(pattern)
-    except re.error:
-        valid_pattern = False
-    else:
-        valid_pattern = True
-    
+    valid_pattern, _ = validate_codelist_pattern(pattern)
     if not valid_pattern:
         return None
 
@@ -1160,6 +1638,34 @@ def search_codelist_by_term(coding_system, search_term, use_desc=True):
     codes = codes.order_by(code_column, '-similarity').distinct(code_column)
     return codes
 
+def get_codelist_search_pattern(search_term, use_wildcard=False, allow_wildcard=True):
+    """
+        Resolves the regex pattern of a code search, if applicable
+
+        Args:
+            search_term (str): The search term used to query the table
+
+            use_wildcard (boolean): Whether to search by wildcard
+
+            allow_wildcard (boolean): Whether to check for, and apply, regex patterns
+                                    through the 'wildcard:' prefix
+
+        Returns:
+            The (str) pattern if this search is a pattern search, otherwise returns `None`
+    """
+    if not allow_wildcard or not isinstance(search_term, str):
+        return None
+
+    has_wildcard_prefix = search_term.lower().startswith('wildcard:')
+    if not use_wildcard and not has_wildcard_prefix:
+        return None
+
+    matches = search_term
+    if has_wildcard_prefix:
+        matches = re.search('^wildcard:(.*)', matches, flags=re.IGNORECASE | re.DOTALL)
+        matches = matches.group(1).lstrip()
+    return matches
+
 def search_codelist(coding_system, search_term, use_desc=False,
                     use_wildcard=False, case_sensitive=True, allow_wildcard=True):
     """
@@ -1187,13 +1693,8 @@ def search_codelist(coding_system, search_term, use_desc=False,
     if not isinstance(coding_system, CodingSystem) or not isinstance(search_term, str):
         return None
     
-    has_wildcard_prefix = search_term.lower().startswith('wildcard:')
-    is_wildcard = use_wildcard or has_wildcard_prefix
-    if allow_wildcard and is_wildcard:
-        matches = search_term
-        if has_wildcard_prefix:
-            matches = re.search('^wildcard:(.*)', matches)
-            matches = matches.group(1).lstrip()
+    matches = get_codelist_search_pattern(search_term, use_wildcard=use_wildcard, allow_wildcard=allow_wildcard)
+    if matches is not None:
         return search_codelist_by_pattern(coding_system, matches, use_desc, case_sensitive)
     
     return search_codelist_by_term(coding_system, search_term, use_desc)
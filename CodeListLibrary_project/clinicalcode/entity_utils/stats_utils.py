@@ -1,12 +1,11 @@
 from django.db import connection
-from django.db.models import Q
 from functools import cmp_to_key
 
 import datetime
 import json
 
 from ..models import GenericEntity, Template, Statistics, Brand, CodingSystem, DataSource, PublishedGenericEntity, Tag
-from . import template_utils, constants, model_utils, entity_db_utils, concept_utils
+from . import template_utils, constants, model_utils, entity_db_utils, concept_utils, search_utils
 
 class MockStatsUser:
     """
@@ -89,116 +88,213 @@ def try_get_cached_data(cache, _entity, template, field, field_value, validation
 
     return cache[cache_key]
 
-def build_statistics(statistics, entity, field, struct, data_cache=None, template_entity=None, brand=None):
-    if struct is None:
-        return
-    
-    if 'search' not in struct:
-        return
+def get_statistics_fields(layout):
+    """
+        Resolves the filterable fields of a template whose values are counted by the statistics,
+        _i.e._ `enum` fields and non-tree `int_array` fields with a source
 
-    if 'filterable' not in struct.get('search'):
-        return
-    
-    validation = template_utils.try_get_content(struct, 'validation')
-    if validation is None:
-        return
-    
-    field_type = template_utils.try_get_content(validation, 'type')
-    if field_type is None:
-        return
-    
-    entity_field = template_utils.get_entity_field(entity, field)
-    if entity_field is None:
-        return
-
-    stats = statistics[field] if field in statistics else { }
-    if field_type == 'enum':
-        value = try_get_cached_data(data_cache, entity, template_entity, field, entity_field, validation, struct, brand=brand)
-        
-        if value is not None:
-            if entity_field not in stats:
-                stats[entity_field] = {
-                    'value': value,
-                    'count': 0
-                }
-            
-            stats[entity_field]['count'] += 1
-    elif field_type == 'int_array':
-        src_field = validation.get('source')
-        if isinstance(src_field, dict) and not src_field.get('trees'):
-            for item in entity_field:
-                value = try_get_cached_data(data_cache, entity, template_entity, field, item, validation, struct, brand=brand)
-                if value is None:
-                    continue
-                if item not in stats:
-                    stats[item] = {
-                        'value': value,
-                        'count': 0
-                    }
-                
-                stats[item]['count'] += 1
-    else:
-        return
-    
-    statistics[field] = stats
+        Args:
+            layout (dict): the template's merged definition
 
-def compute_statistics(statistics, entity, data_cache=None, template_cache=None, brand=None):
-    if not template_utils.is_data_safe(entity):
-        return
-    
-    template_id = entity.template.id if entity.template is not None else None
-    template_version = entity.template_version
-    if template_id is None or template_version is None:
-        return
-
-    template = None
-    layout = None
-    if isinstance(template_cache, dict):
-        cached = template_cache.get(f'{template_id}/{template_version}')
-        if cached is not None:
-            template = cached.get('template')
-            layout = cached.get('layout')
-    
-    if template is None or layout is None:
+        Returns:
+            A (dict) describing the `struct` & `validation` of each counted field, keyed by its name
+    """
+    fields = { }
+    for field, struct in layout.get('fields', { }).items():
+        if not isinstance(struct, dict) or 'filterable' not in struct.get('search', { }):
+            continue
+
+        validation = template_utils.try_get_content(struct, 'validation')
+        field_type = template_utils.try_get_content(validation, 'type') if validation is not None else None
+        if field_type == 'int_array':
+            src_field = validation.get('source')
+            if not isinstance(src_field, dict) or src_field.get('trees'):
+                continue
+        elif field_type != 'enum':
+            continue
+
+        fields[field] = { 'struct': struct, 'validation': validation }
+
+    return fields
+
+def get_statistics_templates():
+    """
+        Resolves the counted fields of each template version used by an entity
+
+        Returns:
+            A (dict) describing the historical `template` and its counted `fields`, keyed by its `(id, version)` pair
+    """
+    templates = { }
+    versions = GenericEntity.objects \
+        .exclude(template__isnull=True) \
+        .exclude(template_version__isnull=True) \
+        .values_list('template_id', 'template_version') \
+        .distinct()
+
+    for template_id, template_version in versions:
         template = Template.history.filter(
-            id=entity.template.id,
-            template_version=entity.template_version
+            id=template_id,
+            template_version=template_version
         ) \
         .latest_of_each() \
         .distinct()
 
-        if not template.exists():
-            return
-        
         template = template.first()
-        layout = template_utils.get_merged_definition(template)
+        layout = template_utils.get_merged_definition(template) if template is not None else None
         if not layout:
-            return
-        
-        if isinstance(template_cache, dict):
-            template_cache[f'{template_id}/{template_version}'] = { 'template': template, 'layout': layout }
-
-    for field, struct in layout.get('fields').items():
-        if not isinstance(struct, dict):
             continue
 
-        build_statistics(statistics['all'], entity, field, struct, data_cache=data_cache, template_entity=template, brand=brand)
+        fields = get_statistics_fields(layout)
+        if len(fields) > 0:
+            templates[(template_id, template_version)] = { 'template': template, 'fields': fields }
+
+    return templates
+
+def count_statistics_values(templates, brands):
+    """
+        Counts the entities associated with each value of the counted fields in a single grouped pass,
+        _i.e._ by unnesting the array/enum value of each field for both the Brand-scoped and unscoped sets
+
+        [!] Note: An entity is associated with a Brand if either its `brands` or `collections` overlap with the Brand
+
+        Args:
+            templates (dict): the counted fields of each template version, see `get_statistics_templates()`
+            brands    (list): the Brand instances to count
+
+        Returns:
+            A (list) of (brand_id, template_id, template_version, field, value, all_count, published_count) tuples, where `brand_id` is `None` for the unscoped set
+    """
+    specs = [
+        { 'template_id': template_id, 'template_version': template_version, 'field': field }
+        for (template_id, template_version), packet in templates.items()
+            for field in packet.get('fields').keys()
+    ]
+    if len(specs) < 1:
+        return [ ]
+
+    contexts = [{ 'brand_id': None, 'collection_ids': [] }] + [
+        { 'brand_id': brand.id, 'collection_ids': model_utils.get_brand_collection_ids(brand) }
+        for brand in brands
+    ]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            '''
+            with
+                specs as (
+                    select *
+                      from jsonb_to_recordset(%(specs)s::jsonb) as t(template_id int, template_version int, field text)
+                ),
+                contexts as (
+                    select *
+                      from jsonb_to_recordset(%(contexts)s::jsonb) as t(brand_id int, collection_ids int[])
+                ),
+                entities as (
+                    select ge.template_id,
+                           ge.template_version,
+                           ge.publish_status,
+                           ge.brands,
+                           ge.collections,
+                           to_jsonb(ge) - 'template_data' - 'search_vector' as cols,
+                           ge.template_data::jsonb as data
+                      from public.clinicalcode_genericentity as ge
+                     where ge.template_data is not null
+                       and jsonb_typeof(ge.template_data::jsonb) = 'object'
+                ),
+                field_values as (
+                    select ent.publish_status,
+                           ent.brands,
+                           ent.collections,
+                           spec.template_id,
+                           spec.template_version,
+                           spec.field,
+                           elem.value
+                      from entities as ent
+                      join specs as spec
+                        on spec.template_id = ent.template_id
+                       and spec.template_version = ent.template_version
+                     cross join lateral (
+                        select coalesce(nullif(ent.cols -> spec.field, 'null'::jsonb), ent.data -> spec.field) as raw
+                     ) as src
+                     cross join lateral jsonb_array_elements(
+                        case
+                            when jsonb_typeof(src.raw) = 'array' then src.raw
+                            else jsonb_build_array(src.raw)
+                        end
+                     ) as elem(value)
+                     where src.raw is not null
+                       and jsonb_typeof(elem.value) <> 'null'
+                )
+            select ctx.brand_id,
+                   val.template_id,
+                   val.template_version,
+                   val.field,
+                   val.value,
+                   count(*) as all_count,
+                   count(*) filter (where val.publish_status = %(approved)s) as published_count
+              from field_values as val
+              join contexts as ctx
+                on ctx.brand_id is null
+                or val.brands && array[ctx.brand_id]
+                or val.collections && ctx.collection_ids
+             group by ctx.brand_id, val.template_id, val.template_version, val.field, val.value;
+            ''',
+            {
+                'specs': json.dumps(specs),
+                'contexts': json.dumps(contexts),
+                'approved': constants.APPROVAL_STATUS.APPROVED.value,
+            }
+        )
 
-        if entity.publish_status == constants.APPROVAL_STATUS.APPROVED:
-            build_statistics(statistics['published'], entity, field, struct, data_cache=data_cache, template_entity=template, brand=brand)
+        return cursor.fetchall()
 
-def collate_statistics(entities, data_cache=None, template_cache=None, brand=None):
+def collate_statistics(counts, templates, data_cache=None, brand=None):
+    """
+        Collates the counted values of the given Brand, or the unscoped set if not specified, into its statistics
+
+        Args:
+            counts     (list): the value counts, see `count_statistics_values()`
+            templates  (dict): the counted fields of each template version, see `get_statistics_templates()`
+            data_cache (dict): optionally specify the cache of resolved values
+            brand     (Brand): optionally specify the Brand
+
+        Returns:
+            A (dict) describing the `published` & `all` statistics
+    """
     statistics = {
         'published': { },
         'all': { },
     }
 
-    if brand is not None:
-        collection_ids = model_utils.get_brand_collection_ids(brand.name)
-        entities = entities.filter(Q(brands__overlap=[brand.id]) | Q(collections__overlap=collection_ids))
+    brand_id = brand.id if brand is not None else None
+    for row_brand, template_id, template_version, field, value, all_count, published_count in counts:
+        if row_brand != brand_id:
+            continue
 
-    for entity in entities:
-        compute_statistics(statistics, entity, data_cache, template_cache, brand)
+        packet = templates.get((template_id, template_version))
+        info = packet.get('fields').get(field) if packet is not None else None
+        if info is None:
+            continue
+
+        label = try_get_cached_data(
+            data_cache, None, packet.get('template'), field, value,
+            info.get('validation'), info.get('struct'), brand=brand
+        )
+        if label is None:
+            continue
+
+        for key, count in (('all', all_count), ('published', published_count)):
+            if count < 1:
+                continue
+
+            stats = statistics[key].setdefault(field, { })
+            if value not in stats:
+                stats[value] = {
+                    'value': label,
+                    'count': 0
+                }
+
+            stats[value]['count'] += count
 
     for field, all_data in statistics['all'].items():
         statistics['all'][field] = transform_counted_field(all_data)
@@ -211,35 +307,37 @@ def collate_statistics(entities, data_cache=None, template_cache=None, brand=Non
 
 def collect_statistics(request):
     """
-        Need to change this for several reasons:
-            1. We can utilise receivers and signals so we don't do this as a cronjob
-            2. Big O notation for this implementation is not great
+        Computes & stores the filter statistics of each Brand, and of all entities, from a single
+        grouped count of each template's filterable field values
+
+        [!] Note: Only the distinct values are resolved through their source, _i.e._ the cost no longer scales with Brands x Entities
     """
     user = request.user if request else None
     cache = { }
-    template_cache = { }
 
     to_update = [ ]
     to_create = [ ]
 
-    results = []
-    all_entities = GenericEntity.objects.all()
-    for brand in Brand.objects.all():
-        stats = collate_statistics(
-            all_entities,
-            data_cache=cache,
-            template_cache=template_cache,
-            brand=brand
-        )
+    brands = list(Brand.objects.all())
+    templates = get_statistics_templates()
+    counts = count_statistics_values(templates, brands)
 
-        obj = Statistics.objects.filter(
-            org=brand.name,
-            type='GenericEntity',
+    existing = {
+        obj.org: obj
+        for obj in Statistics.objects.filter(
+            org__in=[brand.name for brand in brands] + ['ALL'],
+            type='GenericEntity'
         )
+    }
+
+    results = []
+    for brand in brands + [None]:
+        org = brand.name if brand is not None else 'ALL'
+        stats = collate_statistics(counts, templates, data_cache=cache, brand=brand)
 
-        if obj.exists():
+        obj = existing.get(org)
+        if obj is not None:
             action = 'update'
-            obj = obj.first()
             obj.stat = stats
             obj.modified = datetime.datetime.now()
             obj.updated_by = user
@@ -247,50 +345,21 @@ def collect_statistics(request):
         else:
             action = 'create'
             obj = Statistics(
-                org=brand.name,
+                org=org,
                 type='GenericEntity',
                 stat=stats,
                 created_by=user
             )
             to_create.append(obj)
 
-        results.append({ 'brand': brand.name, 'value': stats, 'action': action })
-
-    stats = collate_statistics(
-        all_entities,
-        data_cache=cache,
-        template_cache=template_cache
-    )
-
-    obj = Statistics.objects.filter(
-        org='ALL',
-        type='GenericEntity',
-    )
-
-    if obj.exists():
-        action = 'update'
-        obj = obj.first()
-        obj.stat = stats
-        obj.modified = datetime.datetime.now()
-        obj.updated_by = user
-        to_update.append(obj)
-    else:
-        action = 'create'
-        obj = Statistics(
-            org='ALL',
-            type='GenericEntity',
-            stat=stats,
-            created_by=user
-        )
-        to_create.append(obj)
-
-    results.append({ 'brand': 'all', 'value': stats, 'action': action })
+        results.append({ 'brand': brand.name if brand is not None else 'all', 'value': stats, 'action': action })
 
     # Create / Update stat objs
     Statistics.objects.bulk_create(to_create)
     Statistics.objects.bulk_update(to_update, ['stat', 'updated_by', 'modified'])
 
     clear_statistics_history()
+    search_utils.invalidate_filter_panels()
     return results
 
 
@@ -848,6 +848,210 @@ def get_template_data_values(entity, layout, field, hide_user_details=False, req
     return default
 
 
+def coerce_source_values(model, column, values):
+    """
+        Attempts to coerce each of the given values into the type of a sourced model's column,
+        any value that cannot be coerced is ignored
+
+        Args:
+            model  (Model): the sourced model
+            column   (str): the name of the sourced column, e.g. `id` or `pk`
+            values  (list): the values to coerce
+
+        Returns:
+            (list): the coerced values
+    """
+    try:
+        field = model._meta.pk if column == 'pk' else model._meta.get_field(column)
+    except:
+        return []
+
+    output = []
+    for value in values:
+        try:
+            value = field.to_python(value)
+        except:
+            continue
+
+        if value is not None:
+            output.append(value)
+
+    return output
+
+
+def get_metadata_values_from_source(entities, field, default=None):
+    """
+        Batched variant of `get_metadata_value_from_source()`, resolves the sourced values
+        of a top-level metadata field for each of the given entities in a single query
+
+        Args:
+            entities (Dict[Any, Model]): the entities to resolve, keyed by some unique reference
+            field                 (str): the name of the metadata field
+            default               (Any): optionally specify the value of an entity without any sourced values; defaults to `None`
+
+        Returns:
+            (Dict[Any, Any]): the sourced value of each entity, keyed by the reference given by `entities`; or an empty dict if the field cannot be batched
+    """
+    try:
+        info = constants.metadata.get(field)
+        validation = info.get('validation') if isinstance(info, dict) else None
+        source_info = validation.get('source') if isinstance(validation, dict) else None
+        if not source_info:
+            return { key: default for key in entities.keys() }
+
+        model = apps.get_model(app_label='clinicalcode', model_name=source_info.get('table'))
+        column = source_info.get('query', 'id')
+        relative = source_info.get('relative', 'name')
+
+        lookup = {}
+        for key, entity in entities.items():
+            data = get_entity_field(entity, field)
+            if isinstance(data, model):
+                data = getattr(data, column)
+
+            data = data if isinstance(data, list) else [data]
+            lookup[key] = set(coerce_source_values(model, column, data))
+
+        values = set().union(*lookup.values())
+        if len(values) < 1:
+            return { key: default for key in entities.keys() }
+
+        query = [Q(**{ f'{column}__in': list(values) })]
+        if 'filter' in source_info:
+            filter_query = try_get_filter_query(field, source_info.get('filter'))
+            if isinstance(filter_query, list):
+                query = query + filter_query
+
+        instances = list(model.objects.filter(reduce(and_, query)))
+
+        output = {}
+        for key, data in lookup.items():
+            result = [
+                { 'name': getattr(instance, relative), 'value': getattr(instance, column) }
+                for instance in instances
+                if getattr(instance, column) in data
+            ]
+            output[key] = result if len(result) > 0 else default
+        return output
+    except Exception as e:
+        logger.warning(f'Failed to build batched metadata values of field "{field}" with err:\n\n{e}')
+    return { }
+
+
+def get_template_data_source_values(items, default=None):
+    """
+        Batched variant of `get_template_data_values()`, resolves the values of dynamic fields sourced
+        from another table or an ontology tree in a single query per source
+
+        Args:
+            items (Dict[Any, Tuple[Model, str, Dict[str, Any]]]): the (entity, field name, layout field) of each value to resolve, keyed by some unique reference
+            default                                        (Any): optionally specify the value of an unresolved enum field; defaults to `None`
+
+        Returns:
+            (Dict[Any, Any]): the value of each resolved item, keyed by the reference given by `items`; items that aren't sourced are omitted and should be resolved through `get_template_data_values()`
+    """
+    tables = {}
+    trees = {}
+    jobs = {}
+    for key, (entity, field, info) in items.items():
+        data = get_entity_field(entity, field)
+        validation = try_get_content(info, 'validation') if info else None
+        if not data or not isinstance(validation, dict):
+            continue
+
+        field_type = validation.get('type')
+        source_info = validation.get('source')
+        if not isinstance(source_info, dict):
+            continue
+
+        if field_type == 'enum' or field_type == 'int':
+            if 'options' in validation and not validation.get('ugc', False):
+                continue
+            data = [data]
+        elif field_type != 'int_array' or not isinstance(data, list):
+            continue
+
+        try:
+            tree_models = source_info.get('trees')
+            if isinstance(tree_models, list):
+                model_source = source_info.get('model')
+                if field_type != 'int_array' or not isinstance(model_source, str):
+                    continue
+
+                model = apps.get_model(app_label='clinicalcode', model_name=model_source)
+                if not hasattr(model, 'get_detailed_source_values'):
+                    continue
+
+                trees.setdefault((model, tuple(tree_models)), {}).update({ key: data })
+            elif isinstance(source_info.get('table'), str):
+                model = apps.get_model(app_label='clinicalcode', model_name=source_info.get('table'))
+                column = source_info.get('query', 'pk')
+
+                pairs = [(item, next(iter(coerce_source_values(model, column, [item])), None)) for item in data]
+                tables.setdefault((model, column), set()).update(value for _, value in pairs if value is not None)
+                jobs[key] = (field_type, model, column, source_info, pairs)
+        except Exception as e:
+            logger.warning(f'Failed to collect batched template data values of "{field}" with err:\n\n{e}')
+
+    output = {}
+    for (model, type_ids), values in trees.items():
+        try:
+            results = model.get_detailed_source_values(list(values.values()), list(type_ids), default=default)
+            for key, result in zip(values.keys(), results):
+                output[key] = result if isinstance(result, list) else default
+        except Exception as e:
+            logger.warning(f'Failed to derive batched template data values of "{model}" with err:\n\n{e}')
+
+    resolved = {}
+    for (model, column), values in tables.items():
+        try:
+            queryset = model.objects.filter(**{ f'{column}__in': list(values) })
+            if not queryset.ordered:
+                queryset = queryset.order_by('pk')
+
+            instances = {}
+            for instance in queryset:
+                instances.setdefault(getattr(instance, column), instance)
+            resolved[(model, column)] = instances
+        except Exception as e:
+            logger.warning(f'Failed to derive batched template data values of "{model}" with err:\n\n{e}')
+
+    for key, (field_type, model, column, source_info, pairs) in jobs.items():
+        instances = resolved.get((model, column))
+        if instances is None:
+            continue
+
+        relative = source_info.get('relative')
+        included_fields = source_info.get('include')
+
+        values = []
+        for item, value in pairs:
+            instance = instances.get(value) if value is not None else None
+            if instance is None:
+                continue
+
+            packet = {
+                'name': try_get_instance_field(instance, relative),
+                'value': item
+            }
+
+            if included_fields:
+                for included_field in included_fields:
+                    included_value = try_get_instance_field(instance, included_field)
+                    if included_value is None:
+                        continue
+                    packet[included_field] = included_value
+
+            values.append(packet)
+
+        if field_type == 'int_array':
+            output[key] = values
+        else:
+            output[key] = values if len(values) > 0 else default
+
+    return output
+
+
 def is_single_search_only(template, field):
     """
         Checks if the single_search_only attribute is present in a given template's field
@@ -0,0 +1,177 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+
+import hashlib
+
+from ...models.CodingSystem import CodingSystem
+
+"""
+    Describes the search indexes built for each code table, where `column` is one of either the
+    `code` or `desc` column of the coding system, i.e.
+        - `trgm`: GIN trigram index supporting `__regex`, `__iregex` & `TrigramSimilarity`
+        - `upper_trgm`: GIN trigram index supporting `__icontains`, i.e. `UPPER(col) LIKE UPPER(%s)`
+        - `prefix`: btree index supporting anchored patterns, e.g. `^C10.*`
+"""
+CODE_SEARCH_INDEXES = [
+    { 'name': 'trgm', 'columns': ['code', 'desc'], 'method': 'gin', 'expression': '{column}', 'opclass': 'gin_trgm_ops' },
+    { 'name': 'upper_trgm', 'columns': ['code', 'desc'], 'method': 'gin', 'expression': 'upper({column})', 'opclass': 'gin_trgm_ops' },
+    { 'name': 'prefix', 'columns': ['code'], 'method': 'btree', 'expression': '{column}', 'opclass': 'text_pattern_ops' },
+]
+
+class Command(BaseCommand):
+    help = 'Builds, or refreshes, the trigram & prefix search indexes of every coding system\'s code table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--coding-system',
+            type=str,
+            action='append',
+            dest='coding_systems',
+            default=None,
+            help='Optionally specify the CodingSystem pk(s) or name(s) to index, e.g. `--coding-system 4 --coding-system "ICD10 codes"`; defaults to all coding systems'
+        )
+
+        parser.add_argument(
+            '--refresh',
+            action='store_true',
+            dest='refresh',
+            default=False,
+            help='Optionally rebuild existing indexes concurrently after building any missing indexes'
+        )
+
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            dest='drop',
+            default=False,
+            help='Optionally drop the indexes built by this command instead of building them'
+        )
+
+    def __get_index_name(self, table, column, index_type):
+        """
+            Computes a deterministic index name within Postgres' 63 character limit
+        """
+        digest = hashlib.md5(f'{table}.{column}'.encode('utf-8')).hexdigest()[:8]
+        return f'cs_{table[:32]}_{digest}_{index_type}_idx'.lower()
+
+    def __get_column_types(self, cursor, table):
+        """
+            Resolves the data types of each column of the given table, or `None` if the table doesn't exist
+        """
+        cursor.execute(
+            '''
+            select column_name, data_type
+              from information_schema.columns
+             where table_schema = 'public'
+               and table_name = %s;
+            ''',
+            [table]
+        )
+
+        columns = { name.lower(): data_type for name, data_type in cursor.fetchall() }
+        return columns if len(columns) > 0 else None
+
+    def __get_index_targets(self, coding_systems):
+        """
+            Resolves the distinct (table, column, role) targets of the given coding systems,
+            since some code tables are shared by multiple coding systems
+        """
+        targets = { }
+        for coding_system in coding_systems:
+            table = coding_system.table_name.lower()
+            columns = {
+                'code': coding_system.code_column_name,
+                'desc': coding_system.desc_column_name,
+            }
+
+            for role, column in columns.items():
+                if not isinstance(column, str) or len(column.strip()) < 1:
+                    continue
+                targets[(table, column.strip().lower(), role)] = coding_system
+
+        return targets
+
+    def handle(self, *args, **kwargs):
+        """
+            Builds a GIN trigram index on the code & description column of each coding system's
+            code table, alongside a `text_pattern_ops` prefix index on its code column
+
+            [!] Note: Indexes are created concurrently and therefore this command must not be
+                      executed within a transaction
+        """
+        refs = kwargs.get('coding_systems')
+        drop = kwargs.get('drop', False)
+        refresh = kwargs.get('refresh', False)
+
+        coding_systems = CodingSystem.objects.all().order_by('id')
+        if refs:
+            refs = [x.strip() for x in refs if len(x.strip()) > 0]
+            query = Q(pk__in=[int(x) for x in refs if x.isdigit()])
+            for name in [x for x in refs if not x.isdigit()]:
+                query |= Q(name__iexact=name)
+            coding_systems = coding_systems.filter(query)
+
+        targets = self.__get_index_targets(coding_systems)
+        if len(targets) < 1:
+            raise CommandError('Failed to resolve any coding system tables')
+
+        built, refreshed, dropped = 0, 0, 0
+        with connection.cursor() as cursor:
+            if not drop:
+                cursor.execute('create extension if not exists pg_trgm;')
+
+            column_types = { }
+            for (table, column, role), coding_system in targets.items():
+                if table not in column_types:
+                    column_types[table] = self.__get_column_types(cursor, table)
+
+                types = column_types.get(table)
+                if types is None or column not in types:
+                    self.stderr.write(self.style.WARNING(
+                        f'Skipping {coding_system.name}, column `{table}.{column}` does not exist'
+                    ))
+                    continue
+
+                # The ORM casts pattern lookups to text, e.g. `"col"::text ~ %s`, so non-text columns must be indexed by that cast
+                ref = connection.ops.quote_name(column)
+                if types.get(column) not in ('text', 'character varying', 'character'):
+                    ref = f'({ref}::text)'
+
+                for index in CODE_SEARCH_INDEXES:
+                    if role not in index.get('columns'):
+                        continue
+
+                    name = self.__get_index_name(table, column, index.get('name'))
+                    if drop:
+                        cursor.execute(f'drop index concurrently if exists {connection.ops.quote_name(name)};')
+                        dropped += 1
+                        continue
+
+                    cursor.execute('select to_regclass(%s) is not null;', [f'public.{name}'])
+                    exists = cursor.fetchone()[0]
+                    if exists:
+                        if refresh:
+                            cursor.execute(f'reindex index concurrently {connection.ops.quote_name(name)};')
+                            refreshed += 1
+                        continue
+
+                    expression = index.get('expression').format(column=ref)
+                    cursor.execute(
+                        f'''
+                        create index concurrently if not exists {connection.ops.quote_name(name)}
+                            on public.{connection.ops.quote_name(table)}
+                         using {index.get('method')} ({expression} {index.get('opclass')});
+                        '''
+                    )
+                    built += 1
+
+            if not drop:
+                for table in column_types.keys():
+                    if column_types.get(table) is not None:
+                        cursor.execute(f'analyze public.{connection.ops.quote_name(table)};')
+
+        if drop:
+            self.stdout.write(f'Dropped {dropped} code search index(es)')
+        else:
+            self.stdout.write(f'Built {built} and refreshed {refreshed} code search index(es) across {len(column_types)} table(s)')
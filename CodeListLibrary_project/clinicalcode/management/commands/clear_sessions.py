@@ -1,13 +1,79 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.db import connection, transaction
+from importlib import import_module
+
+import time
 
 class Command(BaseCommand):
     help = 'Cleans the session data'
 
-    @transaction.atomic
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            dest='batch_size',
+            default=5000,
+            help='Optionally specify the number of expired sessions deleted per transaction; defaults to 5000'
+        )
+
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            dest='sleep',
+            default=0.5,
+            help='Optionally specify the number of seconds to wait between batches; defaults to 0.5'
+        )
+
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            dest='max_batches',
+            default=None,
+            help='Optionally specify the max. number of batches to delete; defaults to deleting all expired sessions'
+        )
+
     def handle(self, *args, **kwargs):
         """
-            Removes sessions from the db that have expired
+            Removes sessions from the db that have expired, in short transactions of at most
+            `batch_size` rows to limit lock duration & vacuum pressure
+
+            [!] Note: Cache-only session engines expire their sessions & are therefore skipped
         """
-        with connection.cursor() as cursor:
-            cursor.execute('''DELETE FROM django_session WHERE expire_date<now();''')
+        if settings.SESSION_ENGINE not in ('django.contrib.sessions.backends.db', 'django.contrib.sessions.backends.cached_db'):
+            import_module(settings.SESSION_ENGINE).SessionStore.clear_expired()
+            return
+
+        batch_size = max(kwargs.get('batch_size') or 5000, 1)
+        sleep = max(kwargs.get('sleep') or 0, 0)
+        max_batches = kwargs.get('max_batches')
+
+        deleted = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        '''
+                        delete from django_session
+                         where session_key in (
+                            select session_key
+                              from django_session
+                             where expire_date < now()
+                             limit %s
+                               for update skip locked
+                         );
+                        ''',
+                        [batch_size]
+                    )
+                    count = cursor.rowcount
+
+            deleted += count
+            batches += 1
+            if count < batch_size:
+                break
+
+            if sleep > 0:
+                time.sleep(sleep)
+
+        self.stdout.write(f'Deleted {deleted} expired session(s) in {batches} batch(es)')
@@ -436,6 +436,25 @@ class Command(BaseCommand):
         if isinstance(result, str):
             self.__log_to_file(result, LogType.SUCCESS)
 
+    def __rebuild_closure(self):
+        """
+            Rebuilds the ontology closure table from scratch
+
+            Note:
+                The closure table is maintained incrementally as edges are written,
+                this is only required if edges were modified whilst its triggers were disabled
+
+        """
+        started = time.time()
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('select refresh_ontology_closure(null);')
+                cursor.execute('select count(*) from public.clinicalcode_ontologytagclosure;')
+                count = cursor.fetchone()[0]
+
+        elapsed = (time.time() - started)
+        self.__log('Rebuilt OntologyClosure<elapsed: %.2f s, count: %d>' % (elapsed, count), LogType.SUCCESS)
+
     def __generate_debug_dag(self):
         """
             Responsible for generating a debug dag using the graph generators & its utility methods
@@ -485,6 +504,7 @@ class Command(BaseCommand):
         parser.add_argument('-p', '--print', type=bool, help='Print debug information to the terminal')
         parser.add_argument('-f', '--file', type=str, help='Location of DAG data relative to manage.py')
         parser.add_argument('-d', '--debug', type=bool, help='If true, attempts to generate DAG and ignores the --file parameter')
+        parser.add_argument('-c', '--closure', type=bool, help='If true, rebuilds the ontology closure table and ignores the --file parameter')
         parser.add_argument('-l', '--log', type=str, help=f'Expects directory, will output logs incl. DOTS representation to file as {self.LOG_FILE_NAME}{self.LOG_FILE_EXT}')
 
     def handle(self, *args, **kwargs):
@@ -497,13 +517,16 @@ class Command(BaseCommand):
         filepath = kwargs.get('file', None)
         is_debug = kwargs.get('debug', False)
         log_file = kwargs.get('log', None)
+        rebuild_closure = kwargs.get('closure', False)
 
         # det. log behaviour
         self._verbose = verbose
         self._log_dir = log_file if isinstance(log_file, str) and len(log_file.strip()) > 0 else None
 
         # det. handle
-        if is_debug:
+        if rebuild_closure:
+            self.__rebuild_closure()
+        elif is_debug:
             self.__generate_debug_dag()
         else:
             self.__try_build_dag(filepath or self.DEFAULT_FILE)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...entity_utils import permission_utils
+
+class Command(BaseCommand):
+    help = 'Refreshes the precomputed set of entities accessible to anonymous users'
+
+    def handle(self, *args, **kwargs):
+        """
+            Refreshes the `clinicalcode_accessibleentity` materialised view, e.g. after
+            entities have been modified via raw SQL and therefore bypassed its signals
+        """
+        if not permission_utils.refresh_accessible_entities():
+            raise CommandError('Failed to refresh accessible entities, see logs for more information')
+
+        self.stdout.write('Refreshed accessible entities')
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from ...entity_utils import audit_utils, constants
+
+class Command(BaseCommand):
+    help = 'Rolls up the pending audited requests into the daily request counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            dest='batch_size',
+            default=constants.REQUEST_ROLLUP_BATCH_SIZE,
+            help=f'Optionally specify the number of requests consumed per batch; defaults to {constants.REQUEST_ROLLUP_BATCH_SIZE}'
+        )
+
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            dest='max_batches',
+            default=None,
+            help='Optionally specify the max. number of batches to consume; defaults to consuming all pending requests'
+        )
+
+    def handle(self, *args, **kwargs):
+        """
+            Consumes the pending `easyaudit_requestevent` rows, e.g. to backfill the `RequestRollup`
+            counters before the `run_request_rollup` task is scheduled
+        """
+        consumed = audit_utils.rollup_request_events(
+            batch_size=kwargs.get('batch_size'),
+            max_batches=kwargs.get('max_batches')
+        )
+
+        if consumed is None:
+            self.stderr.write(self.style.WARNING('Skipped, another request rollup is in progress'))
+            return
+
+        self.stdout.write(f'Rolled up {consumed} request(s)')
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from ...models.EntityConceptLink import EntityConceptLink
+from ...entity_utils import concept_utils
+from ...entity_utils.constants import APPROVAL_STATUS
+
+class Command(BaseCommand):
+    help = 'Rebuilds the published code to phenotype index from the final codelist of each published phenotype'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--entity',
+            action='append',
+            dest='entities',
+            default=None,
+            help='Optionally specify the entity id(s) to rebuild, e.g. `--entity PH1 --entity PH2`; defaults to all published entities'
+        )
+
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            dest='chunk_size',
+            default=50,
+            help='Optionally specify the number of entities rebuilt per query; defaults to 50'
+        )
+
+    def handle(self, *args, **kwargs):
+        """
+            Recomputes the `CodeEntityLink` rows of each published entity, i.e. those with an
+            approved `EntityConceptLink`
+        """
+        entities = kwargs.get('entities')
+        chunk_size = max(kwargs.get('chunk_size') or 50, 1)
+
+        if not entities:
+            entities = EntityConceptLink.objects \
+                .filter(publish_status=APPROVAL_STATUS.APPROVED.value) \
+                .values_list('entity_id', flat=True) \
+                .distinct()
+
+        entities = sorted(set(entities))
+
+        count = 0
+        for i in range(0, len(entities), chunk_size):
+            count += concept_utils.refresh_code_entity_links(entities[i:i + chunk_size])
+
+        self.stdout.write(f'Synced {count} code link(s) across {len(entities)} entities')
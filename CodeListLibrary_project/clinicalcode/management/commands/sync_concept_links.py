@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+class Command(BaseCommand):
+    help = 'Rebuilds the denormalised entity to concept link table from the historical entity records'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--entity',
+            action='append',
+            dest='entities',
+            default=None,
+            help='Optionally specify the entity id(s) to rebuild, e.g. `--entity PH1 --entity PH2`; defaults to all entities'
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **kwargs):
+        """
+            Removes & recomputes the `EntityConceptLink` rows from each historical entity's
+            `template_data.concept_information` field
+        """
+        entities = kwargs.get('entities')
+        params = { 'entity_ids': entities }
+
+        entity_clause = ''
+        if entities:
+            entity_clause = 'where entity.id = any(%(entity_ids)s)'
+
+        with connection.cursor() as cursor:
+            if entities:
+                cursor.execute(
+                    'delete from public.clinicalcode_entityconceptlink where entity_id = any(%(entity_ids)s);',
+                    params=params
+                )
+            else:
+                cursor.execute('truncate table public.clinicalcode_entityconceptlink restart identity;')
+
+            sql = f'''
+            insert into public.clinicalcode_entityconceptlink (entity_id, entity_history_id, concept_id, concept_version_id, publish_status)
+            select entity.id,
+                   entity.history_id,
+                   cast(concept->>'concept_id' as integer),
+                   cast(concept->>'concept_version_id' as integer),
+                   entity.publish_status
+              from (
+                select *
+                  from public.clinicalcode_historicalgenericentity as entity
+                 {entity_clause}
+              ) as entity,
+                   jsonb_array_elements(
+                       case
+                           when jsonb_typeof(entity.template_data->'concept_information') = 'array' then entity.template_data->'concept_information'
+                           else '[]'::jsonb
+                       end
+                   ) as concept
+             where concept->>'concept_id' ~ '^\\d+$'
+               and concept->>'concept_version_id' ~ '^\\d+$';
+            '''
+
+            cursor.execute(sql, params=params)
+            self.stdout.write(f'Synced {cursor.rowcount} entity concept link(s)')
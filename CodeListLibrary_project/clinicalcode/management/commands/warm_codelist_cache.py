@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from ...models.EntityConceptLink import EntityConceptLink
+from ...models.PublishedConcept import PublishedConcept
+from ...entity_utils import concept_utils
+from ...entity_utils.constants import APPROVAL_STATUS
+
+class Command(BaseCommand):
+    help = 'Resolves & caches the final codelist of every published concept version'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            dest='chunk_size',
+            default=50,
+            help='Optionally specify the number of concept versions resolved per query; defaults to 50'
+        )
+
+    def handle(self, *args, **kwargs):
+        """
+            Iterates over each published concept version, i.e. those published directly via the
+            legacy system or via a published Phenotype, and populates the immutable codelist cache
+            for both the attribute & non-attribute variants
+        """
+        chunk_size = max(kwargs.get('chunk_size') or 50, 1)
+
+        concepts = set(
+            EntityConceptLink.objects \
+                .filter(publish_status=APPROVAL_STATUS.APPROVED.value) \
+                .values_list('concept_id', 'concept_version_id') \
+                .distinct()
+        )
+
+        concepts |= set(
+            PublishedConcept.objects \
+                .values_list('concept_id', 'concept_history_id')
+        )
+
+        concepts = sorted(concepts)
+        for i in range(0, len(concepts), chunk_size):
+            chunk = concepts[i:i + chunk_size]
+            concept_utils.get_concept_codelists(chunk, incl_attributes=False)
+            concept_utils.get_concept_codelists(chunk, incl_attributes=True)
+
+        self.stdout.write(f'Warmed the codelist cache of {len(concepts)} published concept version(s)')
@@ -1,6 +1,5 @@
-from importlib import import_module
 from django.conf import settings
-from django.urls import clear_url_caches, set_urlconf
+from django.urls import set_urlconf
 from django.contrib import auth, messages
 from django.shortcuts import redirect
 from rest_framework.reverse import reverse
@@ -9,32 +8,48 @@ from django.utils.deprecation import MiddlewareMixin
 
 import os
 import re
-import sys
 import numbers
-import importlib
+import logging
 
+from cll.urls import get_brand_urlconf
 from clinicalcode.models import Brand
-from clinicalcode.entity_utils import gen_utils
+from clinicalcode.entity_utils import gen_utils, permission_utils
 
 class BrandMiddleware(MiddlewareMixin):
     """
         Brand related middleware
-            [ ...needs docs? ]
+
+        Resolves the Brand context of each request and selects its precompiled URL configuration through `request.urlconf`
+
+        Note:
+            - Brand context is only ever attached to the request, _i.e._ it's safe to use alongside threaded workers;
+            - See `cll.urls.get_brand_urlconf()` for more information on how each Brand's URL configuration is built.
     """
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+
+        # Precompile the URL configuration of each known Brand
+        try:
+            is_read_only = settings.CLL_READ_ONLY
+            for name in Brand.all_names():
+                get_brand_urlconf(brand_name=name, read_only=is_read_only)
+            get_brand_urlconf(read_only=is_read_only)
+        except Exception as e:
+            logging.warning(f'Failed to precompile Brand URL configurations with err:\n\n{str(e)}')
+
     def process_request(self, request):
         #---------------------------------
         # if the user is a member of  'ReadOnlyUsers' group, make READ-ONLY True
-        if request.user.is_authenticated:
-            CLL_READ_ONLY_org = self.get_env_value('CLL_READ_ONLY', cast='bool')
-            settings.CLL_READ_ONLY = CLL_READ_ONLY_org
-
-            if not settings.CLL_READ_ONLY:
-                if (request.user.groups.filter(name='ReadOnlyUsers').exists()):
-                    msg1 = 'You are assigned as a Read-Only-User.'
-                    if request.session.get('read_only_msg', '') == '':
-                        request.session['read_only_msg'] = msg1
-                        messages.error(request, msg1)
-                    settings.CLL_READ_ONLY = True
+        is_read_only = settings.CLL_READ_ONLY
+        if request.user.is_authenticated and not is_read_only:
+            if (request.user.groups.filter(name='ReadOnlyUsers').exists()):
+                msg1 = 'You are assigned as a Read-Only-User.'
+                if request.session.get('read_only_msg', '') == '':
+                    request.session['read_only_msg'] = msg1
+                    messages.error(request, msg1)
+                is_read_only = True
+
+        request.CLL_READ_ONLY = is_read_only
 
         #---------------------------------
         brands_list = Brand.all_names()
@@ -42,54 +57,32 @@ class BrandMiddleware(MiddlewareMixin):
         current_page_url = request.path_info.lstrip('/')
 
         request.IS_PROD_SITE = False
-        settings.IS_PROD_SITE = False
 
         root = current_page_url.split('/')[0]
         if is_live_site:
             root = settings.PROD_SITE_BRAND
             request.IS_PROD_SITE = True
-            settings.IS_PROD_SITE = True
 
         root = root.upper()
 
+        # Brand context is only carried by the request, i.e. anonymous & API clients never create a session
+        request.ALL_BRANDS = brands_list
         request.CURRENT_BRAND = ''
-        settings.CURRENT_BRAND = ''
-
         request.CURRENT_BRAND_WITH_SLASH = ''
-        settings.CURRENT_BRAND_WITH_SLASH = ''
-
         request.BRAND_OBJECT = {}
-        settings.BRAND_OBJECT = {}
-        
         request.SWAGGER_TITLE = 'Concept Library API'
-        settings.SWAGGER_TITLE = 'Concept Library API'
-
-        set_urlconf(None)
-        request.urlconf = None
-        urlconf = None
-        urlconf = settings.ROOT_URLCONF
-        clear_url_caches()
-
-        request.session['all_brands'] = brands_list
-        request.session['current_brand'] = root
 
         do_redirect = False
         if root in brands_list:
-            settings.CURRENT_BRAND = root
             request.CURRENT_BRAND = root
-
-            settings.CURRENT_BRAND_WITH_SLASH = '/' + root
             request.CURRENT_BRAND_WITH_SLASH = '/' + root
 
             brand_object = next((x for x in Brand.all_instances() if x.name.upper() == root.upper()), {})
-
-            settings.BRAND_OBJECT = brand_object
             request.BRAND_OBJECT = brand_object
 
             has_brand = brand_object is not None and not isinstance(brand_object, dict)
             if has_brand and brand_object.site_title is not None and not gen_utils.is_empty_string(brand_object.site_title):
                 request.SWAGGER_TITLE = brand_object.site_title + ' API'
-                settings.SWAGGER_TITLE = brand_object.site_title + ' API'
 
             if not current_page_url.strip().endswith('/'):
                 current_page_url = current_page_url.strip() + '/'
@@ -97,7 +90,11 @@ class BrandMiddleware(MiddlewareMixin):
             if not is_live_site:
                 request.path_info = '/' + '/'.join([root.upper()] + current_page_url.split('/')[1:])
 
-        urlconf = 'cll.urls'
+        urlconf = get_brand_urlconf(
+            brand_name=request.CURRENT_BRAND,
+            is_prod_site=request.IS_PROD_SITE,
+            read_only=is_read_only
+        )
         set_urlconf(urlconf)
         request.urlconf = urlconf
 
@@ -106,13 +103,8 @@ class BrandMiddleware(MiddlewareMixin):
             do_redirect = True
             current_page_url = current_page_url.strip().rstrip('/') + '/v1/'
 
-        if urlconf in sys.modules:
-            importlib.reload(sys.modules[urlconf])
-        importlib.reload(import_module(urlconf))
-        clear_url_caches()
-
         if settings.DEBUG:
-            print(f'Brand Ctx: {settings.CURRENT_BRAND} | Route: {str(request.get_full_path())} | Info: {request.path_info}')
+            print(f'Brand Ctx: {request.CURRENT_BRAND} | Route: {str(request.get_full_path())} | Info: {request.path_info}')
 
         if do_redirect:
             return redirect(reverse('api:root'))
@@ -120,7 +112,7 @@ class BrandMiddleware(MiddlewareMixin):
         return None
 
     def chkReadOnlyUsers(self, request):
-        if not settings.CLL_READ_ONLY:
+        if not permission_utils.is_read_only(request):
             if (request.user.groups.filter(name='ReadOnlyUsers').exists()):
                 messages.error(request, 'You are assigned as a Read-Only-User. You can access only the ReadOnly website.')
                 auth.logout(request)
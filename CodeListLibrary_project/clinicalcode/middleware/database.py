@@ -0,0 +1,50 @@
+from django.conf import settings
+
+from clinicalcode.routers import get_replica_alias, enable_read_replica, reset_read_replica
+
+class ReadReplicaMiddleware:
+    """
+        Routes the reads of read-only API & search requests to the replica database
+
+        Note:
+            - Only safe methods targeting the URL namespaces or names described by `DATABASE_REPLICA_ROUTES` are routed;
+            - Reads fall back to the primary within write transactions, and once the request has written to the database;
+            - No-op if a replica isn't configured, or if `CLL_READ_ONLY` or `IS_INSIDE_GATEWAY` are set.
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        routes = getattr(settings, 'DATABASE_REPLICA_ROUTES', None)
+        routes = routes if isinstance(routes, dict) else { }
+        self.namespaces = frozenset(routes.get('namespaces') or [])
+        self.names = frozenset(routes.get('names') or [])
+
+        super().__init__()
+
+    def __is_routed(self, request):
+        if request.method not in self.SAFE_METHODS:
+            return False
+
+        match = request.resolver_match
+        if match is None:
+            return False
+
+        return match.url_name in self.names or any(x in self.namespaces for x in match.namespaces)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if get_replica_alias() is None or not self.__is_routed(request):
+            return None
+
+        request._replica_token = enable_read_replica()
+        return None
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            token = getattr(request, '_replica_token', None)
+            if token is not None:
+                reset_read_replica(token)
+                del request._replica_token
@@ -44,7 +44,12 @@ class SessionExpiryMiddleware:
             last_request = datetime.fromisoformat(request.session.get('last_session_request'))
 
         idle_time = (last_request - current_time + idle_limit).total_seconds()
-        request.session['last_session_request'] = current_time.isoformat()
+
+        # Only persist the request time once per interval to avoid a session write per request
+        interval = options.get('IDLE_WRITE_INTERVAL')
+        if not isinstance(interval, timedelta) or last_request == current_time or current_time - last_request >= interval:
+            request.session['last_session_request'] = current_time.isoformat()
+
         return idle_time < 0
 
     def __try_expire_session(self, request, options):
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.12 on 2026-10-17 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinicalcode', '0134_alter_omop_codes_valid_end_date_omoprelationships'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntityConceptLink',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('entity_id', models.CharField(max_length=50)),
+                ('entity_history_id', models.IntegerField()),
+                ('concept_id', models.IntegerField()),
+                ('concept_version_id', models.IntegerField()),
+                ('publish_status', models.IntegerField(null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['concept_id', 'concept_version_id', 'publish_status'], name='ecl_concept_ver_idx'), models.Index(fields=['entity_history_id'], name='ecl_entity_hx_idx'), models.Index(fields=['entity_id'], name='ecl_entity_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,82 @@
+from django.db import migrations
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinicalcode', '0135_entityconceptlink'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            -- maintains the `clinicalcode_entityconceptlink` table for each
+            -- historical entity, i.e. expands its `template_data.concept_information`
+            -- field into (entity, concept version, publish status) rows
+            --
+            --      note: publish status changes are applied in-place since
+            --            `PublishedGenericEntity` updates the historical
+            --            table directly
+            --
+
+            create or replace function hge_concept_link_trigger() returns trigger
+            language plpgsql as $bd$
+            begin
+                if tg_op = 'UPDATE' and new.template_data is not distinct from old.template_data then
+                    if new.publish_status is distinct from old.publish_status then
+                        update public.clinicalcode_entityconceptlink
+                           set publish_status = new.publish_status
+                         where entity_history_id = new.history_id;
+                    end if;
+
+                    return null;
+                end if;
+
+                if tg_op in ('UPDATE', 'DELETE') then
+                    delete from public.clinicalcode_entityconceptlink
+                     where entity_history_id = old.history_id;
+                end if;
+
+                if tg_op in ('INSERT', 'UPDATE') and jsonb_typeof(new.template_data->'concept_information') = 'array' then
+                    insert into public.clinicalcode_entityconceptlink (entity_id, entity_history_id, concept_id, concept_version_id, publish_status)
+                    select new.id,
+                           new.history_id,
+                           cast(concept->>'concept_id' as integer),
+                           cast(concept->>'concept_version_id' as integer),
+                           new.publish_status
+                      from jsonb_array_elements(new.template_data->'concept_information') as concept
+                     where concept->>'concept_id' ~ '^\\d+$'
+                       and concept->>'concept_version_id' ~ '^\\d+$';
+                end if;
+
+                return null;
+            end;
+            $bd$;
+
+            create trigger hge_concept_link_tr after insert or update of template_data, publish_status or delete
+            on public.clinicalcode_historicalgenericentity
+            for each row execute function hge_concept_link_trigger();
+
+            -- backfill
+            insert into public.clinicalcode_entityconceptlink (entity_id, entity_history_id, concept_id, concept_version_id, publish_status)
+            select entity.id,
+                   entity.history_id,
+                   cast(concept->>'concept_id' as integer),
+                   cast(concept->>'concept_version_id' as integer),
+                   entity.publish_status
+              from public.clinicalcode_historicalgenericentity as entity,
+                   jsonb_array_elements(
+                       case
+                           when jsonb_typeof(entity.template_data->'concept_information') = 'array' then entity.template_data->'concept_information'
+                           else '[]'::jsonb
+                       end
+                   ) as concept
+             where concept->>'concept_id' ~ '^\\d+$'
+               and concept->>'concept_version_id' ~ '^\\d+$';
+            """,
+            reverse_sql="""
+            drop trigger if exists hge_concept_link_tr on public.clinicalcode_historicalgenericentity;
+            drop function if exists hge_concept_link_trigger;
+            delete from public.clinicalcode_entityconceptlink;
+            """
+        ),
+    ]
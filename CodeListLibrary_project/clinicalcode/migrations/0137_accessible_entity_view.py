@@ -0,0 +1,46 @@
+from django.db import migrations
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinicalcode', '0136_entity_concept_link_triggers'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            -- precomputes the latest published, non-deleted version of each
+            -- entity, i.e. the set of entities accessible to anonymous users
+            --
+            --      note: refreshed on commit after an entity or its publication
+            --            status changes, see `permission_utils.refresh_accessible_entities`
+            --
+
+            create materialized view public.clinicalcode_accessibleentity as
+            select distinct on (hist_entity.id)
+                   hist_entity.id,
+                   hist_entity.history_id,
+                   live_entity.brands
+              from public.clinicalcode_historicalgenericentity as hist_entity
+              join public.clinicalcode_genericentity as live_entity
+                on hist_entity.id = live_entity.id
+              join public.clinicalcode_publishedgenericentity as pub_entity
+                on pub_entity.entity_id = hist_entity.id and pub_entity.entity_history_id = hist_entity.history_id
+              join public.clinicalcode_historicaltemplate as hist_tmpl
+                on hist_entity.template_id = hist_tmpl.id and hist_entity.template_version = hist_tmpl.template_version
+              join public.clinicalcode_template as live_tmpl
+                on hist_tmpl.id = live_tmpl.id
+             where (live_entity.is_deleted is null or live_entity.is_deleted = false)
+               and (hist_entity.is_deleted is null or hist_entity.is_deleted = false)
+               and pub_entity.approval_status = 2
+             order by hist_entity.id, hist_entity.history_id desc;
+
+            create unique index ae_id_uq_idx on public.clinicalcode_accessibleentity (id);
+            create index ae_hid_idx on public.clinicalcode_accessibleentity (history_id);
+            create index ae_brands_gin_idx on public.clinicalcode_accessibleentity using gin (brands);
+            """,
+            reverse_sql="""
+            drop materialized view if exists public.clinicalcode_accessibleentity;
+            """
+        ),
+    ]
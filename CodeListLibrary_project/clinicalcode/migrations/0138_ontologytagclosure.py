@@ -0,0 +1,26 @@
+# Generated by Django 5.2.12 on 2026-10-17 21:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinicalcode', '0137_accessible_entity_view'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OntologyTagClosure',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('ancestor_id', models.BigIntegerField()),
+                ('descendant_id', models.BigIntegerField()),
+                ('depth', models.IntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant_id', 'ancestor_id'], name='otc_desc_anc_idx'), models.Index(fields=['ancestor_id', 'depth'], name='otc_anc_depth_idx')],
+                'unique_together': {('ancestor_id', 'descendant_id')},
+            },
+        ),
+    ]
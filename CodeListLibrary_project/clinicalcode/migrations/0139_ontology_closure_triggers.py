@@ -0,0 +1,195 @@
+from django.db import migrations
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinicalcode', '0138_ontologytagclosure'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            -- maintains the `clinicalcode_ontologytagclosure` table, i.e. the
+            -- (ancestor, descendant, depth) pairs of the ontology DAG
+            --
+            --      note: takes an array of `seeds` describing the child ids of
+            --            the edges that were modified; the closure rows of each
+            --            seed and its descendants are recomputed
+            --
+            --            a null `seeds` array rebuilds the entire table
+            --
+
+            create or replace function refresh_ontology_closure(seeds bigint[]) returns void
+            language plpgsql as $bd$
+            declare
+                nodes bigint[];
+            begin
+                if seeds is null then
+                    delete from public.clinicalcode_ontologytagclosure;
+
+                    insert into public.clinicalcode_ontologytagclosure (ancestor_id, descendant_id, depth)
+                    with
+                        recursive ancestry(descendant_id, ancestor_id, depth) as (
+                            select edge.child_id, edge.parent_id, 1
+                              from public.clinicalcode_ontologytagedge as edge
+                             union
+                            select ancestry.descendant_id, edge.parent_id, ancestry.depth + 1
+                              from ancestry
+                              join public.clinicalcode_ontologytagedge as edge
+                                on edge.child_id = ancestry.ancestor_id
+                             where ancestry.depth < 128
+                        )
+                    select ancestor_id, descendant_id, min(depth)
+                      from ancestry
+                     group by ancestor_id, descendant_id;
+
+                    return;
+                end if;
+
+                if cardinality(seeds) < 1 then
+                    return;
+                end if;
+
+                with
+                    recursive affected(node_id) as (
+                        select unnest(seeds)
+                         union
+                        select edge.child_id
+                          from affected
+                          join public.clinicalcode_ontologytagedge as edge
+                            on edge.parent_id = affected.node_id
+                    )
+                select array_agg(node_id)
+                  from affected
+                  into nodes;
+
+                delete from public.clinicalcode_ontologytagclosure
+                 where descendant_id = any(nodes);
+
+                insert into public.clinicalcode_ontologytagclosure (ancestor_id, descendant_id, depth)
+                with
+                    recursive ancestry(descendant_id, ancestor_id, depth) as (
+                        select edge.child_id, edge.parent_id, 1
+                          from public.clinicalcode_ontologytagedge as edge
+                         where edge.child_id = any(nodes)
+                         union
+                        select ancestry.descendant_id, edge.parent_id, ancestry.depth + 1
+                          from ancestry
+                          join public.clinicalcode_ontologytagedge as edge
+                            on edge.child_id = ancestry.ancestor_id
+                         where ancestry.depth < 128
+                    )
+                select ancestor_id, descendant_id, min(depth)
+                  from ancestry
+                 group by ancestor_id, descendant_id;
+            end;
+            $bd$;
+
+            create or replace function ot_closure_insert_trigger() returns trigger
+            language plpgsql as $bd$
+            begin
+                perform refresh_ontology_closure(array(select distinct child_id from inserted));
+                return null;
+            end;
+            $bd$;
+
+            create or replace function ot_closure_delete_trigger() returns trigger
+            language plpgsql as $bd$
+            begin
+                perform refresh_ontology_closure(array(select distinct child_id from removed));
+                return null;
+            end;
+            $bd$;
+
+            create or replace function ot_closure_update_trigger() returns trigger
+            language plpgsql as $bd$
+            begin
+                perform refresh_ontology_closure(array(
+                    select child_id from removed
+                     union
+                    select child_id from inserted
+                ));
+                return null;
+            end;
+            $bd$;
+
+            create trigger ot_closure_insert_tr after insert
+            on public.clinicalcode_ontologytagedge
+            referencing new table as inserted
+            for each statement execute function ot_closure_insert_trigger();
+
+            create trigger ot_closure_delete_tr after delete
+            on public.clinicalcode_ontologytagedge
+            referencing old table as removed
+            for each statement execute function ot_closure_delete_trigger();
+
+            create trigger ot_closure_update_tr after update
+            on public.clinicalcode_ontologytagedge
+            referencing old table as removed new table as inserted
+            for each statement execute function ot_closure_update_trigger();
+
+            -- resolves descendants via the closure table rather than traversing the edges
+            create or replace function is_ontological_descendant(parents bigint[], queryset bigint[]) returns boolean
+            language sql strict stable as $bd$
+                select exists(
+                    select 1
+                      from public.clinicalcode_ontologytagclosure as closure
+                     where closure.descendant_id = any(queryset)
+                       and closure.ancestor_id = any(parents)
+                );
+            $bd$;
+
+            -- backfill
+            select refresh_ontology_closure(null);
+            """,
+            reverse_sql="""
+            drop trigger if exists ot_closure_insert_tr on public.clinicalcode_ontologytagedge;
+            drop trigger if exists ot_closure_delete_tr on public.clinicalcode_ontologytagedge;
+            drop trigger if exists ot_closure_update_tr on public.clinicalcode_ontologytagedge;
+            drop function if exists ot_closure_insert_trigger;
+            drop function if exists ot_closure_delete_trigger;
+            drop function if exists ot_closure_update_trigger;
+            drop function if exists refresh_ontology_closure;
+            delete from public.clinicalcode_ontologytagclosure;
+
+            create or replace function is_ontological_descendant(parents bigint[], queryset bigint[]) returns boolean
+            language plpgsql strict as $bd$
+			declare
+				is_descendant boolean;
+            begin
+                with recursive traversal(child_id, parent_id, depth, path) as (
+                    select
+                            first.child_id,
+                            first.parent_id,
+                            1 as depth,
+                            array[first.child_id] as path
+                      from public.clinicalcode_ontologytagedge as first
+                     where first.child_id = any(queryset)
+                     union all
+                    select
+                            first.child_id,
+                            first.parent_id,
+                            second.depth + 1 as depth,
+                            path || first.child_id as path
+                      from
+                            public.clinicalcode_ontologytagedge as first,
+                            traversal as second
+                     where first.child_id = second.parent_id
+                       and first.child_id <> ALL(second.path)
+                       and first.parent_id = any(parents)
+                )
+
+				select exists(
+					select 1
+					  from traversal t0
+					 where t0.parent_id = any(parents)
+				)
+				limit 1
+				into is_descendant;
+
+				return is_descendant;
+            end;
+            $bd$;
+            """
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.12 on 2026-10-17 22:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinicalcode', '0139_ontology_closure_triggers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeEntityLink',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('coding_system_id', models.IntegerField()),
+                ('code', models.CharField(max_length=100)),
+                ('concept_id', models.IntegerField()),
+                ('concept_version_id', models.IntegerField()),
+                ('entity_id', models.CharField(max_length=50)),
+                ('entity_history_id', models.IntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['coding_system_id', 'code'], name='cel_system_code_idx'), models.Index(fields=['entity_id', 'entity_history_id'], name='cel_entity_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.12 on 2026-10-17 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinicalcode', '0140_codeentitylink'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestRollup',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('brand', models.CharField(blank=True, default='', max_length=250)),
+                ('entity_id', models.CharField(blank=True, default='', max_length=50)),
+                ('kind', models.CharField(choices=[('view', 'View'), ('api', 'API'), ('export', 'Export')], default='view', max_length=10)),
+                ('visitor', models.CharField(max_length=32)),
+                ('hits', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'brand'], name='rr_date_brand_idx'), models.Index(fields=['entity_id', 'date'], name='rr_entity_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'brand', 'entity_id', 'kind', 'visitor'), name='rr_unq_counter')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RequestRollupState',
+            fields=[
+                ('id', models.IntegerField(default=1, editable=False, primary_key=True, serialize=False)),
+                ('last_request_id', models.BigIntegerField(default=0)),
+                ('modified', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.12 on 2026-10-17 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinicalcode', '0141_requestrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='genericentity',
+            name='entity_number',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='historicalgenericentity',
+            name='entity_number',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            sql="""
+            -- backfill the numeric component of each entity id, e.g. `PH123` -> `123`,
+            -- see `GenericEntity.save()`
+            update public.clinicalcode_genericentity
+               set entity_number = nullif(regexp_replace(id, '[a-zA-Z]+', '', 'g'), '')::bigint
+             where entity_number is null;
+
+            update public.clinicalcode_historicalgenericentity
+               set entity_number = nullif(regexp_replace(id, '[a-zA-Z]+', '', 'g'), '')::bigint
+             where entity_number is null;
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+    ]
@@ -0,0 +1,68 @@
+from django.db import migrations
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinicalcode', '0142_genericentity_entity_number'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            -- creates the sequence used to allocate the entity ids of each
+            -- entity class, seeded from its `entity_count`
+            --
+            --      note: classes created after this migration are seeded on
+            --            first use, see `EntityClass.allocate_entity_number`
+            --
+            do $$
+            declare
+                cls record;
+            begin
+                for cls in
+                    select id, entity_count
+                      from public.clinicalcode_entityclass
+                loop
+                    execute format(
+                        'create sequence if not exists public.%I as bigint minvalue 1',
+                        'clinicalcode_entityclass_' || cls.id || '_seq'
+                    );
+
+                    perform setval(
+                        format('public.%I', 'clinicalcode_entityclass_' || cls.id || '_seq')::regclass,
+                        greatest(cls.entity_count, 1),
+                        cls.entity_count > 0
+                    );
+                end loop;
+            end;
+            $$;
+            """,
+            reverse_sql="""
+            do $$
+            declare
+                cls record;
+                seq regclass;
+                val bigint;
+            begin
+                for cls in
+                    select id
+                      from public.clinicalcode_entityclass
+                loop
+                    seq := to_regclass(format('public.%I', 'clinicalcode_entityclass_' || cls.id || '_seq'));
+                    if seq is null then
+                        continue;
+                    end if;
+
+                    execute format('select case when is_called then last_value else 0 end from %s', seq) into val;
+
+                    update public.clinicalcode_entityclass
+                       set entity_count = greatest(entity_count, val)
+                     where id = cls.id;
+
+                    execute format('drop sequence if exists %s', seq);
+                end loop;
+            end;
+            $$;
+            """
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.12 on 2026-10-17 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinicalcode', '0143_entityclass_sequences'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='codeentitylink',
+            name='code',
+            field=models.TextField(),
+        ),
+    ]
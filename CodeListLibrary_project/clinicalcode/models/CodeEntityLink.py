@@ -0,0 +1,29 @@
+from django.db import models
+
+class CodeEntityLink(models.Model):
+    """
+        Inverted index of the codes contained by the final codelist of each published
+        GenericEntity version, i.e. (coding system, code) -> (concept version, entity version)
+
+        [!] Note:
+            1. Rows are refreshed once a `PublishedGenericEntity` is saved, see
+               `concept_utils.refresh_code_entity_links()`, they should not be written directly;
+
+            2. See the `sync_code_entity_links` management command to rebuild the table.
+    """
+    id = models.BigAutoField(primary_key=True)
+    coding_system_id = models.IntegerField()
+    code = models.TextField()
+    concept_id = models.IntegerField()
+    concept_version_id = models.IntegerField()
+    entity_id = models.CharField(max_length=50)
+    entity_history_id = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['coding_system_id', 'code'], name='cel_system_code_idx'),
+            models.Index(fields=['entity_id', 'entity_history_id'], name='cel_entity_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.coding_system_id}/{self.code} -> {self.entity_id}/{self.entity_history_id}'
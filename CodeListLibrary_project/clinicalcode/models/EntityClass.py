@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, connection, transaction
 from django.utils.timezone import now
 from django.contrib.auth import get_user_model
 
@@ -27,3 +27,97 @@ class EntityClass(models.Model):
 
     def __str__(self):
         return self.name
+
+    @property
+    def sequence_name(self):
+        '''
+            The name of the Postgres sequence used to allocate the id of this class' entities
+        '''
+        return f'clinicalcode_entityclass_{self.id}_seq'
+
+    def __lock_sequence(self, cursor, shared=False):
+        '''
+            Acquires this class' transaction-level advisory lock, where:
+                - Allocations hold the lock in shared mode, _i.e._ they never block one another;
+                - Seeding & reservations hold it exclusively, _i.e._ the sequence is never read & moved while numbers are being allocated
+
+            [!] Note: Must be called within a transaction, the lock is released once the outermost transaction ends
+        '''
+        fn = 'pg_advisory_xact_lock_shared' if shared else 'pg_advisory_xact_lock'
+        cursor.execute(f'select {fn}(hashtext(%s));', [self.sequence_name])
+
+    def __ensure_sequence(self, cursor):
+        '''
+            Creates & seeds this class' sequence from its `entity_count` if it doesn't exist yet,
+            _e.g._ if the class was created after the sequences were first seeded
+
+            [!] Note: Must be called within a transaction
+        '''
+        cursor.execute('select to_regclass(%s) is not null;', [self.sequence_name])
+        if cursor.fetchone()[0]:
+            return
+
+        self.__lock_sequence(cursor)
+        cursor.execute('select to_regclass(%s) is not null;', [self.sequence_name])
+        if cursor.fetchone()[0]:
+            return
+
+        count = EntityClass.objects.filter(pk=self.id).values_list('entity_count', flat=True).first() or 0
+        cursor.execute(f'create sequence if not exists public.{connection.ops.quote_name(self.sequence_name)} as bigint minvalue 1;')
+        cursor.execute('select setval(%s::regclass, %s, %s);', [self.sequence_name, max(count, 1), count > 0])
+
+    def __sync_count(self, value):
+        '''
+            Updates the informational `entity_count` once the allocating transaction has committed,
+            _i.e._ without holding this class' row lock for the duration of that transaction
+        '''
+        transaction.on_commit(
+            lambda: EntityClass.objects \
+                .filter(pk=self.id, entity_count__lt=value) \
+                .update(entity_count=value)
+        )
+
+    def allocate_entity_number(self):
+        '''
+            Allocates the next entity number of this class from its sequence
+
+            [!] Note: Sequences are non-transactional, _i.e._ numbers allocated by rolled back transactions are skipped;
+                      the shared lock taken here is held until the allocating transaction ends
+
+            Returns:
+                The (int) allocated number
+        '''
+        with transaction.atomic(), connection.cursor() as cursor:
+            self.__ensure_sequence(cursor)
+            self.__lock_sequence(cursor, shared=True)
+            cursor.execute('select nextval(%s::regclass);', [self.sequence_name])
+            value = cursor.fetchone()[0]
+
+        self.__sync_count(value)
+        return value
+
+    def reserve_entity_number(self, value):
+        '''
+            Advances this class' sequence so that it never allocates the given entity number, _e.g._
+            when an entity is transferred with an explicit id
+
+            Args:
+                value (int): the entity number in use
+        '''
+        with transaction.atomic(), connection.cursor() as cursor:
+            self.__ensure_sequence(cursor)
+            self.__lock_sequence(cursor)
+
+            cursor.execute(
+                f'''
+                select last_value, is_called
+                  from public.{connection.ops.quote_name(self.sequence_name)};
+                '''
+            )
+            last_value, is_called = cursor.fetchone()
+
+            # Never move the sequence backwards, and don't reset it if the number was already allocated
+            if value > last_value or (value == last_value and not is_called):
+                cursor.execute('select setval(%s::regclass, %s, true);', [self.sequence_name, value])
+
+        self.__sync_count(value)
@@ -0,0 +1,29 @@
+from django.db import models
+
+class EntityConceptLink(models.Model):
+    """
+        Denormalised link between each historical GenericEntity and the Concept versions
+        referenced by its `template_data.concept_information` field
+
+        [!] Note:
+            1. Rows are maintained by the `hge_concept_link_tr` trigger on the
+               `clinicalcode_historicalgenericentity` table, they should not be written directly;
+
+            2. See the `sync_concept_links` management command to rebuild the table.
+    """
+    id = models.BigAutoField(primary_key=True)
+    entity_id = models.CharField(max_length=50)
+    entity_history_id = models.IntegerField()
+    concept_id = models.IntegerField()
+    concept_version_id = models.IntegerField()
+    publish_status = models.IntegerField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['concept_id', 'concept_version_id', 'publish_status'], name='ecl_concept_ver_idx'),
+            models.Index(fields=['entity_history_id'], name='ecl_entity_hx_idx'),
+            models.Index(fields=['entity_id'], name='ecl_entity_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.entity_id}/{self.entity_history_id} -> C{self.concept_id}/{self.concept_version_id}'
@@ -9,6 +9,8 @@ from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 from simple_history.models import HistoricalRecords
 
+import re
+
 from .Template import Template
 from .EntityClass import EntityClass
 from .Organisation import Organisation
@@ -35,6 +37,7 @@ class GenericEntity(models.Model):
     objects = GenericEntityManager()
 
     id = models.CharField(primary_key=True, editable=False, max_length=50)
+    entity_number = models.BigIntegerField(null=True, editable=False, db_index=True)
 
     ''' Common metadata '''
     name = models.CharField(max_length=250)
@@ -104,16 +107,21 @@ class GenericEntity(models.Model):
     def save(self, ignore_increment=False, *args, **kwargs):
         """
             [!] Note:
-                1. On creation, increments counter within template and increment's entity ID by count + 1
+                1. On creation, allocates the entity's ID from the sequence of its EntityClass, see `EntityClass.allocate_entity_number()`
                 
                 2. template_version field is computed from the template_data.version field
+
+                3. entity_number field is computed from the numeric component of the id, _e.g._ `PH123` -> `123`,
+                   and should be used to order entities by their id
+
+                4. New entities are always inserted, _i.e._ an id collision raises an `IntegrityError` rather than overwriting the existing entity
         """
         template_layout = self.template
         if template_layout is not None:
             entity_class = getattr(template_layout, 'entity_class')
             if entity_class is not None:
                 if ignore_increment:
-                    entitycls = EntityClass.objects.select_for_update().get(pk=entity_class.id)
+                    entitycls = EntityClass.objects.get(pk=entity_class.id)
                     entity_id = gen_utils.parse_int(
                         self.id.replace(entitycls.entity_prefix, ''), 
                         default=None
@@ -122,18 +130,21 @@ class GenericEntity(models.Model):
                     if not entity_id: 
                         raise ValidationError('Unable to parse entity id')
 
-                    if entitycls.entity_count < entity_id:
-                        entitycls.entity_count = entity_id
-                        entitycls.save()
+                    entitycls.reserve_entity_number(entity_id)
                 elif not self.pk and not ignore_increment:
-                    entitycls = EntityClass.objects.select_for_update().get(pk=entity_class.id)
-                    index = entitycls.entity_count = entitycls.entity_count + 1
+                    entitycls = EntityClass.objects.get(pk=entity_class.id)
+                    index = entitycls.allocate_entity_number()
                     self.id = f'{entitycls.entity_prefix}{index}'
-                    entitycls.save()
 
         if self.template_data and 'version' in self.template_data:
             self.template_version = self.template_data.get('version')
 
+        if isinstance(self.id, str):
+            self.entity_number = gen_utils.parse_int(re.sub(r'[a-zA-Z]+', '', self.id), default=None)
+
+        if self._state.adding and not args and not kwargs.get('force_update'):
+            kwargs['force_insert'] = True
+
         super(GenericEntity, self).save(*args, **kwargs)
 
     def save_without_historical_record(self, *args, **kwargs):
@@ -52,6 +52,38 @@ class OntologyTagEdge(edge_factory('OntologyTag', concrete=False)):
 
 
 
+class OntologyTagClosure(models.Model):
+	"""
+		OntologyTagClosure
+
+			This class describes the transitive closure of the
+			ontology DAG, i.e. a row for each (ancestor, descendant)
+			pair alongside the length of the shortest path
+			between them
+
+			[!] Note:
+				1. Rows are maintained by the `ot_closure_*_tr` triggers on
+				   the `clinicalcode_ontologytagedge` table, they should not
+				   be written directly;
+
+				2. See `dag_tasks --closure` to rebuild the table.
+
+	"""
+
+	id = models.BigAutoField(primary_key=True)
+	ancestor_id = models.BigIntegerField()
+	descendant_id = models.BigIntegerField()
+	depth = models.IntegerField()
+
+	class Meta:
+		unique_together = ('ancestor_id', 'descendant_id',)
+		indexes = [
+			models.Index(fields=['descendant_id', 'ancestor_id'], name='otc_desc_anc_idx'),
+			models.Index(fields=['ancestor_id', 'depth'], name='otc_anc_depth_idx'),
+		]
+
+
+
 class OntologyTag(node_factory(OntologyTagEdge)):
 	"""
 		OntologyTag
@@ -491,46 +523,12 @@ class OntologyTag(node_factory(OntologyTagEdge)):
 
 				sql = psycopg2.sql.SQL('''
 				with
-					recursive ancestry(parent_id, child_id, trg, depth, path) as (
-						select
-									n0.parent_id,
-									n0.child_id,
-									n0.child_id as trg,
-									1 as depth,
-									array[n0.parent_id, n0.child_id] as path
-							from public.clinicalcode_ontologytagedge as n0
-							left outer join public.clinicalcode_ontologytagedge as n1
-								on n0.parent_id = n1.child_id
-						 where n0.child_id = %(node_id)s
-						union
-						select
-									n2.parent_id,
-									ancestry.child_id,
-									ancestry.trg,
-									ancestry.depth + 1 as depth,
-									n2.parent_id || ancestry.path
-							from ancestry
-							join public.clinicalcode_ontologytagedge as n2
-								on n2.child_id = ancestry.parent_id
-					),
 					selected as (
 						select *
 							from public.clinicalcode_ontologytag as node
 						 where node.id = %(node_id)s
 						 limit 1
 					),
-					root_path as (
-						select path.*
-							from ancestry as path
-							join (
-								select
-											trg,
-											min(depth) as depth
-									from ancestry
-								 group by trg
-							) as roots
-								on (roots.depth = path.depth and roots.trg = path.trg)
-					),
 					root_nodes as (
 						select
 									sel.id,
@@ -542,10 +540,11 @@ class OntologyTag(node_factory(OntologyTagEdge)):
 										order by node.id asc
 									) as tree
 							from selected as sel
-							join root_path as path
-								on path.trg = sel.id
+							join public.clinicalcode_ontologytagclosure as path
+								on path.descendant_id = sel.id
+							 and path.depth = 1
 							join public.clinicalcode_ontologytag as node
-								on node.id = path.parent_id
+								on node.id = path.ancestor_id
 						 group by sel.id
 					),
 					child_nodes as (
@@ -695,45 +694,11 @@ class OntologyTag(node_factory(OntologyTagEdge)):
 
 				sql = psycopg2.sql.SQL('''
 				with
-					recursive ancestry(parent_id, child_id, trg, depth, path) as (
-						select
-									n0.parent_id,
-									n0.child_id,
-									n0.child_id as trg,
-									1 as depth,
-									array[n0.parent_id, n0.child_id] as path
-							from public.clinicalcode_ontologytagedge as n0
-							left outer join public.clinicalcode_ontologytagedge as n1
-								on n0.parent_id = n1.child_id
-						 where n0.child_id = any(%(node_ids)s)
-						union
-						select
-									n2.parent_id,
-									ancestry.child_id,
-									ancestry.trg,
-									ancestry.depth + 1 as depth,
-									n2.parent_id || ancestry.path
-							from ancestry
-							join public.clinicalcode_ontologytagedge as n2
-								on n2.child_id = ancestry.parent_id
-					),
 					selected as (
 						select *
 							from public.clinicalcode_ontologytag as node
 						 where node.id = any(%(node_ids)s)
 					),
-					root_path as (
-						select path.*
-							from ancestry as path
-							join (
-								select
-											trg,
-											min(depth) as depth
-									from ancestry
-								 group by trg
-							) as roots
-								on (roots.depth = path.depth and roots.trg = path.trg)
-					),
 					root_nodes as (
 						select
 									sel.id,
@@ -745,10 +710,11 @@ class OntologyTag(node_factory(OntologyTagEdge)):
 										order by node.id asc
 									) as tree
 							from selected as sel
-							join root_path as path
-								on path.trg = sel.id
+							join public.clinicalcode_ontologytagclosure as path
+								on path.descendant_id = sel.id
+							 and path.depth = 1
 							join public.clinicalcode_ontologytag as node
-								on node.id = path.parent_id
+								on node.id = path.ancestor_id
 						 group by sel.id
 					),
 					child_nodes as (
@@ -1207,6 +1173,56 @@ class OntologyTag(node_factory(OntologyTagEdge)):
 
 		return list(nodes.annotate(value=F('id')).values('name', 'value'))
 
+	@classmethod
+	def get_detailed_source_values(cls, node_ids, type_ids, default=None):
+		"""
+			Batched variant of `get_detailed_source_value()`, resolves the ontology
+			data of several node id lists in a single query
+
+			Args:
+				node_ids (int[][]): a list containing each list of node ids
+
+				type_ids (int): the ontology type ids
+
+				default (any|None): the default value of each unresolved item
+
+			Returns:
+				A list, in the same order as the `node_ids` parameter, containing either
+					(a) the default value if we're unable to resolve the data, or (b) a
+					list of objects containing the sourced value data
+
+		"""
+		node_ids = [
+			gen_utils.try_value_as_type(x, 'int_array', loose_coercion=True, strict_elements=False, default=None)
+			for x in node_ids
+		]
+		type_ids = gen_utils.try_value_as_type(type_ids, 'int_array', loose_coercion=True, strict_elements=False, default=None)
+
+		if type_ids is None or len(type_ids) < 1:
+			return [default for x in node_ids]
+
+		nodes = set().union(*[x for x in node_ids if x])
+		if len(nodes) > 0:
+			nodes = list(
+				OntologyTag.objects.filter(id__in=list(nodes), type_id__in=type_ids) \
+					.annotate(value=F('id')) \
+					.values('name', 'value')
+			)
+		else:
+			nodes = []
+
+		results = []
+		for ids in node_ids:
+			if ids is None or len(ids) < 1:
+				results.append(default)
+				continue
+
+			ids = set(ids)
+			values = [node for node in nodes if node.get('value') in ids]
+			results.append(values if len(values) > 0 else default)
+
+		return results
+
 
 	@classmethod
 	def query_typeahead(cls, searchterm = '', type_ids=None, result_limit = TYPEAHEAD_MAX_RESULTS):
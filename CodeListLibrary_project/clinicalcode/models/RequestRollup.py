@@ -0,0 +1,56 @@
+from django.db import models
+
+class RequestRollup(models.Model):
+    """
+        Daily counters of the audited requests, i.e. the `easyaudit_requestevent` table, where each row
+        describes the number of requests made by a single visitor for some (date, brand, entity, kind)
+
+        [!] Note:
+            1. Rows are populated incrementally by the `run_request_rollup` task, see
+               `audit_utils.rollup_request_events()`, they should not be written directly;
+
+            2. `brand` and `entity_id` are empty strings if the request isn't associated with a Brand
+               and/or an entity respectively;
+
+            3. `visitor` is a keyed hash of the user id, or the remote address of anonymous users, salted by month;
+               see `audit_utils.rollup_request_batch()`.
+    """
+    class Kind(models.TextChoices):
+        VIEW = 'view', 'View'
+        API = 'api', 'API'
+        EXPORT = 'export', 'Export'
+
+    id = models.BigAutoField(primary_key=True)
+    date = models.DateField()
+    brand = models.CharField(max_length=250, blank=True, default='')
+    entity_id = models.CharField(max_length=50, blank=True, default='')
+    kind = models.CharField(max_length=10, choices=Kind.choices, default=Kind.VIEW)
+    visitor = models.CharField(max_length=32)
+    hits = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'brand', 'entity_id', 'kind', 'visitor'],
+                name='rr_unq_counter'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'brand'], name='rr_date_brand_idx'),
+            models.Index(fields=['entity_id', 'date'], name='rr_entity_date_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.date}/{self.brand}/{self.entity_id}/{self.kind}: {self.hits}'
+
+
+class RequestRollupState(models.Model):
+    """
+        Records the id of the last `easyaudit_requestevent` row consumed by the `RequestRollup` task
+    """
+    id = models.IntegerField(primary_key=True, default=1, editable=False)
+    last_request_id = models.BigIntegerField(default=0)
+    modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'RequestRollupState<last: {self.last_request_id}>'
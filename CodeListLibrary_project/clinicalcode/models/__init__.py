@@ -43,6 +43,9 @@ from .MESH_CODES import MESH_CODES
 from .Template import Template
 from .GenericEntity import GenericEntity
 from .PublishedGenericEntity import PublishedGenericEntity
+from .EntityConceptLink import EntityConceptLink
+from .CodeEntityLink import CodeEntityLink
+from .RequestRollup import RequestRollup, RequestRollupState
 from .Organisation import (
   Organisation, 
   OrganisationMembership, 
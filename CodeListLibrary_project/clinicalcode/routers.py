@@ -0,0 +1,121 @@
+"""Database routers & read replica selection."""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+"""
+    Describes the replica state of the current request or task, where:
+        - `None`: reads are never routed to the replica;
+        - `{ 'pinned': False }`: reads are routed to the replica;
+        - `{ 'pinned': True }`: a write has occurred & all subsequent reads are routed to the primary.
+"""
+_replica_state = ContextVar('cll_replica_state', default=None)
+
+
+def get_replica_alias():
+    """
+    Resolves the alias of the read replica, if one is configured & enabled
+
+    Returns:
+        Either (a) the (str) replica alias; or (b) a `None` value if reads must target the primary
+
+    """
+    if settings.CLL_READ_ONLY or settings.IS_INSIDE_GATEWAY:
+        return None
+
+    alias = getattr(settings, 'DATABASE_REPLICA_ALIAS', None)
+    if alias is None or alias not in settings.DATABASES:
+        return None
+    return alias
+
+
+def get_read_alias():
+    """
+    Resolves the database alias that should serve reads within the current context
+
+    Returns:
+        The (str) database alias, _i.e._ either the replica or the primary
+
+    """
+    state = _replica_state.get()
+    if state is None or state.get('pinned'):
+        return DEFAULT_DB_ALIAS
+
+    alias = get_replica_alias()
+    if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    return alias
+
+
+def get_read_connection():
+    """
+    Resolves the connection that should be used by raw, read-only SQL queries within the current context
+
+    Returns:
+        The (BaseDatabaseWrapper) connection of the alias resolved by `get_read_alias()`
+
+    """
+    return connections[get_read_alias()]
+
+
+def enable_read_replica():
+    """
+    Routes subsequent reads within the current context to the replica, if configured
+
+    Returns:
+        The (Token) used to restore the previous state through `reset_read_replica()`
+
+    """
+    return _replica_state.set({ 'pinned': False })
+
+
+def reset_read_replica(token):
+    """
+    Restores the replica state preceding the associated `enable_read_replica()` call
+
+    Args:
+        token (Token): the token returned by `enable_read_replica()`
+
+    """
+    _replica_state.reset(token)
+
+
+@contextmanager
+def use_read_replica():
+    """
+    Routes reads to the replica, if configured, for the duration of the context
+
+    .. Note::
+        Reads fall back to the primary inside of write transactions, and for the remainder of the context once a write occurs.
+
+    """
+    token = enable_read_replica()
+    try:
+        yield
+    finally:
+        reset_read_replica(token)
+
+
+class ReadReplicaRouter:
+    """
+    Routes reads to the replica within a `use_read_replica()` context, and all writes & migrations to the primary
+    """
+    def db_for_read(self, model, **hints):
+        return get_read_alias()
+
+    def db_for_write(self, model, **hints):
+        # Pin subsequent reads to the primary to avoid reading stale rows from a lagging replica
+        state = _replica_state.get()
+        if state is not None:
+            state['pinned'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == getattr(settings, 'DATABASE_REPLICA_ALIAS', None):
+            return False
+        return None
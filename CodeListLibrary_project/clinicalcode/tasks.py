@@ -5,7 +5,7 @@ from django.core import management
 from django.core.mail import EmailMultiAlternatives, BadHeaderError
 from django.test.client import RequestFactory
 
-from clinicalcode.entity_utils import stats_utils, email_utils, gen_utils, oc_utils
+from clinicalcode.entity_utils import stats_utils, email_utils, gen_utils, oc_utils, audit_utils
 
 @shared_task(bind=True)
 def send_message_test(self):
@@ -92,3 +92,18 @@ def run_opencodelist_sync(self):
     """
     oc_utils.sync_opencodelist_phenotypes()
     return True
+
+@shared_task(bind=True)
+def run_request_rollup(self):
+    """
+      Incrementally rolls up the request audit table into the daily request counters, should be scheduled every few minutes
+    """
+    logger = get_task_logger('cll')
+    try:
+        consumed = audit_utils.rollup_request_events()
+    except Exception as e:
+        logger.warning(f'Unable to run request rollup job, got error {e}')
+        return False
+    else:
+        logger.info(f'Successfully rolled up {consumed or 0} request(s)')
+        return True
@@ -72,7 +72,7 @@ def get_url(desired, ref):
     if matching is not None:
         return matching, False
     
-    resolver_items = {v[1].replace(re.sub('(\w+(?:$|\/))+', '', v[1]), ''):[k, v[1]] for k, v in urls.get_resolver(None).reverse_dict.items()}
+    resolver_items = {v[1].replace(re.sub('(\w+(?:$|\/))+', '', v[1]), ''):[k, v[1]] for k, v in urls.get_resolver(urls.get_urlconf()).reverse_dict.items()}
     resolvers = [{'key': k, 'ratio': SequenceMatcher(None, k, ref).ratio()} for k in resolver_items]
     sort_fn = cmp_to_key(sort_ratio_list)
     resolvers.sort(key=sort_fn)
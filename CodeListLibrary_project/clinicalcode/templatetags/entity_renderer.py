@@ -3,11 +3,12 @@ from django import template
 from datetime import datetime
 from django.apps import apps
 from django.conf import settings
+from django.core.cache import cache
 from django.urls import reverse
 from django.db.models import Model
 from django.utils.html import _json_script_escapes as json_script_escapes
 from jinja2.exceptions import TemplateSyntaxError, FilterArgumentError
-from django.template.loader import render_to_string
+from django.template.loader import render_to_string, get_template
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 
@@ -536,7 +537,7 @@ def truncate(value, lim=10, ending=None):
 
 
 @register.simple_tag(name='render_field_value')
-def render_field_value(entity, layout, field, through=None, default=''):
+def render_field_value(entity, layout, field, through=None, default='', hydrated=None):
     """
         Responsible for rendering fields after transforming them using their respective layouts, such that:
             - In the case of `type` (in this case, phenotype clinical types) where `pk__eq=1` would be "_Disease or Syndrome_" instead of returning the `pk`, it would return the field's string representation from either (a) its source or (b) the options parameter;
@@ -549,6 +550,7 @@ def render_field_value(entity, layout, field, through=None, default=''):
             field            (str): the name of the field to resolve
             through     (str|None): optionally specify the through field target, if applicable; defaults to `None`
             default          (Any): optionally specify the default value; defaults to an empty (str) `''`
+            hydrated   (dict|None): optionally specify the entity's values resolved by `search_utils.hydrate_search_results()`
 
         Returns:
             The renderable (str) value resolved from this entity's field value 
@@ -567,7 +569,11 @@ def render_field_value(entity, layout, field, through=None, default=''):
         return default
     
     if field_type == 'enum' or field_type == 'int':
-        output = template_utils.get_template_data_values(entity, layout, field, default=None)
+        if isinstance(hydrated, dict) and field in hydrated:
+            output = hydrated.get(field)
+        else:
+            output = template_utils.get_template_data_values(entity, layout, field, default=None)
+
         if output is not None and len(output) > 0:
             return template_utils.try_get_content(output[0], 'name')
     elif field_type == 'int_array':
@@ -586,7 +592,7 @@ def render_field_value(entity, layout, field, through=None, default=''):
 
 
 @register.simple_tag(name='renderable_field_values')
-def renderable_field_values(entity, layout, field):
+def renderable_field_values(entity, layout, field, hydrated=None):
     """
         Gets the field's value from an entity, compares it with it's expected layout (per the template), and returns
         a list of values that relate to that field;  _e.g._ in the case of CodingSystems it would return `[{name: 'ICD-10', value: 1}]` where `value` is the PK
@@ -595,10 +601,14 @@ def renderable_field_values(entity, layout, field):
             entity (GenericEntity): some entity from which to resolve the field value
             layout          (dict): the entity's template data
             field            (str): the name of the field to resolve
+            hydrated   (dict|None): optionally specify the entity's values resolved by `search_utils.hydrate_search_results()`
 
         Returns:
             The resolved (Any)-typed value from the entity's field
     """
+    if isinstance(hydrated, dict) and field in hydrated:
+        return hydrated.get(field)
+
     info = template_utils.get_template_field_info(layout, field)
     if info.get('is_metadata'):
         # handle metadata e.g. collections, tags etc
@@ -783,15 +793,23 @@ class EntityCardsNode(template.Node):
         entities = context['page_obj'].object_list
         layouts = context['layouts']
 
+        # Resolve the sourced values of every card in bulk
+        hydrated = context.get('hydrated')
+        if hydrated is None:
+            hydrated = search_utils.hydrate_search_results(entities, layouts)
+
+        cards = { }
         output = ''
         for entity in entities:
-            layout = template_utils.try_get_content(layouts, f'{entity.template.id}/{entity.template_version}')
+            layout = template_utils.try_get_content(layouts, f'{entity.template_id}/{entity.template_version}')
             if not template_utils.is_layout_safe(layout):
                 continue
 
             card = template_utils.try_get_content(layout['definition'].get('template_details'), 'card_type', constants.DEFAULT_CARD)
-            card = f'{constants.CARDS_DIRECTORY}/{card}.html'
-            output += render_to_string(card, { 'entity': entity, 'layout': layout })
+            if card not in cards:
+                cards[card] = get_template(f'{constants.CARDS_DIRECTORY}/{card}.html')
+
+            output += cards[card].render({ 'entity': entity, 'layout': layout, 'hydrated': hydrated.get(entity.history_id) })
         return output
 
 
@@ -974,7 +992,15 @@ class EntityFiltersNode(template.Node):
         layouts = context.get('layouts', None)
         if layouts is None:
             return ''
-        
+
+        # The rendered panel only varies by brand, entity type & template version
+        current_brand = self.request.CURRENT_BRAND or 'ALL'
+        cache_key = search_utils.get_filter_panel_cache_key(current_brand, entity_type, layouts)
+        if cache_key is not None:
+            output = cache.get(cache_key)
+            if isinstance(output, str):
+                return output
+
         is_single_search = entity_type is None
 
         # Render metadata
@@ -984,6 +1010,9 @@ class EntityFiltersNode(template.Node):
         if not is_single_search:
             output = self.__generate_template_filters(context, output, layouts)
 
+        if cache_key is not None:
+            cache.set(cache_key, str(output), constants.FILTER_PANEL_CACHE_TIMEOUT)
+
         return output
 
 
@@ -0,0 +1,75 @@
+from django.urls import reverse
+from django.http import HttpRequest
+from django.contrib.auth.models import AnonymousUser
+
+import pytest
+
+from clinicalcode.entity_utils import permission_utils
+
+@pytest.mark.django_db(reset_sequences=True, transaction=True)
+class TestAnonymousAccess:
+
+    def __build_http_request(self):
+        request = HttpRequest()
+        request.user = AnonymousUser()
+        request.method = 'GET'
+        request.session = { }
+        setattr(request, 'BRAND_OBJECT', {})
+        setattr(request, 'CURRENT_BRAND', '')
+
+        return request
+
+    def __get_published_entity(self, generate_entity_session):
+        entity = generate_entity_session['entities'].get('APPROVED').get('entity')
+        return entity, entity.history.first().history_id
+
+    @pytest.mark.unit_test
+    def test_accessible_entity_history(self, generate_entity_session):
+        entity, history_id = self.__get_published_entity(generate_entity_session)
+
+        dataset = permission_utils.get_accessible_entity_history(self.__build_http_request(), entity.id, history_id)
+
+        assert isinstance(dataset, dict)
+        assert dataset.get('latest_history_id') == history_id
+        assert dataset.get('is_last_approved') is True
+        assert history_id in dataset.get('published_ids')
+        assert [x.get('history_id') for x in dataset.get('entities')] == [history_id]
+
+    @pytest.mark.unit_test
+    def test_accessible_entities(self, generate_entity_session):
+        entity, history_id = self.__get_published_entity(generate_entity_session)
+        assert permission_utils.refresh_accessible_entities()
+
+        entities = generate_entity_session['entities']
+        results = permission_utils.get_accessible_entities(self.__build_http_request())
+
+        assert list(results.values_list('history_id', flat=True)) == [history_id]
+        assert entities.get('PENDING').get('entity').id not in results.values_list('id', flat=True)
+
+    @pytest.mark.unit_test
+    def test_anonymous_detail_page(self, client, generate_entity_session):
+        entity, history_id = self.__get_published_entity(generate_entity_session)
+        assert permission_utils.refresh_accessible_entities()
+
+        response = client.get(reverse('entity_history_detail', kwargs={ 'pk': entity.id, 'history_id': history_id }))
+        assert response.status_code == 200
+
+    @pytest.mark.unit_test
+    def test_refresh_only_on_accessibility_change(self, monkeypatch, generate_entity_session):
+        refreshed = []
+        monkeypatch.setattr(permission_utils, 'refresh_accessible_entities', lambda: refreshed.append(True))
+
+        entity, _ = self.__get_published_entity(generate_entity_session)
+
+        # Drafts & autosaves don't affect the accessible entities
+        entity.name = 'Renamed entity'
+        entity.save()
+        assert len(refreshed) == 0
+
+        entity.is_deleted = True
+        entity.save()
+        assert len(refreshed) == 1
+
+        published = generate_entity_session['entities'].get('APPROVED').get('published_entity')
+        published.save()
+        assert len(refreshed) == 2
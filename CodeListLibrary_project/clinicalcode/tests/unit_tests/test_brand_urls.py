@@ -0,0 +1,68 @@
+from types import SimpleNamespace, ModuleType
+from django.urls import resolve, reverse, set_urlconf, Resolver404
+
+import pytest
+
+from cll.urls import build_urlpatterns, get_brand_urlconf, clear_brand_urlconfs
+
+class TestBrandUrls:
+
+    def teardown_method(self):
+        set_urlconf(None)
+        clear_brand_urlconfs()
+
+    @pytest.mark.unit_test
+    def test_default_urlconf_is_reused(self):
+        urlconf = get_brand_urlconf(read_only=False)
+
+        assert get_brand_urlconf(read_only=False) is urlconf
+        assert get_brand_urlconf(read_only=True) is not urlconf
+        assert isinstance(urlconf.urlpatterns, tuple)
+
+        clear_brand_urlconfs()
+        assert get_brand_urlconf(read_only=False) is not urlconf
+
+    @pytest.mark.unit_test
+    def test_branded_patterns(self):
+        brand = SimpleNamespace(name='HDRN')
+        patterns = build_urlpatterns(brand=brand, read_only=False)
+        urlconf = ModuleType('urls')
+        urlconf.urlpatterns = patterns
+
+        match = resolve('/HDRN/concepts/PH1/detail/', urlconf=urlconf)
+        assert match.url_name == 'entity_detail'
+
+        with pytest.raises(Resolver404):
+            resolve('/HDRN/phenotypes/PH1/detail/', urlconf=urlconf)
+
+    @pytest.mark.unit_test
+    def test_prod_site_patterns_are_unprefixed(self):
+        brand = SimpleNamespace(name='HDRUK')
+        patterns = build_urlpatterns(brand=brand, is_prod_site=True, read_only=False)
+        urlconf = ModuleType('urls')
+        urlconf.urlpatterns = patterns
+
+        match = resolve('/phenotypes/PH1/detail/', urlconf=urlconf)
+        assert match.url_name == 'entity_detail'
+
+    @pytest.mark.unit_test
+    def test_read_only_patterns_exclude_admin(self):
+        urlconf = get_brand_urlconf(read_only=True)
+        set_urlconf(urlconf)
+
+        assert reverse('search_entities') == '/phenotypes/'
+        with pytest.raises(Resolver404):
+            resolve('/admin/', urlconf=urlconf)
+
+    @pytest.mark.unit_test
+    def test_read_only_patterns_exclude_write_routes(self):
+        writable = get_brand_urlconf(read_only=False)
+        assert resolve('/api/v1/phenotypes/create/', urlconf=writable).url_name == 'create_generic_entity'
+        assert resolve('/admin/run-stats/', urlconf=writable).url_name == 'run_entity_statistics'
+
+        read_only = get_brand_urlconf(read_only=True)
+        with pytest.raises(Resolver404):
+            resolve('/api/v1/phenotypes/create/', urlconf=read_only)
+
+        with pytest.raises(Resolver404):
+            resolve('/admin/run-stats/', urlconf=read_only)
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import pytest
+
+from clinicalcode.entity_utils import cache_utils
+
+class TestCacheUtils:
+
+    @pytest.mark.unit_test
+    def test_compressed_roundtrip(self):
+        value = [{ 'id': 1, 'code': 'C10..', 'attributes': None, 'concept_history_date': datetime(2024, 1, 1) }]
+        payload = cache_utils.compress_value(value)
+
+        assert isinstance(payload, bytes)
+        assert cache_utils.decompress_value(payload) == value
+        assert cache_utils.decompress_value(b'malformed', default=False) is False
+
+    @pytest.mark.unit_test
+    def test_lru_is_size_bounded(self):
+        lru = cache_utils.LRUCache(max_size=10)
+        lru.set('a', b'1234')
+        lru.set('b', b'1234')
+        lru.get('a')
+        lru.set('c', b'1234')
+
+        assert lru.get('a') == b'1234'
+        assert lru.get('b') is None
+        assert lru.get('c') == b'1234'
+        assert lru.size == 8
+
+        lru.set('d', b'01234567890')
+        assert lru.get('d') is None
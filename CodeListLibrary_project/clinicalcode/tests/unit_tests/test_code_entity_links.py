@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+from rest_framework.test import APIRequestFactory
+
+import pytest
+
+from clinicalcode.api.views import Code
+from clinicalcode.models.Brand import Brand
+from clinicalcode.models.CodingSystem import CodingSystem
+from clinicalcode.models.GenericEntity import GenericEntity
+from clinicalcode.models.CodeEntityLink import CodeEntityLink
+from clinicalcode.entity_utils import concept_utils, constants
+
+@pytest.mark.django_db
+class TestCodeEntityLinks:
+
+    @pytest.mark.unit_test
+    def test_failed_refresh_is_logged(self, monkeypatch, caplog, django_capture_on_commit_callbacks):
+        def refresh(entity_ids):
+            raise RuntimeError('refresh failed')
+
+        monkeypatch.setattr(concept_utils, 'refresh_code_entity_links', refresh)
+
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            concept_utils.invalidate_code_entity_links(None, SimpleNamespace(entity_id='PH1'))
+
+        assert len(callbacks) == 1
+        assert 'Entity<id: PH1>' in caplog.text
+
+@pytest.mark.django_db(reset_sequences=True, transaction=True)
+class TestCodePhenotypes:
+
+    def __refresh_links(self, monkeypatch, generate_entity_session):
+        monkeypatch.setattr(
+            concept_utils,
+            'get_concept_codelists',
+            lambda concepts, **kwargs: { x: [{ 'code': 'C10' }, { 'code': 'C11' }] for x in concepts }
+        )
+
+        entities = generate_entity_session['entities']
+        created = concept_utils.refresh_code_entity_links([x.get('entity').id for x in entities.values()])
+        return entities.get('APPROVED').get('entity'), created
+
+    def __get_phenotypes(self, code, codes=None, brand=None, coding_system_id=None):
+        if coding_system_id is None:
+            coding_system_id = CodingSystem.objects.get(name='Some system').id
+
+        request = APIRequestFactory().get(
+            f'/api/v1/codes/{coding_system_id}/{code}/phenotypes/',
+            { 'codes': codes } if codes is not None else { }
+        )
+
+        if brand is not None:
+            request.CURRENT_BRAND = brand
+        return Code.get_code_phenotypes(request, coding_system_id=str(coding_system_id), code=code)
+
+    def __get_results(self, response):
+        return {
+            x.get('code'): [y.get('phenotype_id') for y in x.get('phenotypes')]
+            for x in response.data.get('results')
+        }
+
+    @pytest.mark.unit_test
+    def test_links_published_entities(self, monkeypatch, generate_entity_session):
+        entity, created = self.__refresh_links(monkeypatch, generate_entity_session)
+
+        assert created == 2
+        assert set(CodeEntityLink.objects.values_list('entity_id', flat=True)) == { entity.id }
+        assert sorted(CodeEntityLink.objects.values_list('code', flat=True)) == ['C10', 'C11']
+
+        # Refreshing replaces, rather than duplicates, the entity's links
+        assert concept_utils.refresh_code_entity_links(entity.id) == 2
+        assert CodeEntityLink.objects.count() == 2
+
+    @pytest.mark.unit_test
+    def test_lookup_published_phenotypes(self, monkeypatch, generate_entity_session):
+        entity, _ = self.__refresh_links(monkeypatch, generate_entity_session)
+
+        response = self.__get_phenotypes('C10', codes='C11,C99')
+        assert response.status_code == 200
+        assert self.__get_results(response) == { 'C10': [entity.id], 'C11': [entity.id], 'C99': [] }
+
+    @pytest.mark.unit_test
+    def test_lookup_excludes_deleted_phenotypes(self, monkeypatch, generate_entity_session):
+        entity, _ = self.__refresh_links(monkeypatch, generate_entity_session)
+        GenericEntity.objects.filter(pk=entity.id).update(is_deleted=True)
+
+        response = self.__get_phenotypes('C10')
+        assert self.__get_results(response) == { 'C10': [] }
+
+    @pytest.mark.unit_test
+    def test_lookup_is_scoped_by_brand(self, monkeypatch, generate_entity_session):
+        entity, _ = self.__refresh_links(monkeypatch, generate_entity_session)
+        brand = Brand.objects.create(name='HDRN', logo_path='')
+
+        assert self.__get_results(self.__get_phenotypes('C10', brand='HDRN')) == { 'C10': [] }
+
+        GenericEntity.objects.filter(pk=entity.id).update(brands=[brand.id])
+        assert self.__get_results(self.__get_phenotypes('C10', brand='HDRN')) == { 'C10': [entity.id] }
+
+    @pytest.mark.unit_test
+    def test_lookup_is_capped(self, generate_entity_session):
+        codes = ','.join(f'C{x}' for x in range(constants.CODE_LOOKUP_MAX_CODES))
+
+        response = self.__get_phenotypes('C', codes=codes)
+        assert response.status_code == 400
+        assert str(constants.CODE_LOOKUP_MAX_CODES) in response.data.get('message')
+
+    @pytest.mark.unit_test
+    def test_lookup_unknown_coding_system(self):
+        response = self.__get_phenotypes('C10', coding_system_id=0)
+        assert response.status_code == 404
@@ -0,0 +1,39 @@
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+import pytest
+
+from clinicalcode.models.CodingSystem import CodingSystem
+from clinicalcode.management.commands.build_code_search_indexes import Command
+
+@pytest.mark.django_db
+class TestCodeSearchIndexes:
+
+    def __create_coding_system(self, name, codingsystem_id):
+        return CodingSystem.objects.create(
+            name=name,
+            codingsystem_id=codingsystem_id,
+            link='',
+            database_connection_name='',
+            table_name='clinicalcode_tag',
+            code_column_name='description',
+            desc_column_name='description',
+        )
+
+    @pytest.mark.unit_test
+    def test_selects_coding_systems_by_pk_or_name(self, monkeypatch):
+        icd10 = self.__create_coding_system('ICD10 codes', 999)
+        readv2 = self.__create_coding_system('Read codes v2', 998)
+        self.__create_coding_system('SNOMED CT codes', icd10.id)
+
+        selected = []
+        def get_index_targets(command, coding_systems):
+            selected.extend(coding_systems)
+            return { }
+
+        # Stop before any index is built, i.e. once the coding systems have been resolved
+        monkeypatch.setattr(Command, '_Command__get_index_targets', get_index_targets)
+        with pytest.raises(CommandError):
+            call_command('build_code_search_indexes', '--coding-system', str(icd10.id), '--coding-system', ' read CODES v2 ')
+
+        assert selected == [icd10, readv2]
@@ -0,0 +1,36 @@
+import pytest
+
+from clinicalcode.entity_utils import search_utils
+
+class TestCodelistPattern:
+
+    @pytest.mark.unit_test
+    @pytest.mark.parametrize('pattern', [
+        '^C10.*', '(C10|C11).*', '^C1[0-9]{2}$',
+        '^[A-Z]\\d{2}', '^[A-Z][0-9]{2}\\.\\d', '[A-Z]+', '^\\d{8}$',
+    ])
+    def test_valid_pattern(self, pattern):
+        valid, message = search_utils.validate_codelist_pattern(pattern)
+
+        assert valid is True
+        assert message is None
+
+    @pytest.mark.unit_test
+    @pytest.mark.parametrize('pattern', [
+        '', '.*', '.+', '^', '(C10)?', '\\w+', '[\\w.-]', '^.{1,}$',
+        '(a+)+', '(a{1,3})*', '(C1)\\1', '(C10', 'C' * 1024,
+    ])
+    def test_refused_pattern(self, pattern):
+        valid, message = search_utils.validate_codelist_pattern(pattern)
+
+        assert valid is False
+        assert isinstance(message, str)
+
+    @pytest.mark.unit_test
+    @pytest.mark.parametrize('term,use_wildcard,expected', [
+        ('wildcard: ^C10.*', False, '^C10.*'),
+        ('^C10.*', True, '^C10.*'),
+        ('C10', False, None),
+    ])
+    def test_search_pattern(self, term, use_wildcard, expected):
+        assert search_utils.get_codelist_search_pattern(term, use_wildcard=use_wildcard) == expected
@@ -0,0 +1,66 @@
+import pytest
+
+from clinicalcode.models.Code import Code
+from clinicalcode.models.Concept import Concept
+from clinicalcode.models.CodeList import CodeList
+from clinicalcode.models.Component import Component
+from clinicalcode.models.ConceptCodeAttribute import ConceptCodeAttribute
+from clinicalcode.entity_utils import create_utils, model_utils, constants
+
+@pytest.mark.django_db(reset_sequences=True, transaction=True)
+class TestComponentCodes:
+
+    def __create_codelist(self, user):
+        concept = Concept.objects.get(name='Some concept')
+        component = Component.objects.create(
+            name='Some component',
+            comment='',
+            component_type=constants.CLINICAL_CODE_SOURCE.SELECT_IMPORT.value,
+            logical_type=constants.CLINICAL_RULE_TYPE.INCLUDE.value,
+            concept=concept,
+            created_by=user
+        )
+        return concept, CodeList.objects.create(component=component, description='')
+
+    @pytest.mark.unit_test
+    def test_bulk_create_with_history(self, monkeypatch, generate_entity_session):
+        monkeypatch.setattr(constants, 'CODE_BULK_BATCH_SIZE', 2)
+
+        user = generate_entity_session['users']['owner_user']
+        concept, codelist = self.__create_codelist(user)
+
+        created = create_utils.bulk_create_component_codes(concept, codelist, [
+            { 'code': ' C10 ', 'description': 'Some code', 'attributes': ['a'] },
+            { 'code': 'C11', 'description': 'Some other code' },
+            { 'code': 'C12', 'description': '' },
+            { 'code': '  ', 'description': 'Blank code' },
+        ], user=user)
+
+        assert created == 3
+        assert sorted(Code.objects.filter(code_list=codelist).values_list('code', flat=True)) == ['C10', 'C11', 'C12']
+        assert sorted(Code.history.filter(code_list=codelist, history_type='+').values_list('code', flat=True)) == ['C10', 'C11', 'C12']
+        assert list(ConceptCodeAttribute.objects.filter(concept=concept).values_list('code', 'attributes')) == [('C10', ['a'])]
+        assert ConceptCodeAttribute.history.filter(concept=concept, history_type='+').count() == 1
+
+    @pytest.mark.unit_test
+    def test_bulk_delete_with_history(self, generate_entity_session):
+        user = generate_entity_session['users']['owner_user']
+        concept, codelist = self.__create_codelist(user)
+        create_utils.bulk_create_component_codes(concept, codelist, [
+            { 'code': x, 'description': '' } for x in ('C10', 'C11', 'C12')
+        ], user=user)
+
+        deleted = model_utils.bulk_delete_with_history(
+            Code.objects.filter(code_list=codelist, code__in=['C10', 'C12']), default_user=user
+        )
+
+        assert deleted == 2
+        assert list(Code.objects.filter(code_list=codelist).values_list('code', flat=True)) == ['C11']
+
+        removed = Code.history.filter(code_list=codelist, history_type='-')
+        assert sorted(removed.values_list('code', flat=True)) == ['C10', 'C12']
+        assert all(x.history_user_id == user.id for x in removed)
+
+        # Deletions must be recorded after the codes were created, i.e. visible to `get_concept_codelist()`
+        created = Code.history.filter(code_list=codelist, history_type='+').latest('history_date')
+        assert all(x.history_date >= created.history_date for x in removed)
@@ -0,0 +1,65 @@
+import pytest
+
+from clinicalcode.models.Tag import Tag
+from clinicalcode.models.CodingSystem import CodingSystem
+from clinicalcode.entity_utils import create_utils, constants
+
+@pytest.mark.django_db(reset_sequences=True, transaction=True)
+class TestConceptValidation:
+
+    def __create_coding_system(self):
+        # Any table with a text column can stand in for a code table
+        return CodingSystem.objects.create(
+            name='Some system',
+            link='',
+            database_connection_name='',
+            table_name='clinicalcode_tag',
+            code_column_name='description',
+            desc_column_name='description',
+        )
+
+    def __build_form(self, coding_system, codes):
+        return {
+            'is_new': True,
+            'details': { 'name': 'Some concept', 'coding_system': coding_system.id },
+            'components': [{
+                'is_new': True,
+                'name': 'Some component',
+                'logical_type': 'INCLUDE',
+                'source_type': 'SELECT_IMPORT',
+                'codes': [{ 'code': code, 'description': '' } for code in codes],
+            }],
+        }
+
+    @pytest.mark.unit_test
+    def test_get_unknown_codes(self):
+        coding_system = self.__create_coding_system()
+        Tag.objects.create(description='C10')
+        Tag.objects.create(description='C11')
+
+        unknown = create_utils.get_unknown_codes(coding_system, ['C10', 'C11', 'C12', 'C12'])
+        assert unknown == ['C12']
+
+    @pytest.mark.unit_test
+    def test_unknown_codes_are_capped(self):
+        coding_system = self.__create_coding_system()
+        codes = [f'X{i:03d}' for i in range(constants.CODE_VALIDATION_MAX_REPORTED + 5)]
+
+        errors = []
+        assert create_utils.validate_concept_form(self.__build_form(coding_system, codes), errors, validate_codes=True) is None
+        assert len(errors) == 1
+
+        message = errors[0]
+        assert f'{len(codes)} code(s) do not exist' in message
+        assert message.endswith(f'{codes[constants.CODE_VALIDATION_MAX_REPORTED - 1]} and 5 more')
+        assert codes[constants.CODE_VALIDATION_MAX_REPORTED] not in message
+
+    @pytest.mark.unit_test
+    def test_known_codes_are_valid(self):
+        coding_system = self.__create_coding_system()
+        Tag.objects.create(description='C10')
+
+        errors = []
+        result = create_utils.validate_concept_form(self.__build_form(coding_system, ['C10']), errors, validate_codes=True)
+        assert errors == []
+        assert [x.get('code') for x in result.get('components')[0].get('codes')] == ['C10']
@@ -0,0 +1,49 @@
+from rest_framework.test import APIRequestFactory
+
+import pytest
+
+from clinicalcode.models.Tag import Tag
+from clinicalcode.models.CodingSystem import CodingSystem
+from clinicalcode.models.GenericEntity import GenericEntity
+from clinicalcode.entity_utils import api_utils
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {
+        'default': { 'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-entity-detail-batch' },
+    }
+
+@pytest.mark.django_db(reset_sequences=True, transaction=True)
+class TestEntityDetailBatch:
+
+    @pytest.mark.unit_test
+    def test_matches_entity_detail(self, locmem_cache, generate_entity_session):
+        user = generate_entity_session['users']['owner_user']
+        system = CodingSystem.objects.get(name='Some system')
+        tag = Tag.objects.create(description='Some tag', tag_type=Tag.tag)
+
+        # Vary the sourced metadata & template values across the entities
+        for index, record in enumerate(generate_entity_session['entities'].values()):
+            entity = record.get('entity')
+            entity.tags = [tag.id] if index % 2 == 0 else None
+            entity.template_data = entity.template_data | {
+                'type': str(index % 3 + 1),
+                'coding_system': [system.id] if index % 2 == 1 else [],
+            }
+            entity.save()
+
+        request = APIRequestFactory().get('/api/v1/phenotypes/')
+        request.user = user
+        request.CURRENT_BRAND = ''
+
+        entities = [
+            GenericEntity.history.filter(id=x.get('entity').id).order_by('-history_id').first()
+            for x in generate_entity_session['entities'].values()
+        ]
+
+        expected = [
+            api_utils.get_entity_detail(request, entity.id, entity, True, return_data=True)
+            for entity in entities
+        ]
+
+        assert api_utils.get_entity_detail_batch(request, entities, True) == expected
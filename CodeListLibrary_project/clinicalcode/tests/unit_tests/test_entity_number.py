@@ -0,0 +1,131 @@
+from importlib import import_module
+from django.db import connection
+from django.test import RequestFactory
+from django.contrib.auth.models import Group
+from rest_framework.test import APIRequestFactory
+
+import pytest
+
+from clinicalcode.views import adminTemp
+from clinicalcode.api.views import GenericEntity as GenericEntityApi
+from clinicalcode.models.QueuedDOI import QueuedDOI
+from clinicalcode.models.GenericEntity import GenericEntity
+from clinicalcode.models.PublishedGenericEntity import PublishedGenericEntity
+from clinicalcode.entity_utils import api_utils, search_utils, constants
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {
+        'default': { 'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-entity-number' },
+    }
+
+@pytest.mark.django_db(reset_sequences=True, transaction=True)
+class TestEntityNumber:
+
+    def __create_entities(self, template, user, ids):
+        entities = []
+        for entity_id in ids:
+            entity = GenericEntity(
+                id=entity_id,
+                name=f'TEST_{entity_id}',
+                author=user.username,
+                template=template,
+                template_version=template.template_version,
+                template_data={},
+                publish_status=constants.APPROVAL_STATUS.APPROVED.value,
+                world_access=constants.WORLD_ACCESS_PERMISSIONS.VIEW,
+                created_by=user,
+                owner=user
+            )
+            entity.save(ignore_increment=True)
+            entities.append(entity)
+        return entities
+
+    def __get_entities(self, **params):
+        request = APIRequestFactory().get('/api/v1/phenotypes/', params)
+        return GenericEntityApi.get_generic_entities(request).data
+
+    @pytest.mark.unit_test
+    def test_set_on_save(self, generate_entity):
+        generate_entity.save()
+
+        assert generate_entity.entity_number == int(generate_entity.id.replace('PH', ''))
+        assert GenericEntity.history.filter(id=generate_entity.id).first().entity_number == generate_entity.entity_number
+
+    @pytest.mark.unit_test
+    def test_backfill(self, template, generate_user):
+        self.__create_entities(template, generate_user['owner_user'], ['PH12', 'PH3'])
+        GenericEntity.objects.update(entity_number=None)
+        GenericEntity.history.update(entity_number=None)
+
+        migration = import_module('clinicalcode.migrations.0142_genericentity_entity_number').Migration
+        with connection.cursor() as cursor:
+            cursor.execute(migration.operations[-1].sql)
+
+        assert dict(GenericEntity.objects.values_list('id', 'entity_number')) == { 'PH12': 12, 'PH3': 3 }
+        assert dict(GenericEntity.history.values_list('id', 'entity_number')) == { 'PH12': 12, 'PH3': 3 }
+
+    @pytest.mark.unit_test
+    def test_search_ordering(self, template, generate_user):
+        self.__create_entities(template, generate_user['owner_user'], ['PH10', 'PH9', 'PH100'])
+
+        results = search_utils.reorder_search_results(GenericEntity.history.all())
+        assert [x.id for x in results] == ['PH9', 'PH10', 'PH100']
+
+    @pytest.mark.unit_test
+    def test_api_ordering(self, monkeypatch, locmem_cache, template, generate_user):
+        monkeypatch.setattr(constants, 'PAGE_RESULTS_SIZE', { '1': 2 })
+        monkeypatch.setattr(api_utils, 'get_entity_detail_batch', lambda request, entities, *args, **kwargs: [x.id for x in entities])
+
+        self.__create_entities(template, generate_user['owner_user'], ['PH10', 'PH9', 'PH100', 'PH2'])
+        assert self.__get_entities(page=1).get('data') == ['PH2', 'PH9']
+        assert self.__get_entities(page=2).get('data') == ['PH10', 'PH100']
+
+    @pytest.mark.unit_test
+    def test_api_cursor_includes_null_entity_numbers(self, monkeypatch, locmem_cache, template, generate_user):
+        monkeypatch.setattr(constants, 'PAGE_RESULTS_SIZE', { '1': 2 })
+        monkeypatch.setattr(api_utils, 'get_entity_detail_batch', lambda request, entities, *args, **kwargs: [x.id for x in entities])
+
+        self.__create_entities(template, generate_user['owner_user'], ['PH10', 'PH9', 'PH100'])
+        GenericEntity.objects.filter(id='PH100').update(entity_number=None)
+        GenericEntity.history.filter(id='PH100').update(entity_number=None)
+
+        listed, cursor = [], ''
+        while cursor is not None:
+            page = self.__get_entities(cursor=cursor)
+            listed += page.get('data')
+            cursor = page.get('next_cursor')
+
+        assert listed == ['PH100', 'PH9', 'PH10']
+
+    @pytest.mark.unit_test
+    def test_admin_ordering(self, monkeypatch, settings, template, generate_user):
+        settings.DOI_ACTIVE = True
+        settings.CLL_READ_ONLY = False
+
+        user = generate_user['owner_user']
+        user.is_superuser = True
+        user.save()
+        user.groups.add(Group.objects.get_or_create(name='system developers')[0])
+
+        for entity in self.__create_entities(template, user, ['PH10', 'PH9', 'PH100']):
+            PublishedGenericEntity.objects.create(
+                entity=entity,
+                entity_history_id=entity.history.first().history_id,
+                approval_status=constants.APPROVAL_STATUS.APPROVED.value,
+                created_by_id=user.id
+            )
+
+        targets = []
+        def resolve_targets(*args):
+            targets.extend(x.get('id') for x in args)
+            return [], { 'stop': 'Resolved' }
+
+        monkeypatch.setattr(QueuedDOI, 'resolve_targets', resolve_targets)
+        monkeypatch.setattr(adminTemp, 'render', lambda request, template, context: context)
+
+        request = RequestFactory().post('/adminTemp/admin_reg_published/')
+        request.user = user
+        adminTemp.admin_reg_published(request)
+
+        assert targets == ['PH9', 'PH10', 'PH100']
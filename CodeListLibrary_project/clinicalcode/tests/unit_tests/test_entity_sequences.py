@@ -0,0 +1,38 @@
+from django.db import IntegrityError
+
+import pytest
+
+from clinicalcode.models.GenericEntity import GenericEntity
+
+@pytest.mark.django_db(reset_sequences=True, transaction=True)
+class TestEntitySequences:
+
+    @pytest.mark.unit_test
+    def test_reserve_never_rewinds_sequence(self, template):
+        entity_class = template.entity_class
+
+        value = entity_class.allocate_entity_number()
+        entity_class.reserve_entity_number(value + 5)
+        assert entity_class.allocate_entity_number() == value + 6
+
+        entity_class.reserve_entity_number(value)
+        assert entity_class.allocate_entity_number() == value + 7
+
+    @pytest.mark.unit_test
+    def test_new_entity_never_overwrites_existing(self, generate_entity, template):
+        generate_entity.save()
+
+        duplicate = GenericEntity(
+            id=generate_entity.id,
+            name='Duplicate entity',
+            author=generate_entity.author,
+            group=generate_entity.group,
+            template_data=generate_entity.template_data,
+            template=template,
+            template_version=template.template_version
+        )
+
+        with pytest.raises(IntegrityError):
+            duplicate.save(ignore_increment=True)
+
+        assert GenericEntity.objects.get(pk=generate_entity.id).name == generate_entity.name
@@ -0,0 +1,44 @@
+from django.test import RequestFactory
+
+import json
+import pytest
+
+from clinicalcode.entity_utils import api_utils, search_utils
+
+@pytest.mark.django_db
+class TestEntityStreaming:
+
+    def __failing_chunks(self, *args, **kwargs):
+        raise RuntimeError('cursor lost')
+        yield
+
+    @pytest.mark.unit_test
+    def test_interrupted_ndjson_stream_is_not_completed(self, monkeypatch):
+        monkeypatch.setattr(search_utils, 'iterate_query_chunks', self.__failing_chunks)
+
+        response = api_utils.stream_entity_details(
+            RequestFactory().get('/'), 'select 1 as id, 1 as history_id', {}, False, stream_format='ndjson'
+        )
+
+        content = iter(response.streaming_content)
+        record = json.loads(next(content))
+        assert 'error' in record
+
+        with pytest.raises(RuntimeError):
+            next(content)
+
+    @pytest.mark.unit_test
+    def test_interrupted_csv_stream_is_not_completed(self, monkeypatch):
+        monkeypatch.setattr(search_utils, 'iterate_query_chunks', self.__failing_chunks)
+
+        response = api_utils.stream_entity_details(
+            RequestFactory().get('/'), 'select 1 as id, 1 as history_id', {}, False,
+            stream_format='csv', columns=['phenotype_id', 'phenotype_version_id']
+        )
+
+        content = iter(response.streaming_content)
+        assert next(content).decode('utf-8').startswith('phenotype_id,phenotype_version_id')
+        assert next(content).decode('utf-8').startswith('error,')
+
+        with pytest.raises(RuntimeError):
+            next(content)
@@ -0,0 +1,32 @@
+import pytest
+
+from clinicalcode.entity_utils import search_utils
+
+LAYOUTS = {
+    '1/1': { 'id': 1, 'version': 1, 'definition': { } },
+    '1/2': { 'id': 1, 'version': 2, 'definition': { } },
+}
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {
+        'default': { 'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-filter-panels' },
+    }
+
+class TestFilterPanelCache:
+
+    @pytest.mark.unit_test
+    def test_key_varies_by_scope(self, locmem_cache):
+        key = search_utils.get_filter_panel_cache_key('ALL', [1], LAYOUTS)
+
+        assert key == search_utils.get_filter_panel_cache_key('ALL', [1], dict(reversed(LAYOUTS.items())))
+        assert key != search_utils.get_filter_panel_cache_key('HDRUK', [1], LAYOUTS)
+        assert key != search_utils.get_filter_panel_cache_key('ALL', None, LAYOUTS)
+        assert key != search_utils.get_filter_panel_cache_key('ALL', [1], { '1/1': LAYOUTS.get('1/1') })
+
+    @pytest.mark.unit_test
+    def test_invalidation_rotates_version(self, locmem_cache):
+        key = search_utils.get_filter_panel_cache_key('ALL', [1], LAYOUTS)
+        search_utils.invalidate_filter_panels()
+
+        assert key != search_utils.get_filter_panel_cache_key('ALL', [1], LAYOUTS)
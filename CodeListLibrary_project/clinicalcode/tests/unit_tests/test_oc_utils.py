@@ -0,0 +1,83 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import json
+import pytest
+import requests
+import threading
+
+from clinicalcode.entity_utils import oc_utils
+
+class StubHandler(BaseHTTPRequestHandler):
+    ETAG = '"v1"'
+    CODELIST = 'code,term\nC10,Diabetes\nC11,Other\n'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.hits.append((self.path, self.headers.get('If-None-Match')))
+
+        if self.path.startswith('/api/v1/codelist/'):
+            if self.headers.get('If-None-Match') == self.ETAG:
+                self.send_response(304)
+                self.end_headers()
+                return
+
+            body = json.dumps({ 'codelists': [] }).encode('utf-8')
+            self.send_response(200)
+            self.send_header('ETag', self.ETAG)
+        elif self.path.endswith('/download.csv'):
+            body = self.CODELIST.encode('utf-8')
+            self.send_response(200)
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def stub_server(settings):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.hits = []
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    settings.OPENCODELISTS_URL = f'http://127.0.0.1:{server.server_address[1]}'
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+class TestOpenCodelistSync:
+
+    @pytest.mark.unit_test
+    def test_conditional_index_request(self, stub_server, tmp_path):
+        cache = oc_utils.OpenCodelistCache(directory=str(tmp_path))
+        session = requests.Session()
+        url = oc_utils.get_opencodelist_url('/api/v1/codelist/')
+
+        first = oc_utils.query_opencodelist_phenotypes(url, session=session, cache=cache)
+        second = oc_utils.query_opencodelist_phenotypes(url, session=session, cache=cache)
+
+        assert first == second == { 'codelists': [] }
+        assert [x[1] for x in stub_server.hits] == [None, StubHandler.ETAG]
+
+    @pytest.mark.unit_test
+    def test_concurrent_codelist_fetch(self, stub_server, tmp_path):
+        cache = oc_utils.OpenCodelistCache(directory=str(tmp_path))
+        versions = [{ 'full_slug': f'org/list-{i}/v{i}', 'hash': f'h{i}' } for i in range(5)]
+
+        for _ in range(2):
+            codelists = oc_utils.fetch_opencodelist_codelists(
+                versions, session=requests.Session(), cache=cache, max_workers=3
+            )
+
+            assert len(codelists) == len(versions)
+            assert all(x == [{ 'code': 'C10', 'term': 'Diabetes' }, { 'code': 'C11', 'term': 'Other' }] for x in codelists.values())
+
+        # Codelists are keyed by their version hash & are therefore never refetched
+        assert len(stub_server.hits) == len(versions)
@@ -0,0 +1,27 @@
+import pytest
+
+from clinicalcode.entity_utils import search_utils
+
+class TestPaginationCursor:
+
+    @pytest.mark.unit_test
+    @pytest.mark.parametrize('values', [
+        [1, 'PH1'],
+        [123456, 'PH123456'],
+    ])
+    def test_cursor_roundtrip(self, values):
+        cursor = search_utils.encode_pagination_cursor(values)
+
+        assert isinstance(cursor, str)
+        assert '=' not in cursor
+        assert search_utils.decode_pagination_cursor(cursor, size=2) == values
+
+    @pytest.mark.unit_test
+    @pytest.mark.parametrize('cursor', [None, '', '!!not-a-cursor!!', 'e30'])
+    def test_malformed_cursor(self, cursor):
+        assert search_utils.decode_pagination_cursor(cursor, size=2, default=False) is False
+
+    @pytest.mark.unit_test
+    def test_cursor_size_mismatch(self):
+        cursor = search_utils.encode_pagination_cursor([1, 'PH1', 3])
+        assert search_utils.decode_pagination_cursor(cursor, size=2) is None
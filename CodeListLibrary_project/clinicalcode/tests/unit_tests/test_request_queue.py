@@ -0,0 +1,85 @@
+from importlib import import_module
+from django.conf import settings
+from django.utils import timezone
+from django.contrib.auth import SESSION_KEY
+from easyaudit.models import RequestEvent
+
+import pytest
+import threading
+
+from clinicalcode.audit.request_queue import RequestEventQueue
+
+class TestRequestEventQueue:
+
+    def __build_queue(self, **kwargs):
+        queue = RequestEventQueue(**kwargs)
+        queue._RequestEventQueue__ensure_flusher = lambda: None
+        return queue
+
+    def __build_event(self, url, session_key=None):
+        return {
+            'url': url,
+            'method': 'GET',
+            'query_string': '',
+            'session_key': session_key,
+            'remote_ip': '127.0.0.1',
+            'datetime': timezone.now(),
+        }
+
+    @pytest.mark.unit_test
+    def test_put_drop_oldest(self):
+        queue = self.__build_queue(max_size=2, batch_size=2, backpressure='drop_oldest')
+
+        assert all(queue.put(self.__build_event(x)) for x in ('/a/', '/b/', '/c/'))
+        assert [x.get('url') for x in queue.items] == ['/b/', '/c/']
+        assert queue.stats == { 'enqueued': 3, 'written': 0, 'dropped': 1, 'failed': 0, 'pending': 2 }
+
+    @pytest.mark.unit_test
+    def test_put_drop_newest(self):
+        queue = self.__build_queue(max_size=2, batch_size=2, backpressure='drop_newest')
+
+        assert queue.put(self.__build_event('/a/'))
+        assert queue.put(self.__build_event('/b/'))
+        assert not queue.put(self.__build_event('/c/'))
+        assert [x.get('url') for x in queue.items] == ['/a/', '/b/']
+        assert queue.stats == { 'enqueued': 2, 'written': 0, 'dropped': 1, 'failed': 0, 'pending': 2 }
+
+    @pytest.mark.unit_test
+    def test_batch_size_triggers_flush(self):
+        queue = RequestEventQueue(max_size=10, batch_size=2, flush_interval=60)
+
+        batches = []
+        written = threading.Event()
+        def write(batch):
+            batches.append([x.get('url') for x in batch])
+            written.set()
+            return len(batch)
+
+        queue._RequestEventQueue__write = write
+        queue.put(self.__build_event('/a/'))
+        queue.put(self.__build_event('/b/'))
+
+        # Must be flushed by the batch size, i.e. well before the flush interval elapses
+        assert written.wait(timeout=5)
+        assert batches == [['/a/', '/b/']]
+        assert queue.stats.get('pending') == 0
+
+    @pytest.mark.unit_test
+    @pytest.mark.django_db(transaction=True)
+    def test_flush_resolves_users(self, generate_user):
+        user = generate_user['normal_user']
+
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session.save()
+
+        queue = self.__build_queue(max_size=10, batch_size=10)
+        queue.put(self.__build_event('/authed/', session_key=session.session_key))
+        queue.put(self.__build_event('/anon/'))
+        queue.put(self.__build_event('/expired/', session_key='not-a-session'))
+
+        assert queue.flush() == 3
+        assert queue.stats.get('written') == 3
+
+        events = dict(RequestEvent.objects.values_list('url', 'user_id'))
+        assert events == { '/authed/': user.pk, '/anon/': None, '/expired/': None }
@@ -0,0 +1,126 @@
+from datetime import timedelta
+from django.utils import timezone
+from easyaudit.models import RequestEvent
+
+import hashlib
+import pytest
+
+from clinicalcode.models.Brand import Brand
+from clinicalcode.models.Organisation import Organisation
+from clinicalcode.models.RequestRollup import RequestRollup, RequestRollupState
+from clinicalcode.entity_utils import audit_utils
+from clinicalcode.views.Organisation import OrganisationView
+from clinicalcode.views.dashboard.BrandAdmin import BrandOverviewView
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {
+        'default': { 'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-request-rollup' },
+    }
+
+@pytest.mark.django_db(reset_sequences=True, transaction=True)
+class TestRequestRollup:
+
+    def __create_event(self, url, method='GET', user=None, remote_ip='10.0.0.1', age=timedelta(hours=1)):
+        event = RequestEvent.objects.create(url=url, method=method, user=user, remote_ip=remote_ip)
+
+        # `datetime` is set on insert, i.e. it must be aged after the fact
+        RequestEvent.objects.filter(pk=event.pk).update(datetime=timezone.now() - age)
+        return event
+
+    def __get_counters(self):
+        counters = { }
+        for x in RequestRollup.objects.all():
+            key = (x.brand, x.entity_id, x.kind)
+            counters[key] = counters.get(key, 0) + x.hits
+        return counters
+
+    @pytest.mark.unit_test
+    def test_parses_requests(self, locmem_cache, entity_class, generate_user):
+        Brand.objects.create(name='HDRN', logo_path='')
+        user = generate_user['normal_user']
+
+        self.__create_event('/HDRN/phenotypes/PH1/detail/', remote_ip='10.0.0.1')
+        self.__create_event('/HDRN/phenotypes/PH1/detail/', remote_ip='10.0.0.1')
+        self.__create_event('/HDRN/phenotypes/PH1/detail/', remote_ip='10.0.0.2')
+        self.__create_event('/api/v1/phenotypes/PH1/detail/', user=user)
+        self.__create_event('/phenotypes/PH2/export/codes/', remote_ip='10.0.0.1')
+        self.__create_event('/about/', method='POST')
+        self.__create_event('/phenotypes/PH1/detail/', method='DELETE')
+
+        assert audit_utils.rollup_request_events() == 7
+        assert self.__get_counters() == {
+            ('HDRN', 'PH1', 'view'): 3,
+            ('', 'PH1', 'api'): 1,
+            ('', 'PH2', 'export'): 1,
+            ('', '', 'view'): 1,
+        }
+
+        # Anonymous visitors are distinguished by their address, but it can't be recovered from the visitor
+        visitors = RequestRollup.objects.filter(brand='HDRN').values_list('visitor', flat=True)
+        assert len(visitors) == 2
+        assert hashlib.md5(b'ip:10.0.0.1').hexdigest() not in visitors
+
+    @pytest.mark.unit_test
+    def test_consumes_incrementally(self, locmem_cache, entity_class):
+        self.__create_event('/phenotypes/PH1/detail/')
+        assert audit_utils.rollup_request_events() == 1
+
+        self.__create_event('/phenotypes/PH1/detail/')
+        assert audit_utils.rollup_request_events() == 1
+        assert audit_utils.rollup_request_events() == 0
+        assert self.__get_counters() == { ('', 'PH1', 'view'): 2 }
+
+    @pytest.mark.unit_test
+    def test_skips_recently_written_requests(self, locmem_cache, entity_class):
+        first = self.__create_event('/phenotypes/PH1/detail/')
+        recent = self.__create_event('/phenotypes/PH2/detail/', age=timedelta(seconds=0))
+        self.__create_event('/phenotypes/PH3/detail/')
+
+        # The watermark must not move past a request that may belong to a batch still being written
+        assert audit_utils.rollup_request_events() == 1
+        assert RequestRollupState.objects.get(id=1).last_request_id == first.id
+
+        RequestEvent.objects.filter(pk=recent.pk).update(datetime=timezone.now() - timedelta(hours=1))
+        assert audit_utils.rollup_request_events() == 2
+        assert set(self.__get_counters().keys()) == {
+            ('', 'PH1', 'view'), ('', 'PH2', 'view'), ('', 'PH3', 'view'),
+        }
+
+    @pytest.mark.unit_test
+    def test_organisation_metrics(self, generate_entity, generate_user):
+        organisation = Organisation.objects.create(slug='test-org', name='Test Org', owner=generate_user['owner_user'])
+        generate_entity.organisation = organisation
+        generate_entity.save()
+
+        today = timezone.now().date()
+        RequestRollup.objects.bulk_create([
+            RequestRollup(date=today, entity_id=generate_entity.id, kind='view', visitor='a', hits=3),
+            RequestRollup(date=today, entity_id=generate_entity.id, kind='api', visitor='a', hits=2),
+            RequestRollup(date=today, entity_id=generate_entity.id, kind='export', visitor='b', hits=1),
+            RequestRollup(date=today - timedelta(days=60), entity_id=generate_entity.id, kind='view', visitor='a', hits=10),
+            RequestRollup(date=today, entity_id='PH0', kind='view', visitor='a', hits=10),
+        ])
+
+        metrics = OrganisationView()._OrganisationView__resolve_org_metrics(organisation)
+        assert metrics.get('views') == 6
+        assert metrics.get('downloads') == 3
+        assert metrics.get('popular') == [{ 'id': generate_entity.id, 'view_count': 6 }]
+
+    @pytest.mark.unit_test
+    def test_brand_dashboard_summary(self, settings):
+        settings.GA4_ACTIVE = False
+        brand = Brand.objects.create(name='TESTBRAND', logo_path='')
+
+        today = timezone.now().date()
+        RequestRollup.objects.bulk_create([
+            RequestRollup(date=today, brand='TESTBRAND', kind='view', visitor='a', hits=3),
+            RequestRollup(date=today, brand='TESTBRAND', entity_id='PH1', kind='view', visitor='a', hits=1),
+            RequestRollup(date=today, brand='TESTBRAND', kind='api', visitor='b', hits=2),
+            RequestRollup(date=today, brand='', kind='view', visitor='c', hits=5),
+        ])
+
+        summary = BrandOverviewView()._BrandOverviewView__compute_summary(brand).get('data')
+        assert summary.get('dau') == 2
+        assert summary.get('mau') == 2
+        assert summary.get('hits') == 6
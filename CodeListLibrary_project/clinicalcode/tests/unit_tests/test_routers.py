@@ -0,0 +1,41 @@
+import pytest
+
+from clinicalcode import routers
+
+@pytest.fixture
+def replica(settings):
+    settings.CLL_READ_ONLY = False
+    settings.IS_INSIDE_GATEWAY = False
+    settings.DATABASE_REPLICA_ALIAS = 'replica'
+    settings.DATABASES = settings.DATABASES | { 'replica': settings.DATABASES['default'] }
+    return settings
+
+class TestReadReplicaRouter:
+
+    @pytest.mark.unit_test
+    def test_reads_default_outside_context(self, replica):
+        assert routers.ReadReplicaRouter().db_for_read(None) == 'default'
+
+    @pytest.mark.unit_test
+    def test_reads_replica_until_write(self, replica):
+        router = routers.ReadReplicaRouter()
+        with routers.use_read_replica():
+            assert router.db_for_read(None) == 'replica'
+            assert router.db_for_write(None) == 'default'
+            assert router.db_for_read(None) == 'default'
+
+        with routers.use_read_replica():
+            assert router.db_for_read(None) == 'replica'
+
+    @pytest.mark.unit_test
+    @pytest.mark.parametrize('flag', ['CLL_READ_ONLY', 'IS_INSIDE_GATEWAY'])
+    def test_reads_default_when_disabled(self, replica, flag):
+        setattr(replica, flag, True)
+        with routers.use_read_replica():
+            assert routers.ReadReplicaRouter().db_for_read(None) == 'default'
+
+    @pytest.mark.unit_test
+    def test_never_migrates_replica(self, replica):
+        router = routers.ReadReplicaRouter()
+        assert router.allow_migrate('replica', 'clinicalcode') is False
+        assert router.allow_migrate('default', 'clinicalcode') is None
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+
+from clinicalcode.entity_utils import search_utils
+
+LAYOUTS = {
+    '1/1': {
+        'id': 1,
+        'version': 1,
+        'definition': {
+            'fields': {
+                'type': {
+                    'validation': { 'type': 'enum', 'options': { '1': 'Disease or syndrome', '2': 'Biomarker' } },
+                },
+                'sex': {
+                    'validation': { 'type': 'int_array', 'options': { '1': 'Male', '2': 'Female' } },
+                },
+            },
+        },
+    },
+}
+
+def make_entity(history_id, template_data):
+    return SimpleNamespace(id=f'PH{history_id}', history_id=history_id, template_id=1, template_version=1, template_data=template_data)
+
+class TestSearchHydration:
+
+    @pytest.mark.unit_test
+    @pytest.mark.django_db
+    def test_resolves_option_fields_without_queries(self, django_assert_num_queries):
+        entities = [make_entity(1, { 'type': '2', 'sex': [1, 2] }), make_entity(2, { 'type': '1' })]
+
+        with django_assert_num_queries(0):
+            hydrated = search_utils.hydrate_search_results(entities, LAYOUTS, fields=['type', 'sex'])
+
+        assert hydrated[1] == {
+            'type': [{ 'name': 'Biomarker', 'value': '2' }],
+            'sex': [{ 'name': 'Male', 'value': 1 }, { 'name': 'Female', 'value': 2 }],
+        }
+        assert hydrated[2] == { 'type': [{ 'name': 'Disease or syndrome', 'value': '1' }], 'sex': [] }
+
+    @pytest.mark.unit_test
+    def test_skips_unknown_layouts(self):
+        entity = make_entity(3, { 'type': '1' })
+        entity.template_version = 2
+
+        assert search_utils.hydrate_search_results([entity], LAYOUTS, fields=['type']) == { }
@@ -0,0 +1,101 @@
+from io import StringIO
+from datetime import timedelta
+from importlib import import_module
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils import timezone
+from django.core.management import call_command
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.models import Session
+
+import pytest
+
+from clinicalcode.models.Brand import Brand
+from clinicalcode.middleware.brands import BrandMiddleware
+from clinicalcode.middleware.sessions import SessionExpiryMiddleware
+
+@pytest.fixture
+def db_sessions(settings):
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+    settings.CACHES = {
+        'default': { 'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-sessions' },
+    }
+
+@pytest.mark.django_db(reset_sequences=True, transaction=True)
+class TestSessions:
+
+    def __get_session(self, session_key=None):
+        return import_module('django.contrib.sessions.backends.db').SessionStore(session_key)
+
+    def __build_request(self, path, user, session):
+        request = RequestFactory().get(path)
+        request.user = user
+        request.session = session
+        return request
+
+    @pytest.mark.unit_test
+    def test_brand_context_is_not_stored_in_session(self, db_sessions):
+        Brand.objects.create(name='HDRN', logo_path='')
+
+        request = self.__build_request('/HDRN/', AnonymousUser(), self.__get_session())
+        BrandMiddleware(lambda request: HttpResponse()).process_request(request)
+
+        assert 'HDRN' in request.ALL_BRANDS
+        assert request.CURRENT_BRAND == 'HDRN'
+        assert not request.session.modified
+        assert request.session.session_key is None
+        assert Session.objects.count() == 0
+
+    @pytest.mark.unit_test
+    def test_idle_expiry_writes_once_per_interval(self, settings, db_sessions, generate_user):
+        settings.SESSION_EXPIRY = {
+            'SESSION_LIMIT': timedelta(days=1),
+            'IDLE_LIMIT': timedelta(hours=1),
+            'IDLE_WRITE_INTERVAL': timedelta(minutes=5),
+        }
+
+        user = generate_user['normal_user']
+        user.last_login = timezone.now()
+
+        middleware = SessionExpiryMiddleware(lambda request: HttpResponse())
+        def handle(last_request=None):
+            session = self.__get_session()
+            if last_request is not None:
+                session['last_session_request'] = last_request.isoformat()
+            session.save()
+
+            request = self.__build_request('/', user, self.__get_session(session.session_key))
+            middleware(request)
+            return request.session, last_request
+
+        # The first request of a session is always recorded
+        session, _ = handle()
+        assert session.modified
+        assert 'last_session_request' in session
+
+        # ... but later requests are only recorded once the interval has elapsed
+        session, last_request = handle(timezone.now() - timedelta(minutes=1))
+        assert not session.modified
+        assert session.get('last_session_request') == last_request.isoformat()
+
+        session, last_request = handle(timezone.now() - timedelta(minutes=10))
+        assert session.modified
+        assert session.get('last_session_request') != last_request.isoformat()
+
+    @pytest.mark.unit_test
+    def test_clear_sessions_in_batches(self, db_sessions):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f'expired{i}', session_data='', expire_date=now - timedelta(days=1)) for i in range(5)] +
+            [Session(session_key=f'active{i}', session_data='', expire_date=now + timedelta(days=1)) for i in range(2)]
+        )
+
+        out = StringIO()
+        call_command('clear_sessions', batch_size=2, sleep=0, max_batches=1, stdout=out)
+        assert 'Deleted 2 expired session(s) in 1 batch(es)' in out.getvalue()
+        assert Session.objects.filter(expire_date__lt=now).count() == 3
+
+        out = StringIO()
+        call_command('clear_sessions', batch_size=2, sleep=0, stdout=out)
+        assert 'Deleted 3 expired session(s) in 2 batch(es)' in out.getvalue()
+        assert sorted(Session.objects.values_list('session_key', flat=True)) == ['active0', 'active1']
@@ -0,0 +1,121 @@
+from django.http import Http404
+from django.test import RequestFactory
+
+import re
+import pytest
+
+from clinicalcode.views import site
+from clinicalcode.models.Brand import Brand
+from clinicalcode.models.GenericEntity import GenericEntity
+from clinicalcode.models.PublishedGenericEntity import PublishedGenericEntity
+from clinicalcode.entity_utils import entity_db_utils, constants
+
+@pytest.fixture
+def sitemap_settings(settings):
+    settings.IS_DEMO = False
+    settings.CLL_READ_ONLY = False
+    settings.IS_DEVELOPMENT_PC = False
+    settings.CACHES = {
+        'default': { 'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-sitemap' },
+    }
+
+@pytest.mark.django_db(reset_sequences=True, transaction=True)
+class TestSitemap:
+
+    def __publish_entities(self, template, user, count):
+        entities = []
+        for i in range(count):
+            entity = GenericEntity.objects.create(
+                name=f'TEST_SITEMAP_{i}',
+                author=user.username,
+                template=template,
+                template_version=1,
+                template_data={},
+                created_by=user,
+                world_access=constants.WORLD_ACCESS_PERMISSIONS.VIEW,
+                owner=user
+            )
+
+            PublishedGenericEntity.objects.create(
+                entity=entity,
+                entity_history_id=entity.history.first().history_id,
+                approval_status=constants.APPROVAL_STATUS.APPROVED.value,
+                created_by_id=user.id
+            )
+            entities.append(entity)
+
+        # Unapproved publications must never be listed
+        PublishedGenericEntity.objects.filter(entity_id=entities[-1].id).update(
+            approval_status=constants.APPROVAL_STATUS.PENDING.value
+        )
+        return entities[:-1]
+
+    def __build_request(self, brand=None):
+        request = RequestFactory().get('/sitemap.xml')
+        request.IS_PROD_SITE = True
+        if brand is not None:
+            request.CURRENT_BRAND = brand
+        return request
+
+    def __get_pages(self, response, section):
+        content = response.content.decode('utf-8')
+        return [int(x) for x in re.findall(rf'sitemap-{section}-(\d+)\.xml', content)]
+
+    def __get_segment(self, request, section, page):
+        response = site.get_sitemap_segment(request, section, str(page))
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    @pytest.mark.unit_test
+    def test_index_segment_counts(self, monkeypatch, sitemap_settings, template, generate_user):
+        monkeypatch.setattr(constants, 'SITEMAP_SEGMENT_SIZE', 4)
+        self.__publish_entities(template, generate_user['owner_user'], 6)
+
+        # Each phenotype emits 2 URLs, i.e. 5 approved phenotypes over segments of 2 rows
+        response = site.get_sitemap(self.__build_request())
+        assert self.__get_pages(response, 'pages') == [1]
+        assert self.__get_pages(response, 'phenotypes') == [1, 2, 3]
+
+    @pytest.mark.unit_test
+    def test_segments_are_paged_by_keyset(self, monkeypatch, sitemap_settings, template, generate_user):
+        monkeypatch.setattr(constants, 'SITEMAP_SEGMENT_SIZE', 4)
+        entities = self.__publish_entities(template, generate_user['owner_user'], 6)
+
+        request = self.__build_request()
+        listed = [
+            set(re.findall(r'/phenotypes/(PH\d+)/detail/', self.__get_segment(request, 'phenotypes', page)))
+            for page in (1, 2, 3)
+        ]
+
+        assert listed == [
+            { entities[0].id, entities[1].id },
+            { entities[2].id, entities[3].id },
+            { entities[4].id },
+        ]
+
+    @pytest.mark.unit_test
+    def test_out_of_range_segment(self, monkeypatch, sitemap_settings, template, generate_user):
+        monkeypatch.setattr(constants, 'SITEMAP_SEGMENT_SIZE', 4)
+        self.__publish_entities(template, generate_user['owner_user'], 3)
+
+        request = self.__build_request()
+        with pytest.raises(Http404):
+            site.get_sitemap_segment(request, 'phenotypes', '2')
+
+        with pytest.raises(Http404):
+            site.get_sitemap_segment(request, 'pages', '2')
+
+    @pytest.mark.unit_test
+    def test_brand_collection_scoping(self, monkeypatch, sitemap_settings, template, generate_user):
+        monkeypatch.setattr(constants, 'SITEMAP_SEGMENT_SIZE', 4)
+        monkeypatch.setattr(entity_db_utils, 'get_brand_collection_ids', lambda brand: [5])
+
+        Brand.objects.create(name='HDRN', logo_path='')
+        entities = self.__publish_entities(template, generate_user['owner_user'], 4)
+        GenericEntity.history.filter(id=entities[1].id).update(collections=[5])
+
+        request = self.__build_request(brand='HDRN')
+        assert self.__get_pages(site.get_sitemap(request), 'phenotypes') == [1]
+        assert set(re.findall(r'/phenotypes/(PH\d+)/detail/', self.__get_segment(request, 'phenotypes', 1))) == { entities[1].id }
+
+        # The unbranded sitemap is unaffected by the brand's collections
+        assert self.__get_pages(site.get_sitemap(self.__build_request()), 'phenotypes') == [1, 2]
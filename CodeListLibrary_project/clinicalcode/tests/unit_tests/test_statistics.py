@@ -0,0 +1,146 @@
+from django.db.models import Q
+
+import pytest
+
+from clinicalcode.models.Tag import Tag
+from clinicalcode.models.Brand import Brand
+from clinicalcode.models.Template import Template
+from clinicalcode.models.CodingSystem import CodingSystem
+from clinicalcode.models.GenericEntity import GenericEntity
+from clinicalcode.entity_utils import stats_utils, template_utils, model_utils, constants
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {
+        'default': { 'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-statistics' },
+    }
+
+@pytest.mark.django_db(reset_sequences=True, transaction=True)
+class TestStatistics:
+
+    def __create_fixtures(self, template, user):
+        brand = Brand.objects.create(name='HDRN', logo_path='')
+
+        branded = Tag.objects.create(description='Branded collection', tag_type=Tag.collection, collection_brand=brand)
+        unbranded = Tag.objects.create(description='Unbranded collection', tag_type=Tag.collection)
+        tag = Tag.objects.create(description='Some tag', tag_type=Tag.tag)
+
+        systems = [
+            CodingSystem.objects.create(
+                name=f'System {i}', link='', database_connection_name='',
+                table_name='', code_column_name='', desc_column_name=''
+            )
+            for i in range(2)
+        ]
+
+        approved = constants.APPROVAL_STATUS.APPROVED.value
+        pending = constants.APPROVAL_STATUS.PENDING.value
+        rows = [
+            { 'type': '1', 'coding_system': [systems[0].id], 'collections': [branded.id], 'tags': [tag.id], 'brands': None, 'publish_status': approved },
+            { 'type': '2', 'coding_system': [systems[0].id, systems[1].id], 'collections': None, 'tags': None, 'brands': [brand.id], 'publish_status': pending },
+            { 'type': '1', 'coding_system': [systems[1].id], 'collections': [unbranded.id], 'tags': [tag.id], 'brands': None, 'publish_status': approved },
+            { 'type': '1', 'coding_system': [], 'collections': [branded.id, unbranded.id], 'tags': None, 'brands': [brand.id], 'publish_status': approved },
+            { 'type': '3', 'coding_system': [systems[0].id], 'collections': None, 'tags': None, 'brands': None, 'publish_status': pending },
+        ]
+
+        for index, row in enumerate(rows):
+            GenericEntity.objects.create(
+                name=f'TEST_STATISTICS_{index}',
+                author=user.username,
+                template=template,
+                template_version=template.template_version,
+                template_data={ 'version': template.template_version, 'type': row.get('type'), 'coding_system': row.get('coding_system') },
+                collections=row.get('collections'),
+                tags=row.get('tags'),
+                brands=row.get('brands'),
+                publish_status=row.get('publish_status'),
+                created_by=user,
+                owner=user
+            )
+
+        return brand
+
+    def __collate_per_entity(self, brand=None):
+        """
+            Reference collation, _i.e._ the previous implementation which resolved the counted values of each entity in turn
+        """
+        statistics = { 'published': { }, 'all': { } }
+
+        entities = GenericEntity.objects.all()
+        if brand is not None:
+            collection_ids = model_utils.get_brand_collection_ids(brand.name)
+            entities = entities.filter(Q(brands__overlap=[brand.id]) | Q(collections__overlap=collection_ids))
+
+        for entity in entities:
+            template = Template.history.filter(id=entity.template.id, template_version=entity.template_version) \
+                .latest_of_each() \
+                .first()
+
+            layout = template_utils.get_merged_definition(template)
+            for field, struct in layout.get('fields').items():
+                if not isinstance(struct, dict) or 'filterable' not in struct.get('search', { }):
+                    continue
+
+                validation = struct.get('validation') or { }
+                field_type = validation.get('type')
+                if field_type == 'int_array':
+                    source = validation.get('source')
+                    if not isinstance(source, dict) or source.get('trees'):
+                        continue
+                elif field_type != 'enum':
+                    continue
+
+                entity_field = template_utils.get_entity_field(entity, field)
+                if entity_field is None:
+                    continue
+
+                targets = ['all'] + (['published'] if entity.publish_status == constants.APPROVAL_STATUS.APPROVED else [])
+                for item in (entity_field if field_type == 'int_array' else [entity_field]):
+                    value = stats_utils.get_field_values(field, item, validation, struct, brand)
+                    if value is None:
+                        continue
+
+                    for key in targets:
+                        stats = statistics[key].setdefault(field, { })
+                        stats.setdefault(item, { 'value': value, 'count': 0 })['count'] += 1
+
+        return {
+            key: { field: stats_utils.transform_counted_field(data) for field, data in fields.items() }
+            for key, fields in statistics.items()
+        }
+
+    def __normalise(self, statistics):
+        # Values with equal counts may be listed in any order
+        return {
+            key: { field: sorted(values, key=lambda x: str(x.get('pk'))) for field, values in fields.items() }
+            for key, fields in statistics.items()
+        }
+
+    @pytest.mark.unit_test
+    def test_grouped_count_matches_per_entity_collation(self, locmem_cache, template, generate_user):
+        brand = self.__create_fixtures(template, generate_user['owner_user'])
+
+        templates = stats_utils.get_statistics_templates()
+        counts = stats_utils.count_statistics_values(templates, [brand])
+
+        for context in (None, brand):
+            expected = self.__collate_per_entity(context)
+            assert expected.get('all').get('coding_system')
+
+            collated = stats_utils.collate_statistics(counts, templates, data_cache={ }, brand=context)
+            assert self.__normalise(collated) == self.__normalise(expected)
+
+    @pytest.mark.unit_test
+    def test_brand_context_counts(self, locmem_cache, template, generate_user):
+        brand = self.__create_fixtures(template, generate_user['owner_user'])
+
+        templates = stats_utils.get_statistics_templates()
+        counts = stats_utils.count_statistics_values(templates, [brand])
+
+        # Entities associated through both their brands & collections are only counted once
+        branded = stats_utils.collate_statistics(counts, templates, brand=brand)
+        assert { x.get('pk'): x.get('count') for x in branded.get('all').get('type') } == { '1': 2, '2': 1 }
+        assert { x.get('pk'): x.get('count') for x in branded.get('published').get('type') } == { '1': 2 }
+
+        unbranded = stats_utils.collate_statistics(counts, templates)
+        assert { x.get('pk'): x.get('count') for x in unbranded.get('all').get('type') } == { '1': 3, '2': 1, '3': 1 }
@@ -1,6 +1,5 @@
 """Static URL Configuration for the Clinical-Code application."""
 
-from django.conf import settings
 from django.urls import re_path as url
 
 from clinicalcode.views.dashboard import BrandAdmin
@@ -135,36 +134,35 @@ urlpatterns = [
 urlpatterns += [
     url(r'^robots.txt/$', site.robots_txt, name='robots.txt'),
     url(r'^sitemap.xml/$', site.get_sitemap, name='sitemap.xml'),
+    url(r'^sitemap-(?P<section>[a-z]+)-(?P<page>\d+).xml/$', site.get_sitemap_segment, name='sitemap_segment'),
 ]
 
-# Add non-readonly pages
-if not settings.CLL_READ_ONLY:
-    urlpatterns += [
-        ## Data Source syncing with HDRUK
-        url(r'^admin/run-datasource-sync/$', Admin.run_datasource_sync, name='datasource_sync'),
-    ]
+# Non-readonly pages, included by `cll.urls.build_urlpatterns()` for URL configurations that aren't READ-ONLY
+write_urlpatterns = [
+    ## Data Source syncing with HDRUK
+    url(r'^admin/run-datasource-sync/$', Admin.run_datasource_sync, name='datasource_sync'),
+]
 
 # Tooling
-if not settings.CLL_READ_ONLY:
-    urlpatterns += [
-        # Add admin tools
-        url(r'^admin/run-stats/$', Admin.EntityStatisticsView.as_view(), name='run_entity_statistics'),
-        url(r'^admin/run-homepage-stats/$', Admin.run_homepage_statistics, name='run_homepage_statistics'),
-        # # Temporary admin tools
-        # url(r'^adminTemp/admin_mig_phenotypes_dt/$', adminTemp.admin_mig_phenotypes_dt, name='admin_mig_phenotypes_dt'),
-        # url(r'^adminTemp/admin_fix_read_codes_dt/$', adminTemp.admin_fix_read_codes_dt, name='admin_fix_read_codes_dt'),
-        # url(r'^adminTemp/admin_mig_concepts_dt/$', adminTemp.admin_mig_concepts_dt, name='admin_mig_concepts_dt'),
-        # url(r'^adminTemp/admin_force_links_dt/$', adminTemp.admin_force_concept_linkage_dt, name='admin_force_links_dt'),
-        # url(r'^adminTemp/admin_fix_breathe_dt/$', adminTemp.admin_fix_breathe_dt, name='admin_fix_breathe_dt'),
-        # url(r'^adminTemp/admin_fix_malformed_codes/$', adminTemp.admin_fix_malformed_codes, name='admin_fix_malformed_codes'),
-        #url(r'^adminTemp/admin_update_phenoflowids/$', adminTemp.admin_update_phenoflowids, name='admin_update_phenoflowids'),
-        url(r'^adminTemp/admin_force_adp_links/$', adminTemp.admin_force_adp_linkage, name='admin_force_adp_links'),
-        url(r'^adminTemp/admin_fix_coding_system_linkage/$', adminTemp.admin_fix_coding_system_linkage, name='admin_fix_coding_system_linkage'),
-        url(r'^adminTemp/admin_fix_concept_linkage/$', adminTemp.admin_fix_concept_linkage, name='admin_fix_concept_linkage'),
-        url(r'^adminTemp/admin_force_brand_links/$', adminTemp.admin_force_brand_links, name='admin_force_brand_links'),
-        url(r'^adminTemp/admin_update_phenoflow_targets/$', adminTemp.admin_update_phenoflow_targets, name='admin_update_phenoflow_targets'),
-        url(r'^adminTemp/admin_upload_hdrn_assets/$', adminTemp.admin_upload_hdrn_assets, name='admin_upload_hdrn_assets'),
-        url(r'^adminTemp/admin_convert_entity_groups/$', adminTemp.admin_convert_entity_groups, name='admin_convert_entity_groups'),
-        url(r'^adminTemp/admin_fix_icd_ca_cm_codes/$', adminTemp.admin_fix_icd_ca_cm_codes, name='admin_fix_icd_ca_cm_codes'),
-        url(r'^adminTemp/admin_reg_published/$', adminTemp.admin_reg_published, name='admin_reg_published'),
-    ]
+write_urlpatterns += [
+    # Add admin tools
+    url(r'^admin/run-stats/$', Admin.EntityStatisticsView.as_view(), name='run_entity_statistics'),
+    url(r'^admin/run-homepage-stats/$', Admin.run_homepage_statistics, name='run_homepage_statistics'),
+    # # Temporary admin tools
+    # url(r'^adminTemp/admin_mig_phenotypes_dt/$', adminTemp.admin_mig_phenotypes_dt, name='admin_mig_phenotypes_dt'),
+    # url(r'^adminTemp/admin_fix_read_codes_dt/$', adminTemp.admin_fix_read_codes_dt, name='admin_fix_read_codes_dt'),
+    # url(r'^adminTemp/admin_mig_concepts_dt/$', adminTemp.admin_mig_concepts_dt, name='admin_mig_concepts_dt'),
+    # url(r'^adminTemp/admin_force_links_dt/$', adminTemp.admin_force_concept_linkage_dt, name='admin_force_links_dt'),
+    # url(r'^adminTemp/admin_fix_breathe_dt/$', adminTemp.admin_fix_breathe_dt, name='admin_fix_breathe_dt'),
+    # url(r'^adminTemp/admin_fix_malformed_codes/$', adminTemp.admin_fix_malformed_codes, name='admin_fix_malformed_codes'),
+    #url(r'^adminTemp/admin_update_phenoflowids/$', adminTemp.admin_update_phenoflowids, name='admin_update_phenoflowids'),
+    url(r'^adminTemp/admin_force_adp_links/$', adminTemp.admin_force_adp_linkage, name='admin_force_adp_links'),
+    url(r'^adminTemp/admin_fix_coding_system_linkage/$', adminTemp.admin_fix_coding_system_linkage, name='admin_fix_coding_system_linkage'),
+    url(r'^adminTemp/admin_fix_concept_linkage/$', adminTemp.admin_fix_concept_linkage, name='admin_fix_concept_linkage'),
+    url(r'^adminTemp/admin_force_brand_links/$', adminTemp.admin_force_brand_links, name='admin_force_brand_links'),
+    url(r'^adminTemp/admin_update_phenoflow_targets/$', adminTemp.admin_update_phenoflow_targets, name='admin_update_phenoflow_targets'),
+    url(r'^adminTemp/admin_upload_hdrn_assets/$', adminTemp.admin_upload_hdrn_assets, name='admin_upload_hdrn_assets'),
+    url(r'^adminTemp/admin_convert_entity_groups/$', adminTemp.admin_convert_entity_groups, name='admin_convert_entity_groups'),
+    url(r'^adminTemp/admin_fix_icd_ca_cm_codes/$', adminTemp.admin_fix_icd_ca_cm_codes, name='admin_fix_icd_ca_cm_codes'),
+    url(r'^adminTemp/admin_reg_published/$', adminTemp.admin_reg_published, name='admin_reg_published'),
+]
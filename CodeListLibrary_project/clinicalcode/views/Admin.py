@@ -43,7 +43,7 @@ def run_homepage_statistics(request):
     if not request.user.is_superuser:
         raise PermissionDenied
 
-    if settings.CLL_READ_ONLY:
+    if permission_utils.is_read_only(request):
         raise PermissionDenied
 
     if request.method == 'GET':
@@ -289,7 +289,7 @@ def create_or_update_internal_datasources():
 @login_required
 def run_datasource_sync(request):
     """Manual run of the DataSource sync"""
-    if settings.CLL_READ_ONLY:
+    if permission_utils.is_read_only(request):
         raise PermissionDenied
 
     if not request.user.is_superuser:
@@ -4,6 +4,7 @@
     ---------------------------------------------------------------------------
 """
 from django.urls import reverse
+from django.db import OperationalError
 from django.http import HttpResponseBadRequest
 from collections import OrderedDict
 from collections.abc import Iterable
@@ -49,6 +50,7 @@ class EntitySearchView(TemplateView):
             - Managing context of template and which entities to render
             - SSR of entities at initial GET request based on request params
             - AJAX-driven update of template based on request params (through JsonResponse)
+            - JSON search results, _i.e._ compact rows for client rendering, if `format=json` is passed as a parameter
     """
     template_name = 'clinicalcode/generic_entity/search/search.html'
     result_template = 'components/search/results.html'
@@ -75,13 +77,14 @@ class EntitySearchView(TemplateView):
         # Paginate reponse
         page_obj = search_utils.try_get_paginated_results(request, entities)
 
-        # For detail referral highlighting
-        request.session['searchterm'] = gen_utils.try_get_param(request, 'search', None)
+        # Resolve the sourced values of the page's results in bulk
+        hydrated = search_utils.hydrate_search_results(page_obj.object_list, layouts)
 
         return context | {
             'entity_type': entity_type,
             'page_obj': page_obj,
-            'layouts': layouts
+            'layouts': layouts,
+            'hydrated': hydrated,
         }
     
     def get(self, request, *args, **kwargs):
@@ -89,15 +92,21 @@ class EntitySearchView(TemplateView):
             Manages get requests to this view
             
             Note:
+                If `format=json` is passed as a parameter, the `GET` request will
+                return the page's results as compact rows alongside its pagination
+                details, see `search_utils.serialise_search_results()`.
+
                 If `search_filtered` is passed as a parameter (through a fetch req),
                 the `GET` request will return the pagination and results
                 for hotreloading relevant search results instead of forcing
                 a page reload.
-
-                In reality, we should change this to a `JSON` Response at some point
-                and make the client render it rather than wasting server resources.
         """
         context = self.get_context_data(*args, **kwargs)
+        if gen_utils.try_get_param(request, 'format', None) == 'json':
+            return JsonResponse(search_utils.serialise_search_results(
+                context.get('page_obj'), context.get('layouts'), hydrated=context.get('hydrated')
+            ))
+
         filtered = gen_utils.try_get_param(request, 'search_filtered', None)
 
         if filtered is not None and request.headers.get('X-Requested-With'):
@@ -490,7 +499,14 @@ class CreateEntityView(TemplateView):
         })
 
     def search_codes(self, request, *args, **kwargs):
-        """GET request made by client to search a codelist given its coding id, a search term, and the relevant template, _e.g._ `entity/{update|create}/?search=C1&coding_system=4&template=1`"""
+        """
+            GET request made by client to search a codelist given its coding id, a search term, and the relevant template, _e.g._ `entity/{update|create}/?search=C1&coding_system=4&template=1`
+
+            Note:
+                - Specify `count_only=1` to retrieve the (bounded) number of matching codes
+                - Specify any of `page_size`, `offset` or `cursor` to paginate the results
+                - Unpaginated searches that match more than `CODE_SEARCH_MAX_RESULTS` codes are refused
+        """
         template_id = gen_utils.parse_int(gen_utils.try_get_param(request, 'template'), default=None)
         if not template_id:
             return gen_utils.jsonify_response(message='Invalid template parameter', code=400, status='false')
@@ -518,14 +534,57 @@ class CreateEntityView(TemplateView):
         case_sensitive = gen_utils.parse_int(gen_utils.try_get_param(request, 'case_sensitive'), None)
         case_sensitive = case_sensitive == 1
 
-        codelist = search_utils.search_codelist(coding_system, search_term, use_desc=use_desc, use_wildcard=use_wildcard, case_sensitive=case_sensitive)
-        if codelist is not None:
-            codelist = list(codelist.values('id', 'code', 'description'))
-        else:
-            codelist = [ ]
-        
+        pattern = search_utils.get_codelist_search_pattern(search_term, use_wildcard=use_wildcard)
+        if pattern is not None:
+            valid_pattern, message = search_utils.validate_codelist_pattern(pattern)
+            if not valid_pattern:
+                return gen_utils.jsonify_response(message=message, code=400, status='false')
+
+        count_only = gen_utils.parse_int(gen_utils.try_get_param(request, 'count_only'), None) == 1
+        page_size = gen_utils.parse_int(gen_utils.try_get_param(request, 'page_size'), None)
+        offset = gen_utils.parse_int(gen_utils.try_get_param(request, 'offset'), None)
+        cursor = gen_utils.try_get_param(request, 'cursor')
+        is_paginated = page_size is not None or offset is not None or cursor is not None
+
+        try:
+            with search_utils.codelist_search_timeout():
+                codelist = search_utils.search_codelist(coding_system, search_term, use_desc=use_desc, use_wildcard=use_wildcard, case_sensitive=case_sensitive)
+                if codelist is None:
+                    if count_only:
+                        return JsonResponse({ 'count': 0, 'count_exact': True })
+                    return JsonResponse({ 'result': [ ] })
+
+                if count_only:
+                    count, count_exact = search_utils.count_codelist(codelist)
+                    return JsonResponse({ 'count': count, 'count_exact': count_exact })
+
+                if is_paginated:
+                    results, next_cursor = search_utils.paginate_codelist(coding_system, codelist, page_size=page_size, offset=offset, cursor=cursor)
+                    count, count_exact = search_utils.count_codelist(codelist)
+                    return JsonResponse({
+                        'result': results,
+                        'count': count,
+                        'count_exact': count_exact,
+                        'next_cursor': next_cursor,
+                    })
+
+                # Unpaginated requests are bounded, refuse rather than truncate since the editor stores the full resultset
+                results = list(codelist.values('id', 'code', 'description')[:constants.CODE_SEARCH_MAX_RESULTS + 1])
+                if len(results) > constants.CODE_SEARCH_MAX_RESULTS:
+                    return gen_utils.jsonify_response(
+                        message=f'Your search matched more than {constants.CODE_SEARCH_MAX_RESULTS} codes, please refine your search',
+                        code=400,
+                        status='false'
+                    )
+        except OperationalError:
+            return gen_utils.jsonify_response(
+                message='Your search took too long to complete, please refine your search',
+                code=400,
+                status='false'
+            )
+
         return JsonResponse({
-            'result': codelist
+            'result': results
         })
 
 
@@ -800,25 +859,37 @@ def export_entity_codes_to_csv(request, pk, history_id=None):
     final_titles = final_titles + ["code_attributes"]
     writer.writerow(final_titles)
 
+    # Resolve the concept versions & their final codelists in bulk
+    concept_versions = Concept.history \
+        .filter(history_id__in=[concept[1] for concept in concept_ids_historyIDs]) \
+        .select_related('coding_system') \
+        .in_bulk()
+
+    live_concepts = set(
+        Concept.objects \
+            .filter(id__in=[concept[0] for concept in concept_ids_historyIDs]) \
+            .values_list('id', flat=True)
+    )
+
+    codelists = concept_utils.get_concept_codelists(concept_ids_historyIDs, incl_attributes=True)
+
     for concept in concept_ids_historyIDs:
         concept_id = concept[0]
         concept_version_id = concept[1]
-        current_concept_version = Concept.history.get(id=concept_id, history_id=concept_version_id)
+        current_concept_version = concept_versions.get(concept_version_id)
+        if current_concept_version is None or current_concept_version.id != concept_id:
+            continue
+
         concept_coding_system = current_concept_version.coding_system.name
         concept_name = current_concept_version.name
         code_attribute_header = current_concept_version.code_attribute_header
         
         rows_no = 0        
-        concept_data = concept_utils.get_clinical_concept_data(concept_id,
-                                                      concept_version_id,
-                                                      include_component_codes=False,
-                                                      include_attributes=True,
-                                                      include_reviewed_codes=True)
             
         #---------------------------------------------
         codelist = []
-        if isinstance(concept_data, dict) and isinstance(concept_data.get('codelist'), list):
-            codelist = concept_data.get('codelist')
+        if concept_id in live_concepts:
+            codelist = codelists.get((concept_id, concept_version_id), [])
 
         for cc in codelist:
             code = cc.get('code', None)
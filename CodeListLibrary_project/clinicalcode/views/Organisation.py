@@ -521,9 +521,7 @@ class OrganisationView(TemplateView):
       const_org_id as (values ({org_id})),
       const_max_popular as (values ({pop_limit})),
       ge_vis as (
-        select
-              ge.*,
-              concat('%', ge.id::text, '%') as ent_query
+        select ge.*
           from public.clinicalcode_genericentity as ge
           join public.clinicalcode_organisation as org
             on ge.organisation_id = org.id
@@ -549,31 +547,27 @@ class OrganisationView(TemplateView):
           from hge_vis as hge
           where hge.updated >= date_trunc('day', now()) - interval '30 day'
       ),
-      ent_reqs as (
-        select *
-          from public.easyaudit_requestevent as req
-         where req.datetime >= date_trunc('day', now()) - interval '30 day'
-      ),
       ent_visited as (
         select
-              req.*,
-              ge.id as ref_id
-          from ge_vis as ge
-          join ent_reqs as req
-            on req.url like ge.ent_query
+              rr.entity_id as ref_id,
+              rr.kind,
+              rr.hits
+          from public.clinicalcode_requestrollup as rr
+          join ge_vis as ge
+            on rr.entity_id = ge.id
+         where rr.date >= (date_trunc('day', now()) - interval '30 day')::date
       ),
       ent_views as (
-        select count(*) as cnt
-          from ent_visited
+        select coalesce(sum(req.hits), 0) as cnt
+          from ent_visited as req
       ),
       ent_downloads as (
-        select count(req.*) as cnt
-          from ge_vis as ge
-          join ent_visited as req
-            on req.url like '%api%' or req.url like '%export%'
+        select coalesce(sum(req.hits), 0) as cnt
+          from ent_visited as req
+         where req.kind in ('api', 'export')
       ),
       ent_viewcount as (
-        select t0.ref_id, count(t0.*) as cnt
+        select t0.ref_id, sum(t0.hits) as cnt
           from ent_visited as t0
          group by t0.ref_id
          order by cnt desc
@@ -53,7 +53,7 @@ class MyCollection(TemplateView):
     archived_content = permission_utils.get_editable_entities(request, only_deleted=True)
 
     form = None
-    if not settings.CLL_READ_ONLY:
+    if not permission_utils.is_read_only(request):
       form = ArchiveForm(parent_request=request)
 
     return context | {
@@ -68,7 +68,7 @@ class MyCollection(TemplateView):
 
   @method_decorator([login_required, permission_utils.redirect_readonly])
   def post(self, request, *args, **kwargs):
-    if settings.CLL_READ_ONLY:
+    if permission_utils.is_read_only(request):
       return JsonResponse({
         'success': False,
         'message': 'Cannot perform this action on Read Only site',
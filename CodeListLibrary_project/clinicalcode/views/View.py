@@ -32,7 +32,7 @@ from ..entity_utils import (
 )
 
 from ..entity_utils.constants import ONTOLOGY_TYPES
-from ..entity_utils.permission_utils import redirect_readonly
+from ..entity_utils.permission_utils import redirect_readonly, is_read_only
 
 logger = logging.getLogger(__name__)
 
@@ -248,7 +248,7 @@ def contact_us(request):
         Generation of Contact us page/form and email send functionality.
     """
 
-    if settings.CLL_READ_ONLY or settings.IS_INSIDE_GATEWAY:
+    if is_read_only(request) or settings.IS_INSIDE_GATEWAY:
         raise PermissionDenied
 
     captcha = True
@@ -324,7 +324,7 @@ def check_recaptcha(request):
     if settings.IS_DEVELOPMENT_PC:
         return True
 
-    if settings.CLL_READ_ONLY:
+    if is_read_only(request):
         raise PermissionDenied
 
     if request.method == 'POST':
@@ -26,6 +26,7 @@ from clinicalcode.models.Concept import Concept
 from clinicalcode.models.Template import Template
 from clinicalcode.models.Phenotype import Phenotype
 from clinicalcode.models.GenericEntity import GenericEntity
+from clinicalcode.models.EntityClass import EntityClass
 from clinicalcode.models.Organisation import Organisation, OrganisationMembership
 
 from clinicalcode.models.PublishedPhenotype import PublishedPhenotype
@@ -187,7 +188,7 @@ def get_transformed_data(concept, template):
 
 @login_required
 def admin_fix_malformed_codes(request):
-    if settings.CLL_READ_ONLY: 
+    if permission_utils.is_read_only(request): 
         raise PermissionDenied
     
     if not request.user.is_superuser:
@@ -261,7 +262,7 @@ def admin_fix_malformed_codes(request):
 
 @login_required
 def admin_fix_concept_linkage(request):
-    if settings.CLL_READ_ONLY: 
+    if permission_utils.is_read_only(request): 
         raise PermissionDenied
     
     if not request.user.is_superuser:
@@ -395,7 +396,7 @@ def admin_fix_concept_linkage(request):
 
 @login_required
 def admin_fix_coding_system_linkage(request):
-    if settings.CLL_READ_ONLY: 
+    if permission_utils.is_read_only(request): 
         raise PermissionDenied
     
     if not request.user.is_superuser:
@@ -512,7 +513,7 @@ def admin_fix_coding_system_linkage(request):
 
 @login_required
 def admin_force_adp_linkage(request):
-    if settings.CLL_READ_ONLY: 
+    if permission_utils.is_read_only(request): 
         raise PermissionDenied
     
     if not request.user.is_superuser:
@@ -588,7 +589,7 @@ def admin_force_adp_linkage(request):
 
 @login_required
 def admin_force_brand_links(request):
-    if settings.CLL_READ_ONLY: 
+    if permission_utils.is_read_only(request): 
         raise PermissionDenied
     
     if not request.user.is_superuser:
@@ -681,7 +682,7 @@ def admin_force_brand_links(request):
 
 @login_required
 def admin_update_phenoflowids(request):
-    if settings.CLL_READ_ONLY: 
+    if permission_utils.is_read_only(request): 
         raise PermissionDenied
     
     if not request.user.is_superuser:
@@ -767,7 +768,7 @@ def admin_update_phenoflowids(request):
 
 @login_required
 def admin_upload_hdrn_assets(request):
-    if settings.CLL_READ_ONLY: 
+    if permission_utils.is_read_only(request): 
         raise PermissionDenied
 
     if not request.user.is_superuser:
@@ -973,7 +974,7 @@ def admin_upload_hdrn_assets(request):
 
 @login_required
 def admin_update_phenoflow_targets(request):
-    if settings.CLL_READ_ONLY: 
+    if permission_utils.is_read_only(request): 
         raise PermissionDenied
 
     if not request.user.is_superuser:
@@ -1070,7 +1071,7 @@ def admin_force_concept_linkage_dt(request):
                the newly created pseudo-Phenotype
 
     """
-    if settings.CLL_READ_ONLY: 
+    if permission_utils.is_read_only(request): 
         raise PermissionDenied
     
     if not request.user.is_superuser:
@@ -1139,7 +1140,7 @@ def admin_fix_read_codes_dt(request):
             2. Setting the Coding System's desc column to 'description'
 
     """
-    if settings.CLL_READ_ONLY: 
+    if permission_utils.is_read_only(request): 
         raise PermissionDenied
     
     if not request.user.is_superuser:
@@ -1205,7 +1206,7 @@ def admin_mig_concepts_dt(request):
                 concept.phenotype_owner = earliest_record_as_child_of_phenotype(concept.id)
 
     """
-    if settings.CLL_READ_ONLY: 
+    if permission_utils.is_read_only(request): 
         raise PermissionDenied
     
     if not request.user.is_superuser:
@@ -1275,7 +1276,7 @@ def admin_mig_concepts_dt(request):
 def admin_mig_phenotypes_dt(request):
     # for admin(developers) to migrate phenotypes into dynamic template
    
-    if settings.CLL_READ_ONLY: 
+    if permission_utils.is_read_only(request): 
         raise PermissionDenied
     
     if not request.user.is_superuser:
@@ -1285,14 +1286,14 @@ def admin_mig_phenotypes_dt(request):
         raise PermissionDenied
     
     if request.method == 'GET':
-        if not settings.CLL_READ_ONLY: 
+        if not permission_utils.is_read_only(request): 
             return render(request, 'clinicalcode/adminTemp/admin_temp_tool.html', 
                           {'url': reverse('admin_mig_phenotypes_dt'),
                            'action_title': 'Migrate Phenotypes'
                         })
     
     elif request.method == 'POST':
-        if not settings.CLL_READ_ONLY: 
+        if not permission_utils.is_read_only(request): 
             phenotype_ids = request.POST.get('phenotype_ids')
             phenotype_ids = phenotype_ids.strip().upper()
 
@@ -1450,6 +1451,8 @@ def admin_mig_phenotypes_dt(request):
                         sql_entity_count = "update clinicalcode_entityclass set entity_count ="+str(live_pheno_count)+" where id = 1;"
                         cursor.execute(sql_entity_count)
 
+                    EntityClass.objects.get(id=1).reserve_entity_number(live_pheno_count)
+
                     historical_pheno = Phenotype.history.filter(~Q(id='x'))
                     for p in historical_pheno:
                         temp_data = get_custom_fields_key_value(p)
@@ -1512,7 +1515,7 @@ def admin_mig_phenotypes_dt(request):
 
 @login_required
 def admin_fix_breathe_dt(request):
-    if settings.CLL_READ_ONLY: 
+    if permission_utils.is_read_only(request): 
         raise PermissionDenied
     
     if not request.user.is_superuser:
@@ -1647,7 +1650,7 @@ def admin_fix_breathe_dt(request):
 
 @login_required
 def admin_convert_entity_groups(request):
-    if settings.CLL_READ_ONLY: 
+    if permission_utils.is_read_only(request): 
         raise PermissionDenied
     
     if not request.user.is_superuser:
@@ -1738,7 +1741,7 @@ def admin_convert_entity_groups(request):
 
 @login_required
 def admin_fix_icd_ca_cm_codes(request):
-    if settings.CLL_READ_ONLY: 
+    if permission_utils.is_read_only(request): 
         raise PermissionDenied
     
     if not request.user.is_superuser:
@@ -1881,7 +1884,7 @@ def get_custom_fields_key_value(phenotype):
 @login_required
 def admin_reg_published(request):
     """Register previously published Phenotypes"""
-    if settings.CLL_READ_ONLY or not settings.DOI_ACTIVE: 
+    if permission_utils.is_read_only(request) or not settings.DOI_ACTIVE: 
         raise PermissionDenied
 
     if not request.user.is_superuser:
@@ -1916,7 +1919,7 @@ def admin_reg_published(request):
                 'id', trg.entity_id,
                 'history_id', trg.entity_history_id
               )
-              order by cast(regexp_replace(trg.entity_id, '[a-zA-Z]+', '') as integer) asc
+              order by ref.entity_number asc, trg.entity_id asc
             ) as res
           from public.clinicalcode_publishedgenericentity as trg
           left join public.clinicalcode_historicalgenericentity as ref
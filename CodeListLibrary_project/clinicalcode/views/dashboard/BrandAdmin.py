@@ -456,6 +456,8 @@ class BrandOverviewView(APIView):
 				- No. of unique Monthly Active Users for this month
 				- No. of page hits over the last 7 days
 
+			Request metrics are derived from the daily :model:`RequestRollup` counters, _i.e._ the `stats_context` override is matched against the Brand prefix of each request (`/` if none)
+
 			These can be modified by overrides defined for each brand, _e.g._ ...
 				- HDRN: `{"stats_context": "^/HDRN.*$"}`
 				- HDRUK: `{"stats_context": "^(?!/HDRN)", "content_visibility": {"allow_null": true, "allowed_brands": [1, 2, 3]}}`
@@ -552,7 +554,7 @@ class BrandOverviewView(APIView):
 				content_visibility = psycopg2.sql.SQL('')
 
 			if stats_context is not None:
-				stats_context = psycopg2.sql.SQL('''and (req.url ~ %(stats_ctx)s)''')
+				stats_context = psycopg2.sql.SQL('''and (('/' || req.brand) ~ %(stats_ctx)s)''')
 			else:
 				stats_context = psycopg2.sql.SQL('')
 
@@ -569,16 +571,12 @@ class BrandOverviewView(APIView):
 				psycopg2.sql.SQL('''
 					),
 				'''),
-				# Visible requests
+				# Visible requests, i.e. the daily request counters rolled up from the audit table
 				psycopg2.sql.SQL('''
 					request_vis as (
-					  select req.*,
-									 (case
-										 when req.user_id is not null then req.user_id::text
-										 else null
-									 end) as uid
-						  from public.easyaudit_requestevent as req
-					   where req.method in ('GET', 'POST', 'PUT')
+					  select req.*
+						  from public.clinicalcode_requestrollup as req
+					   where req.date >= date_trunc('month', now() - interval '7 day')::date
 							 '''),
 				stats_context,
 				psycopg2.sql.SQL('''
@@ -616,25 +614,25 @@ class BrandOverviewView(APIView):
 				# Count DAU
 				psycopg2.sql.SQL('''
 					unq_dau as (
-					  select count(distinct coalesce(req.uid, req.remote_ip, '')) as cnt
+					  select count(distinct req.visitor) as cnt
 							from request_vis as req
-						 where req.datetime >= date_trunc('day', now())
+						 where req.date >= date_trunc('day', now())::date
 					),
 				'''),
 				# Count MAU
 				psycopg2.sql.SQL('''
 					unq_mau as (
-					  select count(distinct coalesce(req.uid, req.remote_ip, '')) as cnt
+					  select count(distinct req.visitor) as cnt
 							from request_vis as req
-						 where req.datetime >= date_trunc('month', now())
+						 where req.date >= date_trunc('month', now())::date
 					),
 				'''),
 				# Count page hits last 7 day
 				psycopg2.sql.SQL('''
 					page_hits as (
-					  select count(*) as cnt
+					  select coalesce(sum(req.hits), 0) as cnt
 							from request_vis as req
-						 where req.datetime >= date_trunc('day', now()) - interval '7 day'
+						 where req.date >= (date_trunc('day', now()) - interval '7 day')::date
 					),
 				'''),
 				# Measure Phenoflow usage
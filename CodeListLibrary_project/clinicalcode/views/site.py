@@ -1,18 +1,22 @@
 from datetime import datetime
-from django.http import HttpResponse
+from xml.sax.saxutils import escape
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse, Http404
 from django.conf import settings
 from django.urls import reverse
 from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
 from django.views.decorators.http import require_GET
 
-from clinicalcode.entity_utils import entity_db_utils, model_utils
+import itertools
+
+from clinicalcode.entity_utils import entity_db_utils, model_utils, search_utils, constants
 
 
 @require_GET
 def robots_txt(request):
     is_demo = settings.CLL_READ_ONLY or settings.IS_DEMO or settings.IS_DEVELOPMENT_PC
-    if not settings.IS_PROD_SITE or is_demo:
+    if not getattr(request, 'IS_PROD_SITE', False) or is_demo:
         raise PermissionDenied
 
     response = cache.get('clgen_robots_response')
@@ -29,109 +33,370 @@ def robots_txt(request):
     return HttpResponse(response, content_type='text/plain')
 
 
+"""
+    Describes the published, non-deleted historical entities visible to the sitemap, optionally
+    filtered by the collections of the request's brand
+"""
+SITEMAP_ENTITIES_SQL = '''
+select hist_entity.id,
+       hist_entity.history_id,
+       hist_entity.history_date,
+       coalesce(live_entity.entity_number, 0) as entity_number
+  from public.clinicalcode_historicalgenericentity as hist_entity
+  join public.clinicalcode_genericentity as live_entity
+    on live_entity.id = hist_entity.id
+  join public.clinicalcode_publishedgenericentity as pub_entity
+    on pub_entity.entity_id = hist_entity.id
+   and pub_entity.entity_history_id = hist_entity.history_id
+ where pub_entity.approval_status = %(approved)s
+   and (live_entity.is_deleted is null or live_entity.is_deleted = false)
+   and (hist_entity.is_deleted is null or hist_entity.is_deleted = false)
+   {brand_clause}
+'''
+
+"""
+    Describes each dynamic sitemap section, where:
+        - `sql`: selects the `(id, lastmod)` of each row alongside its `keys`, `lastmod` being its latest published history date;
+        - `keys`: the unique, non-null columns ordering the section's rows, used to page each segment by its keyset bounds;
+        - `urls_per_row`: the number of URLs emitted per row, used to bound each segment by `SITEMAP_SEGMENT_SIZE`.
+"""
+SITEMAP_SECTIONS = {
+    'phenotypes': {
+        'urls_per_row': 2,
+        'keys': ['entity_number', 'id'],
+        'sql': '''
+        with entities as ({entities})
+        select id,
+               entity_number,
+               max(history_date) as lastmod
+          from entities
+         group by id, entity_number
+        ''',
+    },
+    'concepts': {
+        'urls_per_row': 1,
+        'keys': ['id'],
+        'sql': '''
+        with entities as ({entities})
+        select link.concept_id as id,
+               max(hist_concept.history_date) as lastmod
+          from entities
+          join public.clinicalcode_entityconceptlink as link
+            on link.entity_history_id = entities.history_id
+          join public.clinicalcode_historicalconcept as hist_concept
+            on hist_concept.id = link.concept_id
+           and hist_concept.history_id = link.concept_version_id
+         group by link.concept_id
+        ''',
+    },
+}
+
+
+def get_sitemap_brand(request):
+    """
+        Resolves the name & brand collections used to scope the sitemap of a request
+    """
+    brand = model_utils.try_get_brand(request)
+    if brand is None:
+        return 'ALL', None
+
+    collections = entity_db_utils.get_brand_collection_ids(brand.name)
+    return brand.name, collections if isinstance(collections, list) and len(collections) > 0 else None
+
+
+def get_sitemap_section_query(section, collections=None):
+    """
+        Builds the query of a dynamic sitemap section & its parameters
+    """
+    params = { 'approved': constants.APPROVAL_STATUS.APPROVED.value }
+    brand_clause = ''
+    if collections is not None:
+        brand_clause = 'and hist_entity.collections && %(collections)s'
+        params.update({ 'collections': collections })
+
+    entities = SITEMAP_ENTITIES_SQL.format(brand_clause=brand_clause)
+    return SITEMAP_SECTIONS.get(section).get('sql').format(entities=entities), params
+
+
+def get_sitemap_keyset_clause(section, operator, bound, name):
+    """
+        Builds the row comparison of a section's keys against a keyset bound, _e.g._ `(entity_number, id) >= (%(lower_0)s, %(lower_1)s)`
+    """
+    keys = SITEMAP_SECTIONS.get(section).get('keys')
+    refs = [f'%({name}_{i})s' for i in range(len(keys))]
+
+    clause = f'({", ".join(keys)}) {operator} ({", ".join(refs)})'
+    return clause, { f'{name}_{i}': value for i, value in enumerate(bound) }
+
+
+def get_sitemap_segment_size(section):
+    """
+        Computes the max. number of rows per segment of a dynamic sitemap section
+    """
+    return max(constants.SITEMAP_SEGMENT_SIZE // SITEMAP_SECTIONS.get(section).get('urls_per_row'), 1)
+
+
+def get_sitemap_base_url(request):
+    """
+        Resolves the absolute base URL of the sitemap's links
+    """
+    return url_http_replace(request.build_absolute_uri('/')).rstrip('/')
+
+
+def format_sitemap_url(loc, lastmod, priority):
+    """
+        Renders a sitemap `<url/>` element
+    """
+    return f'<url><loc>{escape(loc)}</loc><lastmod>{lastmod}</lastmod><priority>{priority}</priority></url>\n'
+
+
+def format_lastmod(value, default=None):
+    """
+        Formats a sitemap `<lastmod/>` value
+    """
+    return value.date().isoformat() if isinstance(value, datetime) else default
+
+
+def get_static_sitemap_links(request, cur_time):
+    """
+        Resolves the links of the base, API & branded 'about' pages
+    """
+    base_url = get_sitemap_base_url(request)
+    links = [
+        # Base pages
+        (base_url + reverse('concept_library_home'), cur_time, '1.00'),
+        (base_url + reverse('concept_library_home2'), cur_time, '1.00'),
+        (base_url + reverse('search_entities'), cur_time, '1.00'),
+        (base_url + reverse('reference_data'), cur_time, '1.00'),
+        (base_url + reverse('login'), cur_time, '1.00'),
+        (base_url + reverse('contact_us'), cur_time, '1.00'),
+        # API pages
+        (base_url + reverse('api:root'), cur_time, '1.00'),
+        (base_url + reverse('api:concepts'), cur_time, '1.00'),
+        (base_url + reverse('api:get_generic_entities'), cur_time, '1.00'),
+        (base_url + reverse('api:data_sources'), cur_time, '1.00'),
+        (base_url + reverse('api:schema-swagger-ui'), cur_time, '0.80'),
+    ]
+
+    # Dynamic, branded 'about' pages
+    brand = model_utils.try_get_brand(request)
+    branded_about_pages = brand.about_menu if brand is not None else None
+    if isinstance(branded_about_pages, list):
+        for item in branded_about_pages:
+            if not isinstance(item, dict):
+                continue
+
+            ref = item.get('page_name')
+            if isinstance(ref, list):
+                for child in ref:
+                    if not isinstance(child, dict):
+                        continue
+                    name = child.get('page_name')
+                    if isinstance(name, str):
+                        links.append((url_http_replace('%s/about/%s' % (settings.PROD_SITE_HOST, name)), cur_time, '0.80'))
+            elif isinstance(ref, str):
+                links.append((url_http_replace('%s/about/%s' % (settings.PROD_SITE_HOST, ref)), cur_time, '0.80'))
+
+    return links
+
+
+def get_sitemap_row_links(request, section, pk, lastmod):
+    """
+        Resolves the links of a single row of a dynamic sitemap section
+    """
+    if section == 'phenotypes':
+        return [
+            (reverse('entity_detail', kwargs={ 'pk': pk }), lastmod, '0.80'),
+            (reverse('api:get_generic_entity_detail', kwargs={ 'phenotype_id': pk }), lastmod, '0.80'),
+        ]
+
+    return [(reverse('api:api_concept_detail', kwargs={ 'concept_id': pk }), lastmod, '0.80')]
+
+
+def is_sitemap_visible(request):
+    """
+        Sitemaps are only served by the production site
+    """
+    is_demo = settings.CLL_READ_ONLY or settings.IS_DEMO or settings.IS_DEVELOPMENT_PC
+    return getattr(request, 'IS_PROD_SITE', False) and not is_demo
+
+
+def get_sitemap_segments(brand_name, collections=None):
+    """
+        Resolves the segments of each dynamic sitemap section visible to a brand, _i.e._ the `lastmod` & the keyset
+        bound of the first row of each segment, such that segments are paged by their keys rather than their offset
+
+        [!] Note: Cached, by brand, for `SITEMAP_CACHE_TIMEOUT` seconds
+
+        Returns:
+            A (dict) mapping each section to its list of `(lastmod, lower_bound)` segments
+    """
+    cache_key = f'clgen_sitemap_segments__{brand_name}'
+    segments = cache.get(cache_key)
+    if isinstance(segments, dict):
+        return segments
+
+    segments = { }
+    with connection.cursor() as cursor:
+        for section, info in SITEMAP_SECTIONS.items():
+            keys = info.get('keys')
+            sql, params = get_sitemap_section_query(section, collections)
+            cursor.execute(
+                f'''
+                select t.segment_lastmod, {', '.join(f't.{x}' for x in keys)}
+                  from (
+                    select ranked.*,
+                           max(ranked.lastmod) over (partition by (ranked.ordinal - 1) / %(segment_size)s) as segment_lastmod
+                      from (
+                        select section_rows.*,
+                               row_number() over (order by {', '.join(keys)}) as ordinal
+                          from ({sql}) as section_rows
+                      ) as ranked
+                  ) as t
+                 where (t.ordinal - 1) %% %(segment_size)s = 0
+                 order by t.ordinal;
+                ''',
+                params | { 'segment_size': get_sitemap_segment_size(section) }
+            )
+
+            segments[section] = [(row[0], tuple(row[1:])) for row in cursor.fetchall()]
+
+    cache.set(cache_key, segments, constants.SITEMAP_CACHE_TIMEOUT)
+    return segments
+
+
 @require_GET
 def get_sitemap(request):
-    is_demo = settings.CLL_READ_ONLY or settings.IS_DEMO or settings.IS_DEVELOPMENT_PC
-    if not settings.IS_PROD_SITE or is_demo:
+    """
+        Renders the sitemap index, _i.e._ a `<sitemap/>` entry for the static pages alongside each segment of
+        the published phenotypes & concepts visible to the request's brand
+
+        [!] Note: The index & each of its segments are cached separately, by brand, for `SITEMAP_CACHE_TIMEOUT` seconds
+    """
+    if not is_sitemap_visible(request):
         raise PermissionDenied
 
-    response = cache.get('clgen_sitemap_response')
+    brand_name, collections = get_sitemap_brand(request)
+    cache_key = f'clgen_sitemap_index__{brand_name}'
+
+    response = cache.get(cache_key)
     if not isinstance(response, str):
         cur_time = str(datetime.now().date())
+        base_url = get_sitemap_base_url(request)
+
+        segments = [('pages', 1, cur_time)]
+        for section, bounds in get_sitemap_segments(brand_name, collections).items():
+            segments += [(section, page, format_lastmod(lastmod, cur_time)) for page, (lastmod, _) in enumerate(bounds, start=1)]
 
-        links = [
-            # Base pages
-            (request.build_absolute_uri(reverse('concept_library_home')), cur_time, '1.00'), 
-            (request.build_absolute_uri(reverse('concept_library_home2')), cur_time, '1.00'),  
-            (request.build_absolute_uri(reverse('search_entities')), cur_time, '1.00'),  
-            (request.build_absolute_uri(reverse('reference_data')), cur_time, '1.00'),
-            (request.build_absolute_uri(reverse('login')), cur_time, '1.00'),
-            (request.build_absolute_uri(reverse('contact_us')), cur_time, '1.00'),
-            # API pages
-            (request.build_absolute_uri(reverse('api:root')), cur_time, '1.00'), 
-            (request.build_absolute_uri(reverse('api:concepts')), cur_time, '1.00'), 
-            (request.build_absolute_uri(reverse('api:get_generic_entities')), cur_time, '1.00'), 
-            (request.build_absolute_uri(reverse('api:data_sources')), cur_time, '1.00'), 
-            (request.build_absolute_uri(reverse('api:schema-swagger-ui')), cur_time, '0.80'), 
+        response = [
+            '<?xml version="1.0" encoding="UTF-8"?>\n',
+            '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n',
         ]
 
-        # Dynamic, branded 'about' pages
-        brand = model_utils.try_get_brand(request)
-        branded_about_pages = brand.about_menu if brand is not None else None
-        if isinstance(branded_about_pages, list):
-            for item in branded_about_pages:
-                if not isinstance(item, dict):
-                    continue
-
-                ref = item.get('page_name')
-                if isinstance(ref, list):
-                    for child in ref:
-                        if not isinstance(child, dict):
-                            continue
-                        name = child.get('page_name')
-                        if isinstance(name, str):
-                            links.append(('%s/about/%s' % (settings.PROD_SITE_HOST, name), cur_time, '0.80'))
-                elif isinstance(ref, str):
-                    links.append(('%s/about/%s' % (settings.PROD_SITE_HOST, ref), cur_time, '0.80'))
-
-        # Add links of published Concepts/Phenotypes
-        links += get_published_phenotypes_and_concepts(request, cur_time)
-
-        # Build final sitemap
-        response = '''
-                    <urlset
-                        xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
-                        xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
-                        xsi:schemaLocation="http://www.sitemaps.org/schemas/sitemap/0.9
-                                http://www.sitemaps.org/schemas/sitemap/0.9/sitemap.xsd">
-                    '''
-        for t in links:
-            response += '''
-                        <url>
-                            <loc>''' + url_http_replace(t[0]) + '''</loc>
-                            <lastmod>''' + t[1] + '''</lastmod>
-                            <priority>''' + t[2] + '''</priority>        
-                        </url>
-                        '''
-
-        response += '</urlset>'
-        cache.set('clgen_sitemap_response', response, 60 * 60 * 8) # 8hrly cache
+        for section, page, lastmod in segments:
+            loc = base_url + reverse('sitemap_segment', kwargs={ 'section': section, 'page': page })
+            response.append(f'<sitemap><loc>{escape(loc)}</loc><lastmod>{lastmod}</lastmod></sitemap>\n')
+
+        response.append('</sitemapindex>')
+        response = ''.join(response)
+        cache.set(cache_key, response, constants.SITEMAP_CACHE_TIMEOUT)
 
     return HttpResponse(response, content_type='application/xml')
 
 
-def get_published_phenotypes_and_concepts(request, cur_time=None):
+@require_GET
+def get_sitemap_segment(request, section, page):
     """
-        Add links of the published concepts/phenotypes to the sitemap
+        Renders a segment of the sitemap, _i.e._ either (a) the static pages or (b) at most `SITEMAP_SEGMENT_SIZE` URLs
+        of the published phenotypes or concepts visible to the request's brand
+
+        [!] Note: Dynamic segments are streamed from a server-side cursor as they're built, and cached once complete
     """
-    if not isinstance(cur_time, str) or len(cur_time) < 1:
-        cur_time = str(datetime.now().date())
+    if not is_sitemap_visible(request):
+        raise PermissionDenied
+
+    page = int(page)
+    if page < 1 or (section != 'pages' and section not in SITEMAP_SECTIONS):
+        raise Http404
 
-    links = []
+    brand_name, collections = get_sitemap_brand(request)
+    cache_key = f'clgen_sitemap__{brand_name}__{section}__{page}'
 
-    #--------------------------
-    # published phenotypes
-    published_phenotypes = entity_db_utils.get_visible_live_or_published_generic_entity_versions(
-        request,
-        get_live_and_or_published_ver= 2,  # 1= live only, 2= published only, 3= live+published
-        exclude_deleted=True,
-        filter_cond='',
-        show_top_version_only=False,
+    response = cache.get(cache_key)
+    if isinstance(response, str):
+        return HttpResponse(response, content_type='application/xml')
+
+    header = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
     )
+    footer = '</urlset>'
 
-    published_phenotypes_ids = entity_db_utils.get_list_of_visible_entity_ids(published_phenotypes, return_id_or_history_id="id")
-    for pk in published_phenotypes_ids:
-        links +=[(request.build_absolute_uri(reverse('entity_detail', kwargs={'pk': pk})), cur_time, "0.80")]
-        links +=[(request.build_absolute_uri(reverse('api:get_generic_entity_detail', kwargs={'phenotype_id': pk})), cur_time, "0.80")]
+    if section == 'pages':
+        if page != 1:
+            raise Http404
 
-    #--------------------------    
-    # published concepts 
-    published_concepts_ids = entity_db_utils.get_concept_ids_from_phenotypes(published_phenotypes, return_id_or_history_id="id")
-    for pk in published_concepts_ids:
-        #links +=[(request.build_absolute_uri(reverse('concept_detail', kwargs={'pk': pk})), cur_time, "0.80")]
-        links +=[(request.build_absolute_uri(reverse('api:api_concept_detail', kwargs={'concept_id': pk})), cur_time, "0.80")]
+        links = get_static_sitemap_links(request, str(datetime.now().date()))
+        response = header + ''.join(format_sitemap_url(*link) for link in links) + footer
+        cache.set(cache_key, response, constants.SITEMAP_CACHE_TIMEOUT)
+        return HttpResponse(response, content_type='application/xml')
 
-    return links
+    bounds = get_sitemap_segments(brand_name, collections).get(section)
+    if page > len(bounds):
+        raise Http404
+
+    # Page through the section by the keyset bounds of its segments, _i.e._ the predicates are pushed down into its query
+    keys = SITEMAP_SECTIONS.get(section).get('keys')
+    sql, params = get_sitemap_section_query(section, collections)
+
+    clauses = [ ]
+    for operator, index, name in (('>=', page - 1, 'lower'), ('<', page, 'upper')):
+        if index >= len(bounds):
+            continue
+
+        clause, values = get_sitemap_keyset_clause(section, operator, bounds[index][1], name)
+        clauses.append(clause)
+        params |= values
+
+    sql = f'''
+    select id, lastmod
+      from ({sql}) as section_rows
+     where {' and '.join(clauses)}
+     order by {', '.join(keys)}
+     limit %(size)s;
+    '''
+    params |= { 'size': get_sitemap_segment_size(section) }
+
+    # Fetch the first chunk eagerly to resolve out of range segments
+    chunks = search_utils.iterate_query_chunks(sql, params, chunk_size=constants.SITEMAP_CHUNK_SIZE)
+    first = next(chunks, None)
+    if first is None:
+        chunks.close()
+        raise Http404
+
+    base_url = get_sitemap_base_url(request)
+    cur_time = str(datetime.now().date())
+
+    def stream_segment():
+        parts = [header]
+        yield header
+
+        for rows in itertools.chain([first], chunks):
+            chunk = ''.join(
+                format_sitemap_url(base_url + loc, lastmod, priority)
+                for pk, modified in rows
+                for loc, lastmod, priority in get_sitemap_row_links(request, section, pk, format_lastmod(modified, cur_time))
+            )
+            parts.append(chunk)
+            yield chunk
+
+        parts.append(footer)
+        yield footer
+
+        # Only cache complete segments
+        cache.set(cache_key, ''.join(parts), constants.SITEMAP_CACHE_TIMEOUT)
+
+    return StreamingHttpResponse(stream_segment(), content_type='application/xml')
 
 
 def url_http_replace(url1):
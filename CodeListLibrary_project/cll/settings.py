@@ -85,6 +85,8 @@ def get_env_value(env_variable, cast=None, default=Symbol('None'), strip_empty=F
     try:
         if cast == 'int':
             return int(os.environ[env_variable])
+        elif cast == 'float':
+            return float(os.environ[env_variable])
         elif cast == 'bool':
             return bool(strtobool(os.environ[env_variable]))
         else:
@@ -206,6 +208,7 @@ PROD_SITE_BRAND = get_env_value('PROD_SITE_BRAND', cast='str')
 PROD_SITE_REGEX = get_env_value('PROD_SITE_REGEX', cast='str')
 
 ## Brand related settings
+##   - Defaults only, the per-request values are attached to the request by the `BrandMiddleware`
 IS_PROD_SITE = False
 
 BRAND_OBJECT = {}
@@ -358,6 +361,8 @@ MIDDLEWARE = [
     'clinicalcode.middleware.brands.BrandMiddleware',
     # Handle user session expiry
     'clinicalcode.middleware.sessions.SessionExpiryMiddleware',
+    # Route read-only API & search traffic to the read replica
+    'clinicalcode.middleware.database.ReadReplicaMiddleware',
     # Handle exceptions
     'clinicalcode.middleware.exceptions.ExceptionMiddleware',
 ]
@@ -471,6 +476,11 @@ TEMPLATES = [
 #!> Database settings
 
 # Databases, ref @ https://docs.djangoproject.com/en/1.10/ref/settings/#databases
+#
+#   - Connections are persisted across requests for `POSTGRES_CONN_MAX_AGE` seconds & health checked before reuse;
+#   - Alternatively, set `POSTGRES_POOL` to use a `psycopg_pool` connection pool per process (requires `psycopg[pool]`);
+#   - Set `POSTGRES_REPLICA_HOST` to route read-only API & search traffic to a replica, see `clinicalcode.routers`.
+#
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql_psycopg2',
@@ -479,12 +489,44 @@ DATABASES = {
         'PASSWORD': get_env_value('POSTGRES_PASSWORD'),
         'HOST': get_env_value('POSTGRES_HOST'),
         'PORT': get_env_value('POSTGRES_PORT'),
+        'CONN_MAX_AGE': get_env_value('POSTGRES_CONN_MAX_AGE', cast='int', default=600),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': { },
     }
 }
 
 # sslmode is required for production DB
 if not IS_DEMO and (not IS_DEVELOPMENT_PC):
-    DATABASES['default']['OPTIONS'] = {'sslmode': 'require'}
+    DATABASES['default']['OPTIONS'] |= {'sslmode': 'require'}
+
+if get_env_value('POSTGRES_POOL', cast='bool', default=False):
+    # Pooled connections are returned to the pool on close & therefore must not be persisted
+    DATABASES['default'] |= { 'ENGINE': 'django.db.backends.postgresql', 'CONN_MAX_AGE': 0 }
+    DATABASES['default']['OPTIONS'] |= {
+        'pool': {
+            'min_size': get_env_value('POSTGRES_POOL_MIN_SIZE', cast='int', default=2),
+            'max_size': get_env_value('POSTGRES_POOL_MAX_SIZE', cast='int', default=10),
+            'timeout': get_env_value('POSTGRES_POOL_TIMEOUT', cast='int', default=10),
+        },
+    }
+
+# Optional read replica, only used for read-only traffic outside of the gateway & read-only deployments
+DATABASE_REPLICA_ALIAS = 'replica'
+DATABASE_ROUTERS = ['clinicalcode.routers.ReadReplicaRouter']
+
+if get_env_value('POSTGRES_REPLICA_HOST', default=None, strip_empty=True) and not CLL_READ_ONLY and not IS_INSIDE_GATEWAY:
+    DATABASES[DATABASE_REPLICA_ALIAS] = DATABASES['default'] | {
+        'HOST': get_env_value('POSTGRES_REPLICA_HOST'),
+        'PORT': get_env_value('POSTGRES_REPLICA_PORT', default=DATABASES['default'].get('PORT')),
+        'OPTIONS': dict(DATABASES['default'].get('OPTIONS')),
+        'TEST': { 'MIRROR': 'default' },
+    }
+
+# Describes the read-only requests routed to the replica, i.e. safe methods targeting these URL namespaces or names
+DATABASE_REPLICA_ROUTES = {
+    'namespaces': ['api'],
+    'names': ['search_entities'],
+}
 
 
 # ==============================================================================#
@@ -628,6 +670,21 @@ OVERRIDE_EASY_AUDIT_IGNORE_URLS = {
     ],
 }
 
+# Request audit queue, i.e. the in-process buffer flushed in batches by a background thread
+#
+#   Note:
+#     - `max_size`: max. no. of pending events held per process
+#     - `batch_size`: no. of events written per bulk insert; a flush is triggered once reached
+#     - `flush_interval`: max. no. of seconds an event remains pending
+#     - `backpressure`: one of `drop_newest` or `drop_oldest`, _i.e._ the event discarded if the queue is full
+#
+AUDIT_REQUEST_QUEUE = {
+    'max_size': get_env_value('AUDIT_QUEUE_MAX_SIZE', cast='int', default=10000),
+    'batch_size': get_env_value('AUDIT_QUEUE_BATCH_SIZE', cast='int', default=500),
+    'flush_interval': get_env_value('AUDIT_QUEUE_FLUSH_INTERVAL', cast='float', default=5.0),
+    'backpressure': get_env_value('AUDIT_QUEUE_BACKPRESSURE', default='drop_oldest'),
+}
+
 
 # ==============================================================================#
 
@@ -645,6 +702,8 @@ SESSION_EXPIRY = {
     'SESSION_LIMIT': timedelta(weeks=1),
     # i.e. logout after 1 day if no requests were made during this time (optional)
     'IDLE_LIMIT': timedelta(days=1),
+    # i.e. only record the last request time at most once per minute (optional)
+    'IDLE_WRITE_INTERVAL': timedelta(minutes=1),
 }
 
 ## Django cookie session settings
@@ -770,6 +829,14 @@ CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 ## Task queue
 ENABLE_DEMO_TASK_QUEUE = get_env_value('ENABLE_DEMO_TASK_QUEUE', cast='bool', default=False)
 
+## OpenCodelists sync settings
+##     - `OPENCODELISTS_URL`: the base URL of the OpenCodelists service, _e.g._ a local stub server when testing
+##     - `OPENCODELISTS_CACHE_DIR`: the directory of the on-disk response cache
+##     - `OPENCODELISTS_WORKERS`: the max. no. of concurrent codelist downloads
+OPENCODELISTS_URL = get_env_value('OPENCODELISTS_URL', default='https://www.opencodelists.org')
+OPENCODELISTS_CACHE_DIR = get_env_value('OPENCODELISTS_CACHE_DIR', default=os.path.join(BASE_DIR, '.cache', 'opencodelists'))
+OPENCODELISTS_WORKERS = get_env_value('OPENCODELISTS_WORKERS', cast='int', default=8)
+
 ## Swagger settings
 ##     SWAGGER_SETTINGS = { 'JSON_EDITOR': True, }
 SWAGGER_TITLE = 'Concept Library API'
@@ -866,7 +933,37 @@ else:
                 'CLIENT_CLASS': 'django_redis.client.DefaultClient'
             },
             'KEY_PREFIX': 'cll',
-        }
+        },
+        'sessions': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': 'redis://redis:6379/1',
+            'OPTIONS': {
+                'PASSWORD': REDIS_PASSWORD,
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient'
+            },
+            'KEY_PREFIX': 'cll-session',
+        },
     }
 
 # ==============================================================================#
+
+#!> Session engine
+
+# Session storage, one of...
+#
+#   - `db`: stored within the `django_session` table (default)
+#   - `cached_db`: write-through Redis cache in front of the `django_session` table
+#   - `cache`: stored within Redis only, i.e. sessions are lost if Redis is flushed
+#
+#   Note:
+#     - Cache-backed modes fall back to `db` if caching is disabled, _e.g._ when `DEBUG` is active
+#     - Expired `django_session` rows are removed by the `clear_sessions` command
+#
+SESSION_BACKEND = get_env_value('SESSION_BACKEND', default='db')
+if SESSION_BACKEND in ('cache', 'cached_db') and 'sessions' in CACHES:
+    SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_BACKEND}'
+    SESSION_CACHE_ALIAS = 'sessions'
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+# ==============================================================================#
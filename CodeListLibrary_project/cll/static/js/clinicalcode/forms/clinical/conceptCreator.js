@@ -712,7 +712,8 @@ export default class ConceptCreator {
    * @param {boolean} useWildcard whether to search via wildcard
    * @param {boolean} useDesc whether to use the description to search (rather than via code)
    * @param {boolean} caseSensitive whether pattern matches are case sensitive - only applies to pattern search
-   * @returns {promise} a promise that resolves with an object describing the results if successful
+   * @returns {promise} a promise that resolves with an object describing the results if successful,
+   *                    or rejects with an error describing why the search was refused
    */
   tryQueryCodelist(searchTerm, codingSystemId, useWildcard, useDesc, caseSensitive) {
     const encodedSearchterm = encodeURIComponent(searchTerm);
@@ -736,7 +737,16 @@ export default class ConceptCreator {
         }
       }
     )
-    .then(response => response.json());
+    .then(async (response) => {
+      const body = await response.json();
+      if (!response.ok) {
+        const err = new Error(body?.message || 'Failed to search codes, please try again.');
+        err.isSearchError = true;
+        throw err;
+      }
+
+      return body;
+    });
   }
 
   /**
@@ -2198,6 +2208,11 @@ export default class ConceptCreator {
           });
         })
         .catch((e) => {
+          if (e?.isSearchError) {
+            this.#pushToast({ type: 'danger', message: strictSanitiseString(e.message) });
+            return;
+          }
+
           console.warn(e);
         })
         .finally(() => {
@@ -21,7 +21,7 @@
 from django.apps import apps
 from django.conf import settings
 from django.urls import re_path as url
-from django.urls import include
+from django.urls import include, clear_url_caches
 from django.contrib import admin
 from django.core.cache import cache
 from django.conf.urls.static import static
@@ -31,7 +31,12 @@ from django.contrib.staticfiles.views import serve
 
 import re
 import logging
+import threading
 
+from types import ModuleType
+
+from clinicalcode import urls as app_urls
+from clinicalcode.api import urls as api_urls
 from clinicalcode.views import (GenericEntity, Publish, Decline)
 
 #--------------------------------------------------------------------
@@ -68,6 +73,10 @@ URL_VARIANTS = [
 """Resulting URL configuration"""
 urlpatterns = []
 
+"""Precompiled Brand URL configurations, keyed by their Brand context"""
+BRAND_URLCONFS = {}
+BRAND_URLCONF_LOCK = threading.Lock()
+
 #--------------------------------------------------------------------
 # Utilities
 def get_brand_ctx_transform(urls):
@@ -144,47 +153,109 @@ def append_branded_urls(brand=None, variants=[], patterns=[]):
 	return patterns
 
 #--------------------------------------------------------------------
-# Brands
-current_brand = f'{settings.CURRENT_BRAND}/' if isinstance(settings.CURRENT_BRAND, str) and settings.CURRENT_BRAND != '' else ''
-if settings.IS_PROD_SITE:
-	current_brand = ''
+# Builders
+def build_urlpatterns(brand=None, is_prod_site=False, read_only=None):
+	"""
+		Builds the URL patterns for the specified Brand context
 
-#--------------------------------------------------------------------
-# Urls
-urlpatterns += [
-	# api
-	url(r'^' + current_brand + 'api/v1/', include(('clinicalcode.api.urls', 'cll'), namespace='api')),
+		Args:
+			brand        (Brand|None): optionally specify the Brand context; defaults to the unbranded site if not specified
+			is_prod_site       (bool): optionally specify whether the patterns are served from the production domain, _i.e._ without a Brand prefix; defaults to `False`
+			read_only     (bool|None): optionally specify whether to omit the non-readonly routes; defaults to `settings.CLL_READ_ONLY` if not specified
 
-	# account management
-	url(r'^' + current_brand + 'account/', include('clinicalcode.urls_account')),
+		Returns:
+			A (list) of URL patterns describing the site's routes for the given Brand context
+	"""
+	read_only = settings.CLL_READ_ONLY if not isinstance(read_only, bool) else read_only
 
-	# app urls
-	url(r'^' + current_brand + '', include('clinicalcode.urls')),
-]
+	# Create/Update & tooling routes are omitted from READ-ONLY configurations
+	api_patterns = api_urls.urlpatterns
+	app_patterns = app_urls.urlpatterns
+	if not read_only:
+		api_patterns = api_patterns + api_urls.write_urlpatterns
+		app_patterns = app_patterns + app_urls.write_urlpatterns
 
-# Media files
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+	current_brand = f'{brand.name}/' if brand is not None and not is_prod_site else ''
+	patterns = [
+		# api
+		url(r'^' + current_brand + 'api/v1/', include((api_patterns, 'cll'), namespace='api')),
 
-# Static files
-if settings.DEBUG:
-	urlpatterns += static(settings.STATIC_URL, view=cache_control(no_cache=True, must_revalidate=True)(serve))
+		# account management
+		url(r'^' + current_brand + 'account/', include('clinicalcode.urls_account')),
 
-# Admin system
-if not settings.CLL_READ_ONLY:
-	urlpatterns += [
-		url(r'^' + current_brand + 'admin/', admin.site.urls),
+		# app urls
+		url(r'^' + current_brand + '', include(app_patterns)),
 	]
 
-# Variant URL resolvers
-try:
-	if not settings.IS_PROD_SITE:
-		brands = apps.get_model(app_label='clinicalcode', model_name='Brand')
-		brands = brands.all_instances()
+	# Media files
+	patterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+	# Static files
+	if settings.DEBUG:
+		patterns += static(settings.STATIC_URL, view=cache_control(no_cache=True, must_revalidate=True)(serve))
+
+	# Admin system
+	if not read_only:
+		patterns += [
+			url(r'^' + current_brand + 'admin/', admin.site.urls),
+		]
+
+	# Variant URL resolvers
+	append_branded_urls(brand=brand if not is_prod_site else None, variants=URL_VARIANTS, patterns=patterns)
+
+	return patterns
+
+def get_brand_urlconf(brand_name=None, is_prod_site=False, read_only=None):
+	"""
+		Resolves the precompiled URL configuration _assoc._ with the specified Brand context, building it on first use
+
+		Note:
+			- The resulting module is cached for the lifetime of the process and is shared across threads, its patterns must not be modified;
+			- See `clear_brand_urlconfs()` to invalidate the cached URL configurations.
+
+		Args:
+			brand_name    (str|None): optionally specify the name of the Brand context; defaults to the unbranded site if not specified
+			is_prod_site      (bool): optionally specify whether the patterns are served from the production domain; defaults to `False`
+			read_only    (bool|None): optionally specify whether to omit the non-readonly routes; defaults to `settings.CLL_READ_ONLY` if not specified
+
+		Returns:
+			A (ModuleType) containing the `urlpatterns` of the Brand, to be used as a request's `urlconf`
+	"""
+	read_only = settings.CLL_READ_ONLY if not isinstance(read_only, bool) else read_only
+	brand_name = brand_name if isinstance(brand_name, str) else ''
+
+	key = (brand_name, is_prod_site, read_only)
+	urlconf = BRAND_URLCONFS.get(key)
+	if urlconf is not None:
+		return urlconf
+
+	with BRAND_URLCONF_LOCK:
+		urlconf = BRAND_URLCONFS.get(key)
+		if urlconf is not None:
+			return urlconf
 
-		target = next((x for x in brands if x.name == settings.CURRENT_BRAND), None)
-	else:
-		target = None
+		brand = None
+		if len(brand_name) > 0:
+			brands = apps.get_model(app_label='clinicalcode', model_name='Brand')
+			brand = next((x for x in brands.all_instances() if x.name == brand_name), None)
 
-	append_branded_urls(brand=target, variants=URL_VARIANTS, patterns=urlpatterns)
-except Exception as e:
-	logging.exception(f'Failed to create branded URL variants with err:\n\n{str(e)}')
+		urlconf = ModuleType(f'{__name__}.{brand_name or "default"}{"__prod" if is_prod_site else ""}{"__ro" if read_only else ""}')
+		urlconf.urlpatterns = tuple(build_urlpatterns(brand=brand, is_prod_site=is_prod_site, read_only=read_only))
+		BRAND_URLCONFS[key] = urlconf
+
+	return urlconf
+
+def clear_brand_urlconfs(*args, **kwargs):
+	"""
+		Clears the precompiled Brand URL configurations and Django's resolver cache
+
+		Note:
+			Can be used as a signal receiver, _e.g._ on `Brand` creation, modification & deletion
+	"""
+	with BRAND_URLCONF_LOCK:
+		BRAND_URLCONFS.clear()
+	clear_url_caches()
+
+#--------------------------------------------------------------------
+# Urls
+urlpatterns += build_urlpatterns()